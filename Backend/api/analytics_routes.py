@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+
+from core.auth import role_required
+from core.cache import cache_analytics
+from core.catalogo import catalogo
+from core import analytics
+
+analytics_bp = Blueprint('analytics', __name__, url_prefix='/api/analytics')
+
+DIAS_POR_DEFECTO = 90
+# tope del rango: varios años andan bien, esto es para no recorrer toda la historia por error
+MAX_DIAS = 366 * 10
+
+
+def _parse_fecha(valor):
+    """'2025-10-31' (o con hora) -> date. ValueError si no sirve."""
+    return datetime.fromisoformat(valor.strip().replace('Z', '+00:00')).date()
+
+
+def _rango_pedido():
+    """(desde, hasta, error) desde ?desde / ?hasta. Por defecto los últimos 90 días."""
+    hoy = datetime.utcnow().date()
+    try:
+        hasta = _parse_fecha(request.args['hasta']) if request.args.get('hasta') else hoy
+        desde = (
+            _parse_fecha(request.args['desde']) if request.args.get('desde')
+            else hasta - timedelta(days=DIAS_POR_DEFECTO - 1)
+        )
+    except ValueError:
+        return None, None, (jsonify({"error": "Fecha inválida, use AAAA-MM-DD"}), 400)
+
+    if desde > hasta:
+        return None, None, (jsonify({"error": "'desde' no puede ser posterior a 'hasta'"}), 400)
+    if (hasta - desde).days >= MAX_DIAS:
+        return None, None, (jsonify({"error": f"El rango no puede superar {MAX_DIAS} días"}), 400)
+    return desde, hasta, None
+
+
+# =========================
+# GET /api/analytics/tiempo-entrega?desde=2023-01-01&hasta=2025-12-31
+# =========================
+@analytics_bp.route('/tiempo-entrega', methods=['GET'])
+@jwt_required()
+@role_required('gerente')
+@cache_analytics('tiempo_entrega')
+def tiempo_entrega():
+    """
+    Promedio y percentiles (p50/p90/p95) de fecha_salida - fecha_ingreso,
+    en horas, de las órdenes finalizadas en el rango. ?mecanico_id=N opcional.
+    """
+    desde, hasta, error = _rango_pedido()
+    if error:
+        return error
+
+    mecanico_id = request.args.get('mecanico_id', type=int)
+    return jsonify({
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "mecanico_id": mecanico_id,
+        **analytics.tiempo_entrega(desde, hasta, mecanico_id),
+    }), 200
+
+
+# =========================
+# GET /api/analytics/tiempo-por-estado?desde=...&hasta=...
+# =========================
+@analytics_bp.route('/tiempo-por-estado', methods=['GET'])
+@jwt_required()
+@role_required('gerente')
+@cache_analytics('tiempo_por_estado')
+def tiempo_por_estado():
+    """
+    Cuánto tiempo pasan las órdenes en cada estado (EN_ESPERA,
+    EN_REPARACION), según el historial de estados_orden.
+    """
+    desde, hasta, error = _rango_pedido()
+    if error:
+        return error
+
+    return jsonify({
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "estados": analytics.tiempo_por_estado(desde, hasta),
+    }), 200
+
+
+# =========================
+# GET /api/analytics/finalizadas-por-semana?desde=...&hasta=...
+# =========================
+@analytics_bp.route('/finalizadas-por-semana', methods=['GET'])
+@jwt_required()
+@role_required('gerente')
+@cache_analytics('finalizadas_por_semana')
+def finalizadas_por_semana():
+    """
+    Órdenes finalizadas por mecánico y por semana (lunes de la semana de
+    fecha_salida). `por_semana` va alineado con `semanas`, con ceros, listo
+    para graficar.
+    """
+    desde, hasta, error = _rango_pedido()
+    if error:
+        return error
+
+    filas = analytics.finalizadas_por_semana(desde, hasta)
+
+    # todas las semanas del rango, aunque no tengan órdenes
+    lunes = desde - timedelta(days=desde.weekday())
+    semanas = []
+    while lunes <= hasta:
+        semanas.append(lunes)
+        lunes += timedelta(days=7)
+    posicion = {s: i for i, s in enumerate(semanas)}
+
+    nombres = {m["id"]: m["nombre"] for m in catalogo.mecanicos(solo_activos=False)}
+    por_mecanico = {}
+    for semana, mecanico_id, cantidad in filas:
+        conteos = por_mecanico.setdefault(mecanico_id, [0] * len(semanas))
+        conteos[posicion[semana]] += cantidad
+
+    mecanicos = [
+        {
+            "mecanico_id": mecanico_id,
+            "nombre": nombres.get(mecanico_id) if mecanico_id else "Sin asignar",
+            "total": sum(conteos),
+            "por_semana": conteos,
+        }
+        for mecanico_id, conteos in por_mecanico.items()
+    ]
+    mecanicos.sort(key=lambda m: -m["total"])
+
+    return jsonify({
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "semanas": [s.isoformat() for s in semanas],
+        "mecanicos": mecanicos,
+        "total": sum(m["total"] for m in mecanicos),
+    }), 200
@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt, verify_jwt_in_request
+from flask_jwt_extended import jwt_required, get_jwt, verify_jwt_in_request
+from sqlalchemy.orm import joinedload
 from core.extensions import db
+from core.auth import claims_usuario, emitir_token, identidad_actual, role_required
+from core import passwords
 from models.personas import Usuario
-from models.catalogos import Rol
+from core.catalogo import catalogo
 import json
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
@@ -24,8 +27,7 @@ def register():
         if Usuario.query.filter_by(correo=data['correo']).first():
             return jsonify({"error": f"El correo '{data['correo']}' ya está registrado"}), 409
     
-    rol = Rol.query.get(data['rol_id'])
-    if not rol:
+    if not catalogo.rol(data['rol_id']):
         return jsonify({"error": "El rol especificado no existe"}), 404
     
     usuario_count = Usuario.query.count()
@@ -59,41 +61,62 @@ def login():
     
     usuario = Usuario.query.filter_by(usuario=data['usuario']).first()
     
-    if not usuario or not usuario.check_password(data['contrasena']):
-        return jsonify({"error": "Credenciales inválidas"}), 401
-    
-    user_data = {
-        'id': usuario.id,
-        'usuario': usuario.usuario,
-        'rol': usuario.rol.nombre if usuario.rol else None,
-        'rol_id': usuario.rol_id
-    }
+    try:
+        valido = usuario is not None and usuario.check_password(data['contrasena'])
+    except passwords.HashSaturado:
+        resp = jsonify({"error": "Demasiados inicios de sesión en este momento, intente de nuevo"})
+        resp.headers["Retry-After"] = "2"
+        return resp, 503
     
-    additional_claims = {"user": user_data}
-    access_token = create_access_token(identity=str(usuario.id), additional_claims=additional_claims)
+    if not valido:
+        return jsonify({"error": "Credenciales inválidas"}), 401
     
+    # si cambiaron los parámetros del hash, aprovechamos que tenemos la contraseña
+    if passwords.necesita_rehash(usuario.contrasena_hash):
+        try:
+            usuario.set_password(data['contrasena'])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print("[WARN] No se pudo regenerar el hash del usuario:", e)
+    
+    # empleado_id y la versión de permisos van en el token, así las rutas no
+    # tienen que buscar al usuario en cada request (ver core.auth)
     return jsonify({
-        "access_token": access_token,
-        "user": user_data
+        "access_token": emitir_token(usuario),
+        "user": claims_usuario(usuario)
     }), 200
 
 
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
 def me():
-    claims = get_jwt()
-    user_data = claims.get('user')
-    
-    if not user_data:
+    ident = identidad_actual()
+    if not ident:
         return jsonify({"error": "No se pudo obtener la información del usuario"}), 401
     
-    usuario = Usuario.query.get(user_data.get('id'))
+    # el perfil completo (correo, fechas, empleado) sí sale de la base, en un solo SELECT
+    # (el rol viene del catálogo en memoria)
+    usuario = (
+        Usuario.query
+        .options(joinedload(Usuario.empleado))
+        .filter(Usuario.id == ident.id)
+        .first()
+    )
     if not usuario:
         return jsonify({"error": "Usuario no encontrado"}), 404
     
     return jsonify(usuario.to_dict()), 200
 
 
+@auth_bp.route('/hashing', methods=['GET'])
+@jwt_required()
+@role_required("gerente")
+def hashing_stats():
+    """Estado del pool de hash de contraseñas de este proceso (cola, esperas, rechazos)."""
+    return jsonify(passwords.pool_hash.estadisticas()), 200
+
+
 @auth_bp.route('/logout', methods=['POST'])
 def logout():
     return jsonify({"mensaje": "Sesión cerrada exitosamente"}), 200
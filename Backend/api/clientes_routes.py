@@ -2,6 +2,9 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from core.extensions import db
 from core.auth import role_required
+from core.paginacion import paginar_respuesta
+from core.busqueda import filtro_contiene
+from core.importacion import importar_desde_request
 from models.personas import Cliente
 
 clientes_bp = Blueprint('clientes', __name__, url_prefix='/api/clientes')
@@ -15,15 +18,10 @@ def get_clientes():
     
     if q:
         query = query.filter(
-            db.or_(
-                Cliente.nombre.ilike(f'%{q}%'),
-                Cliente.telefono.ilike(f'%{q}%'),
-                Cliente.correo.ilike(f'%{q}%')
-            )
+            filtro_contiene([Cliente.nombre, Cliente.telefono, Cliente.correo], q)
         )
     
-    clientes = query.order_by(Cliente.nombre).all()
-    return jsonify([c.to_dict() for c in clientes]), 200
+    return paginar_respuesta(query, [Cliente.nombre, Cliente.id], lambda c: c.to_dict())
 
 
 @clientes_bp.route('', methods=['POST'])
@@ -52,6 +50,18 @@ def create_cliente():
     return jsonify(nuevo_cliente.to_dict()), 201
 
 
+@clientes_bp.route('/importar', methods=['POST'])
+@jwt_required()
+@role_required('gerente', 'encargado')
+def importar_clientes():
+    """
+    Alta masiva desde CSV/XLSX (multipart, campo 'archivo').
+    Columnas: nombre, telefono, correo, direccion. ?simular=1 solo valida.
+    Devuelve el resumen con los errores por fila (ver core.importacion).
+    """
+    return importar_desde_request('clientes')
+
+
 @clientes_bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
 @role_required('gerente', 'encargado')
@@ -1,12 +1,17 @@
 from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required
 from sqlalchemy import func
-from datetime import datetime, date
+from sqlalchemy.orm import joinedload
+from datetime import datetime
 
 from core.extensions import db
 from core.auth import role_required
-from models.ordenes import OrdenTrabajo, EstadoOrdenEnum, Pago
-from models.personas import Cliente, Empleado
+from core import perfiles_carga
+from core import estadisticas
+from core.cache import cache_dashboard
+from core.catalogo import catalogo
+from models.ordenes import OrdenTrabajo, EstadoOrdenEnum
+from models.personas import Cliente
 from models.vehiculos import Motocicleta
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
@@ -19,6 +24,7 @@ def hoy_rango():
 
 @dashboard_bp.route('/resumen', methods=['GET'])
 @jwt_required()
+@cache_dashboard('resumen')
 def get_resumen_dashboard():
     """
     Devuelve el resumen que el frontend necesita para el home.
@@ -28,26 +34,9 @@ def get_resumen_dashboard():
     inicio_hoy, fin_hoy = hoy_rango()
 
     # === 1) resumen de estados de hoy ===
-    # Órdenes creadas hoy
-    q_hoy = (
-        OrdenTrabajo.query
-        .filter(OrdenTrabajo.fecha_ingreso >= inicio_hoy)
-        .filter(OrdenTrabajo.fecha_ingreso <= fin_hoy)
-    )
-
-    total_hoy = q_hoy.count()
-    en_espera_hoy = q_hoy.filter(OrdenTrabajo.estado == EstadoOrdenEnum.EN_ESPERA).count()
-    en_reparacion_hoy = q_hoy.filter(OrdenTrabajo.estado == EstadoOrdenEnum.EN_REPARACION).count()
-    finalizadas_hoy = q_hoy.filter(OrdenTrabajo.estado == EstadoOrdenEnum.FINALIZADA).count()
-    canceladas_hoy = q_hoy.filter(OrdenTrabajo.estado == EstadoOrdenEnum.CANCELADA).count()
-
-    resumen_hoy = {
-        "total": total_hoy,
-        "en_espera": en_espera_hoy,
-        "en_reparacion": en_reparacion_hoy,
-        "finalizadas": finalizadas_hoy,
-        "canceladas": canceladas_hoy
-    }
+    # Órdenes creadas hoy, leído del rollup estadisticas_diarias (una fila)
+    fila_hoy = estadisticas.leer_dia(inicio_hoy.date())
+    resumen_hoy = estadisticas.resumen_estados(fila_hoy)
 
     # === 2) clientes activos ===
     # clientes que tienen al menos 1 motocicleta registrada
@@ -57,56 +46,25 @@ def get_resumen_dashboard():
         .scalar()
     ) or 0
 
-    # === 3) ingresos de HOY (pagos registrados hoy) ===
-    ingresos_hoy_q = (
-        db.session.query(func.coalesce(func.sum(Pago.monto), 0))
-        .filter(Pago.pagado_en >= inicio_hoy)
-        .filter(Pago.pagado_en <= fin_hoy)
-        .scalar()
-    )
-    # ingresos_hoy_q sale como Decimal -> pasarlo a float
-    if ingresos_hoy_q is None:
-        ingresos_hoy_q = 0.0
-    else:
-        ingresos_hoy_q = float(ingresos_hoy_q)
+    # === 3) ingresos de HOY (pagos registrados hoy, misma fila del rollup) ===
+    # sale como Decimal -> pasarlo a float
+    ingresos_hoy_q = float(fila_hoy.ingresos_total) if fila_hoy else 0.0
 
     # === 4) mecánicos disponibles ===
-    # total mecánicos
-    # criterio simple: Empleado.cargo o rol_nombre ~ 'mecanico'
-    # ajusta esto si tu modelo tiene otro campo
-    mecanicos_total = (
-        Empleado.query.filter(
-            func.lower(Empleado.puesto).like('%mecan%')  # si tu tabla tiene 'puesto'
-        ).count()
-        if hasattr(Empleado, 'puesto') else
-        Empleado.query.count()  # fallback bruto si no tenemos 'puesto'
-    )
-
-    # mecánicos ocupados = los que están asignados a una orden EN_REPARACION
-    sub_ocupados = (
-        db.session.query(OrdenTrabajo.mecanico_asignado_id)
-        .filter(OrdenTrabajo.estado == EstadoOrdenEnum.EN_REPARACION)
-        .filter(OrdenTrabajo.mecanico_asignado_id.isnot(None))
-        .distinct()
-        .all()
-    )
-    mecanicos_ocupados_ids = {row[0] for row in sub_ocupados}
-
-    mecanicos_disponibles = 0
-    if mecanicos_total > 0:
-        # contamos empleados que NO estén en mecanicos_ocupados_ids
-        if hasattr(Empleado, 'puesto'):
-            disponibles_q = (
-                Empleado.query
-                .filter(func.lower(Empleado.puesto).like('%mecan%'))
-                .filter(~Empleado.id.in_(mecanicos_ocupados_ids))  # NOT IN
-            )
-        else:
-            disponibles_q = (
-                Empleado.query
-                .filter(~Empleado.id.in_(mecanicos_ocupados_ids))
-            )
-        mecanicos_disponibles = disponibles_q.count()
+    # mecánicos activos (catálogo) y su carga de carga_mecanicos, que se
+    # mantiene al crear / reasignar / cambiar estado: nada de contar órdenes.
+    # disponible = sin órdenes EN_REPARACION
+    carga = estadisticas.leer_carga()
+    carga_mecanicos = []
+    for m in catalogo.mecanicos():
+        fila = carga.get(m["id"])
+        carga_mecanicos.append({
+            "id": m["id"],
+            "nombre": m["nombre"],
+            **(fila.to_dict() if fila else {"en_espera": 0, "en_reparacion": 0, "abiertas": 0}),
+        })
+    mecanicos_total = len(carga_mecanicos)
+    mecanicos_disponibles = sum(1 for m in carga_mecanicos if not m["en_reparacion"])
 
     # === 5) órdenes activas hoy (EN_ESPERA o EN_REPARACION HOY) ===
     ordenes_activas_q = (
@@ -117,6 +75,7 @@ def get_resumen_dashboard():
             EstadoOrdenEnum.EN_ESPERA,
             EstadoOrdenEnum.EN_REPARACION
         ]))
+        .options(*perfiles_carga.orden_resumen())
         .order_by(OrdenTrabajo.fecha_ingreso.desc())
         .all()
     )
@@ -144,6 +103,7 @@ def get_resumen_dashboard():
     # Ejemplo: últimas 5 órdenes creadas (esto es meramente visual)
     ultimas_ordenes = (
         OrdenTrabajo.query
+        .options(joinedload(OrdenTrabajo.cliente))
         .order_by(OrdenTrabajo.fecha_ingreso.desc())
         .limit(5)
         .all()
@@ -162,6 +122,7 @@ def get_resumen_dashboard():
         "ingresos_hoy_q": ingresos_hoy_q,
         "mecanicos_disponibles": mecanicos_disponibles,
         "mecanicos_total": mecanicos_total,
+        "carga_mecanicos": carga_mecanicos,
         "ordenes_activas_hoy": ordenes_activas_hoy,
         "actividad_reciente": actividad_reciente
     }
@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from core.extensions import db
 from core.auth import role_required
+from core.etag import con_etag
+from core.paginacion import paginar_respuesta
 
 from models.inventario import Herramienta, EstadoHerramientaEnum
 
@@ -11,6 +13,7 @@ herramientas_bp = Blueprint('herramientas', __name__, url_prefix='/api/herramien
 # LISTAR TODAS
 @herramientas_bp.route('', methods=['GET'])
 @jwt_required()
+@con_etag(Herramienta)
 def listar_herramientas():
     """
     Todos los roles logueados pueden ver.
@@ -26,9 +29,7 @@ def listar_herramientas():
         except KeyError:
             pass  # si manda algo raro lo ignoramos
 
-    q = q.order_by(Herramienta.nombre.asc())
-    data = [h.to_dict() for h in q.all()]
-    return jsonify(data), 200
+    return paginar_respuesta(q, [Herramienta.nombre, Herramienta.id], lambda h: h.to_dict())
 
 
 # CREAR NUEVA
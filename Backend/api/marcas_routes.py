@@ -2,12 +2,14 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from core.extensions import db
 from core.auth import role_required
+from core.etag import con_etag
 from models.catalogos import MarcaMoto
 
 marcas_bp = Blueprint('marcas', __name__, url_prefix='/api/marcas')
 
 @marcas_bp.route('', methods=['GET'])
 @jwt_required()
+@con_etag(MarcaMoto)
 def get_marcas():
     q = request.args.get('q', '').strip()
     
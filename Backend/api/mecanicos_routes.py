@@ -1,8 +1,12 @@
 from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required
 from core.auth import role_required
+from core.catalogo import catalogo
+from core.etag import con_etag
+from core import estadisticas
 from models.personas import Empleado, Usuario
-from models.catalogos import Rol  # necesitamos Rol para filtrar nombre de rol
+from models.catalogos import Rol  # tablas de las que depende el ETag
+from models.estadisticas import CargaMecanico
 
 mecanicos_bp = Blueprint('mecanicos', __name__, url_prefix='/api/mecanicos')
 
@@ -10,27 +14,25 @@ mecanicos_bp = Blueprint('mecanicos', __name__, url_prefix='/api/mecanicos')
 @mecanicos_bp.route('', methods=['GET'])
 @jwt_required()
 @role_required("gerente", "encargado", "mecanico")
+@con_etag(Empleado, Usuario, Rol, CargaMecanico)
 def listar_mecanicos():
     """
     Devuelve la lista de empleados que tienen rol = 'mecanico'.
-    Sirve para asignarlos a una orden.
+    Sirve para asignarlos a una orden: cada uno trae su `carga` (órdenes
+    abiertas en espera / en reparación).
+    Los mecánicos salen del catálogo en memoria (core.catalogo) y la carga
+    de carga_mecanicos (un SELECT chico), sin contar órdenes.
     """
-
-    data = (
-        Empleado.query
-        .join(Usuario, Usuario.empleado_id == Empleado.id)
-        .join(Rol, Rol.id == Usuario.rol_id)
-        .filter(Rol.nombre == "mecanico")
-        .filter(Empleado.activo.is_(True))
-        .all()
-    )
+    carga = estadisticas.leer_carga()
+    sin_carga = {"en_espera": 0, "en_reparacion": 0, "abiertas": 0}
 
     resp = [
         {
-            "id": e.id,
-            "nombre": e.nombre,
+            "id": m["id"],
+            "nombre": m["nombre"],
+            "carga": carga[m["id"]].to_dict() if m["id"] in carga else sin_carga,
         }
-        for e in data
+        for m in catalogo.mecanicos()
     ]
 
     return jsonify(resp), 200
\ No newline at end of file
@@ -2,12 +2,15 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from core.extensions import db
 from core.auth import role_required
+from core.etag import con_etag
+from core.paginacion import paginar_respuesta
 from models.catalogos import ModeloMoto, MarcaMoto
 
 modelos_bp = Blueprint('modelos', __name__, url_prefix='/api/modelos')
 
 @modelos_bp.route('', methods=['GET'])
 @jwt_required()
+@con_etag(ModeloMoto, MarcaMoto)
 def get_modelos():
     marca_id = request.args.get('marca_id', type=int)
     q = request.args.get('q', '').strip()
@@ -20,8 +23,7 @@ def get_modelos():
     if q:
         query = query.filter(ModeloMoto.nombre.ilike(f'%{q}%'))
     
-    modelos = query.order_by(ModeloMoto.nombre).all()
-    return jsonify([m.to_dict() for m in modelos]), 200
+    return paginar_respuesta(query, [ModeloMoto.nombre, ModeloMoto.id], lambda m: m.to_dict())
 
 
 @modelos_bp.route('', methods=['POST'])
@@ -2,9 +2,13 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from core.extensions import db
 from core.auth import role_required
+from core.paginacion import paginar_respuesta
+from core import perfiles_carga
+from core.busqueda import filtro_contiene
+from core.importacion import importar_desde_request
 from models.vehiculos import Motocicleta
 from models.personas import Cliente
-from models.catalogos import ModeloMoto, MarcaMoto
+from models.catalogos import ModeloMoto
 from datetime import datetime
 
 motos_bp = Blueprint('motos', __name__, url_prefix='/api/motocicletas')
@@ -20,37 +24,41 @@ def get_motocicletas():
     vin = request.args.get('vin', '').strip()
     q = request.args.get('q', '').strip()
     
-    query = Motocicleta.query.join(Cliente).outerjoin(ModeloMoto).outerjoin(MarcaMoto)
+    query = (
+        Motocicleta.query
+        .join(Cliente)
+        .options(*perfiles_carga.moto_listado())
+    )
     
     if cliente_id:
         query = query.filter(Motocicleta.cliente_id == cliente_id)
     
     if cliente_nombre:
-        query = query.filter(Cliente.nombre.ilike(f'%{cliente_nombre}%'))
+        query = query.filter(filtro_contiene([Cliente.nombre], cliente_nombre))
     
     if modelo_id:
         query = query.filter(Motocicleta.modelo_id == modelo_id)
     
     if marca_id:
-        query = query.filter(ModeloMoto.marca_id == marca_id)
+        query = query.join(ModeloMoto).filter(ModeloMoto.marca_id == marca_id)
     
     if placa:
-        query = query.filter(Motocicleta.placa.ilike(f'%{placa}%'))
+        query = query.filter(filtro_contiene([Motocicleta.placa], placa))
     
     if vin:
-        query = query.filter(Motocicleta.vin.ilike(f'%{vin}%'))
+        query = query.filter(filtro_contiene([Motocicleta.vin], vin))
     
     if q:
         query = query.filter(
-            db.or_(
-                Motocicleta.placa.ilike(f'%{q}%'),
-                Motocicleta.vin.ilike(f'%{q}%'),
-                Motocicleta.color.ilike(f'%{q}%')
-            )
+            filtro_contiene([Motocicleta.placa, Motocicleta.vin, Motocicleta.color], q)
         )
     
-    motocicletas = query.order_by(Motocicleta.creado_en.desc()).all()
-    return jsonify([m.to_dict(include_relations=True) for m in motocicletas]), 200
+    return paginar_respuesta(
+        query,
+        [Motocicleta.creado_en, Motocicleta.id],
+        lambda m: m.to_dict(include_relations=True),
+        descendente=True,
+    )
 
 
 @motos_bp.route('', methods=['POST'])
@@ -103,6 +111,18 @@ def create_motocicleta():
     return jsonify(nueva_moto.to_dict(include_relations=True)), 201
 
 
+@motos_bp.route('/importar', methods=['POST'])
+@jwt_required()
+@role_required('gerente', 'encargado')
+def importar_motocicletas():
+    """
+    Alta masiva desde CSV/XLSX (multipart, campo 'archivo').
+    Cliente por cliente_id o cliente_correo; modelo por modelo_id o marca + modelo.
+    ?simular=1 solo valida.
+    """
+    return importar_desde_request('motocicletas')
+
+
 @motos_bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
 @role_required('gerente', 'encargado')
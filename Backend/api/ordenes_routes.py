@@ -1,7 +1,14 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt
+from flask_jwt_extended import jwt_required
 from core.extensions import db
-from core.auth import role_required
+from core.auth import role_required, identidad_actual
+from core.paginacion import paginar_respuesta
+from core import perfiles_carga
+from core.busqueda import filtro_contiene
+from core import estadisticas
+from core.cache import cache_dashboard
+from core.email_outbox import encolar_email, encolar_emails
+from core.eventos import marcar_tablas
 from models.ordenes import (
     OrdenTrabajo,
     EstadoOrden,
@@ -10,36 +17,139 @@ from models.ordenes import (
     TipoPagoEnum,
 )
 from models.vehiculos import Motocicleta
-from models.personas import Cliente, Empleado, Usuario
+from models.personas import Cliente, Empleado
 from datetime import datetime, timedelta
 from decimal import Decimal
+from sqlalchemy import insert
 
 ordenes_bp = Blueprint('ordenes', __name__, url_prefix='/api/ordenes')
 
+# máximo de órdenes por PATCH /api/ordenes/estado
+MAX_CAMBIOS_LOTE = 200
+
 
 # =========================
 # helper: usuario actual
 # =========================
 def _get_current_user_ctx():
     """
-    Lee el JWT y devuelve:
-    - usuario (row de Usuario)
+    Usuario del JWT (sin ir a la base, ver core.auth.identidad_actual):
+    - identidad (o None si el token ya no es válido)
     - empleado_id (si el usuario está vinculado a un empleado)
     - rol (string: 'mecanico', 'gerente', 'encargado', etc.)
     """
-    claims = get_jwt()
-    data_user = claims.get("user") or {}
-    user_id = data_user.get("id")
-    rol = data_user.get("rol")
-
-    if not user_id:
+    ident = identidad_actual()
+    if not ident:
         return None, None, None
 
-    usuario = Usuario.query.get(user_id)
-    if not usuario:
-        return None, None, None
+    return ident, ident.empleado_id, ident.rol
 
-    return usuario, usuario.empleado_id, rol
+
+# =========================
+# helper: correo de cambio de estado
+# =========================
+def _armar_correo_estado(orden, notas_cambio):
+    """
+    Arma el correo para el cliente de la orden.
+    Devuelve dict(subject, body, to_addr) o None si el cliente no tiene correo.
+    """
+    cli = orden.cliente
+    moto = orden.motocicleta
+
+    # ajustar esto a como se llama el campo en tu tabla Cliente
+    correo_cliente = getattr(cli, "email", None) or getattr(cli, "correo", None)
+    if not correo_cliente:
+        return None
+
+    # nombre del estado en bonito
+    titulo_estado = orden.estado.name.replace("_", " ").title()
+    # ej: EN_ESPERA -> "En Espera", FINALIZADA -> "Finalizada"
+
+    placa_txt = getattr(moto, "placa", "") or ""
+    modelo_txt = ""
+    # si tu modelo Motocicleta guarda marca/modelo como relaciones,
+    # podés construirlo acá. Si no, dejalo vacío y no pasa nada.
+
+    # armamos cuerpo legible para el cliente, SOLO su orden.
+    body_lines = [
+        f"Hola {cli.nombre},",
+        "",
+        f"Te informamos el estado de tu orden #{orden.id}: {titulo_estado}.",
+    ]
+
+    if orden.estado == EstadoOrdenEnum.FINALIZADA:
+        body_lines.append("Tu motocicleta ya está lista para entrega. ✅")
+
+    if orden.estado == EstadoOrdenEnum.CANCELADA:
+        body_lines.append("La orden fue cancelada. Si no reconoces esto, contáctanos.")
+
+    if placa_txt or modelo_txt:
+        body_lines.append("")
+        body_lines.append("Moto:")
+        if placa_txt:
+            body_lines.append(f" - Placa: {placa_txt}")
+        if modelo_txt:
+            body_lines.append(f" - Modelo: {modelo_txt}")
+
+    if notas_cambio:
+        body_lines.append("")
+        body_lines.append("Nota del taller:")
+        body_lines.append(notas_cambio)
+
+    body_lines.append("")
+    body_lines.append("Gracias por confiar en MOTEKA 🛠️")
+
+    return {
+        "subject": f"Actualización de tu moto - Orden #{orden.id}",
+        "body": "\n".join(body_lines),
+        "to_addr": correo_cliente,
+    }
+
+
+# =========================
+# helpers: reglas del cambio de estado
+# (las usan PATCH /<id>/estado y PATCH /estado en lote)
+# =========================
+def _rechazo_cambio_estado(orden, nuevo_estado, empleado_id, rol):
+    """
+    None si el usuario puede poner `nuevo_estado` en la orden;
+    si no, (mensaje, código http).
+    - gerente / encargado -> cualquier estado, incluida CANCELADA.
+    - mecanico -> solo sus órdenes y sin CANCELADA.
+    """
+    if rol == 'mecanico':
+        # Debe ser el asignado
+        if not empleado_id or orden.mecanico_asignado_id != empleado_id:
+            return "No puede cambiar el estado de una orden que no le fue asignada", 403
+
+        # No puede CANCELAR
+        if nuevo_estado == EstadoOrdenEnum.CANCELADA:
+            return "No tiene permiso para cancelar la orden", 403
+
+    elif rol in ['gerente', 'encargado']:
+        # full access
+        pass
+    else:
+        return "No tiene permisos para cambiar estado", 403
+
+    return None
+
+
+def _aplicar_estado(orden, nuevo_estado):
+    """
+    Pone el estado (y fecha_salida si cierra). Devuelve el estado anterior.
+    La orden tiene que venir bloqueada (FOR UPDATE): si no, dos cambios a la
+    vez leen el mismo anterior y el rollup descuenta dos veces del mismo estado.
+    """
+    estado_anterior = orden.estado
+    orden.estado = nuevo_estado
+
+    # si finaliza / cancela => marcamos salida si no tenía
+    if nuevo_estado in [EstadoOrdenEnum.FINALIZADA, EstadoOrdenEnum.CANCELADA]:
+        if not orden.fecha_salida:
+            orden.fecha_salida = datetime.utcnow()
+
+    return estado_anterior
 
 
 # =========================
@@ -63,9 +173,10 @@ def get_ordenes():
     # base query
     query = (
         OrdenTrabajo.query
-        .join(Cliente)
-        .join(Motocicleta)
-        .outerjoin(Empleado)
+        .join(Cliente, Cliente.id == OrdenTrabajo.cliente_id)
+        .join(Motocicleta, Motocicleta.id == OrdenTrabajo.motocicleta_id)
+        .outerjoin(Empleado, Empleado.id == OrdenTrabajo.mecanico_asignado_id)
+        .options(*perfiles_carga.orden_listado())
     )
 
     # --- filtros dinámicos ---
@@ -74,7 +185,7 @@ def get_ordenes():
         query = query.filter(OrdenTrabajo.cliente_id == cliente_id)
 
     if cliente_nombre:
-        query = query.filter(Cliente.nombre.ilike(f'%{cliente_nombre}%'))
+        query = query.filter(filtro_contiene([Cliente.nombre], cliente_nombre))
 
     if motocicleta_id:
         query = query.filter(OrdenTrabajo.motocicleta_id == motocicleta_id)
@@ -107,12 +218,15 @@ def get_ordenes():
             pass
 
     if placa:
-        query = query.filter(Motocicleta.placa.ilike(f'%{placa}%'))
-
-    # orden más reciente primero
-    ordenes = query.order_by(OrdenTrabajo.fecha_ingreso.desc()).all()
-
-    return jsonify([o.to_dict(include_relations=True) for o in ordenes]), 200
+        query = query.filter(filtro_contiene([Motocicleta.placa], placa))
+
+    # orden más reciente primero (keyset sobre fecha_ingreso + id)
+    return paginar_respuesta(
+        query,
+        [OrdenTrabajo.fecha_ingreso, OrdenTrabajo.id],
+        lambda o: o.to_dict(include_relations=True),
+        descendente=True,
+    )
 
 
 # =========================
@@ -167,6 +281,8 @@ def create_orden():
     )
     db.session.add(estado_inicial)
 
+    estadisticas.registrar_orden_nueva(nueva_orden)
+
     db.session.commit()
 
     return jsonify(nueva_orden.to_dict(include_relations=True)), 201
@@ -186,14 +302,13 @@ def cambiar_estado(id):
     - mecanico:
         - solo si la orden le pertenece (mecanico_asignado_id == su empleado_id)
         - NO puede poner CANCELADA.
-    Además: si el cambio se hace con éxito, se intenta mandar correo al CLIENTE
-    avisándole del nuevo estado de SU moto.
+    Además: el correo al CLIENTE avisándole del nuevo estado de SU moto
+    se deja en la bandeja de salida en la misma transacción (lo manda
+    el worker de correos, el request no espera al SMTP).
     """
 
-    # import acá adentro para evitar ciclos raros de import
-    from core.email_utils import send_email
-
-    orden = OrdenTrabajo.query.get(id)
+    # bloqueada hasta el commit: el estado anterior alimenta el rollup
+    orden = db.session.get(OrdenTrabajo, id, with_for_update=True)
     if not orden:
         return jsonify({"error": "Orden no encontrada"}), 404
 
@@ -216,28 +331,13 @@ def cambiar_estado(id):
         return jsonify({"error": "No se pudo identificar al usuario actual"}), 401
 
     # permisos según rol
-    if rol == 'mecanico':
-        # Debe ser el asignado
-        if not empleado_id or orden.mecanico_asignado_id != empleado_id:
-            return jsonify({"error": "No puede cambiar el estado de una orden que no le fue asignada"}), 403
-
-        # No puede CANCELAR
-        if nuevo_estado == EstadoOrdenEnum.CANCELADA:
-            return jsonify({"error": "No tiene permiso para cancelar la orden"}), 403
-
-    elif rol in ['gerente', 'encargado']:
-        # full access
-        pass
-    else:
-        return jsonify({"error": "No tiene permisos para cambiar estado"}), 403
+    rechazo = _rechazo_cambio_estado(orden, nuevo_estado, empleado_id, rol)
+    if rechazo:
+        mensaje, codigo = rechazo
+        return jsonify({"error": mensaje}), codigo
 
     # aplicar cambio en la orden
-    orden.estado = nuevo_estado
-
-    # si finaliza / cancela => marcamos salida si no tenía
-    if nuevo_estado in [EstadoOrdenEnum.FINALIZADA, EstadoOrdenEnum.CANCELADA]:
-        if not orden.fecha_salida:
-            orden.fecha_salida = datetime.utcnow()
+    estado_anterior = _aplicar_estado(orden, nuevo_estado)
 
     # guardamos historial
     historial = EstadoOrden(
@@ -247,71 +347,165 @@ def cambiar_estado(id):
     )
     db.session.add(historial)
 
+    estadisticas.registrar_cambio_estado(orden, estado_anterior)
+
+    # --------- correo al cliente (outbox) ---------
+    correo = _armar_correo_estado(orden, notas_cambio)
+    if correo:
+        encolar_email(**correo)
+    else:
+        print("[INFO] Cliente sin correo, no se envió notificación.")
+
     db.session.commit()
 
-    # --------- correo al cliente ---------
-    try:
-        cli = Cliente.query.get(orden.cliente_id)
-        moto = Motocicleta.query.get(orden.motocicleta_id)
-
-        # ajustar esto a como se llama el campo en tu tabla Cliente
-        correo_cliente = getattr(cli, "email", None) or getattr(cli, "correo", None)
-
-        if correo_cliente:
-            # nombre del estado en bonito
-            titulo_estado = orden.estado.name.replace("_", " ").title()
-            # ej: EN_ESPERA -> "En Espera", FINALIZADA -> "Finalizada"
-
-            placa_txt = getattr(moto, "placa", "") or ""
-            modelo_txt = ""
-            # si tu modelo Motocicleta guarda marca/modelo como relaciones,
-            # podés construirlo acá. Si no, dejalo vacío y no pasa nada.
-
-            # armamos cuerpo legible para el cliente, SOLO su orden.
-            body_lines = [
-                f"Hola {cli.nombre},",
-                "",
-                f"Te informamos el estado de tu orden #{orden.id}: {titulo_estado}.",
-            ]
-
-            if orden.estado == EstadoOrdenEnum.FINALIZADA:
-                body_lines.append("Tu motocicleta ya está lista para entrega. ✅")
-
-            if orden.estado == EstadoOrdenEnum.CANCELADA:
-                body_lines.append("La orden fue cancelada. Si no reconoces esto, contáctanos.")
-
-            if placa_txt or modelo_txt:
-                body_lines.append("")
-                body_lines.append("Moto:")
-                if placa_txt:
-                    body_lines.append(f" - Placa: {placa_txt}")
-                if modelo_txt:
-                    body_lines.append(f" - Modelo: {modelo_txt}")
-
-            if notas_cambio:
-                body_lines.append("")
-                body_lines.append("Nota del taller:")
-                body_lines.append(notas_cambio)
-
-            body_lines.append("")
-            body_lines.append("Gracias por confiar en MOTEKA 🛠️")
-
-            cuerpo_cliente = "\n".join(body_lines)
-
-            send_email(
-                subject=f"Actualización de tu moto - Orden #{orden.id}",
-                body=cuerpo_cliente,
-                to_addr=correo_cliente
-            )
-        else:
-            print("[INFO] Cliente sin correo, no se envió notificación.")
+    return jsonify(orden.to_dict(include_relations=True)), 200
+
+
+# =========================
+# PATCH /api/ordenes/<id>/mecanico
+# reasignar (o desasignar) el mecánico de una orden abierta
+# =========================
+@ordenes_bp.route('/<int:id>/mecanico', methods=['PATCH'])
+@jwt_required()
+@role_required('gerente', 'encargado')
+def reasignar_mecanico(id):
+    """
+    Body: {"mecanico_id": 3} (o null para dejarla sin asignar).
+    Mueve la orden en el rollup y en carga_mecanicos en la misma transacción.
+    """
+    # bloqueada hasta el commit: el mecánico anterior alimenta el rollup
+    orden = db.session.get(OrdenTrabajo, id, with_for_update=True)
+    if not orden:
+        return jsonify({"error": "Orden no encontrada"}), 404
 
-    except Exception as e:
-        # si el mail falla NO rompemos la API
-        print("[WARN] Falló envío de email al cliente:", e)
+    if orden.estado in (EstadoOrdenEnum.FINALIZADA, EstadoOrdenEnum.CANCELADA):
+        return jsonify({"error": "No se puede reasignar una orden finalizada o cancelada"}), 400
+
+    data = request.get_json() or {}
+    if 'mecanico_id' not in data:
+        return jsonify({"error": "mecanico_id es requerido (null para desasignar)"}), 400
+
+    mecanico_id = data['mecanico_id']
+    if mecanico_id is not None:
+        if not isinstance(mecanico_id, int) or not db.session.get(Empleado, mecanico_id):
+            return jsonify({"error": "El mecánico especificado no existe"}), 404
+
+    mecanico_anterior = orden.mecanico_asignado_id
+    orden.mecanico_asignado_id = mecanico_id
+    estadisticas.registrar_reasignacion(orden, mecanico_anterior)
+    db.session.commit()
 
     return jsonify(orden.to_dict(include_relations=True)), 200
 
+
+# =========================
+# PATCH /api/ordenes/estado
+# varios cambios de estado de una (ej. cierre del día)
+# =========================
+@ordenes_bp.route('/estado', methods=['PATCH'])
+@jwt_required()
+def cambiar_estado_lote():
+    """
+    Body: [{"id": 1, "estado": "FINALIZADA", "notas": "..."}, ...]
+    (o {"cambios": [...]}), hasta MAX_CAMBIOS_LOTE órdenes.
+
+    Mismas reglas que PATCH /<id>/estado para cada orden. Es todo o nada:
+    si alguna no se puede cambiar no se guarda ninguna y se devuelve la
+    lista de errores por orden. Todo va en una transacción: los historiales
+    en un INSERT, los correos a la bandeja de salida en otro y el rollup
+    con un UPSERT por día/mecánico.
+    """
+    data = request.get_json(silent=True)
+    cambios = data.get('cambios') if isinstance(data, dict) else data
+    if not isinstance(cambios, list) or not cambios:
+        return jsonify({"error": "Envíe una lista de cambios [{id, estado, notas}]"}), 400
+    if len(cambios) > MAX_CAMBIOS_LOTE:
+        return jsonify({"error": f"Máximo {MAX_CAMBIOS_LOTE} órdenes por vez"}), 400
+
+    usuario, empleado_id, rol = _get_current_user_ctx()
+    if not usuario:
+        return jsonify({"error": "No se pudo identificar al usuario actual"}), 401
+
+    # 1) validar formato
+    errores = []
+    pedidos = []   # (orden_id, nuevo_estado, notas)
+    vistos = set()
+    for i, cambio in enumerate(cambios):
+        orden_id = cambio.get('id') if isinstance(cambio, dict) else None
+        if not isinstance(orden_id, int):
+            errores.append({"indice": i, "error": "Falta el id de la orden"})
+            continue
+        if orden_id in vistos:
+            errores.append({"id": orden_id, "error": "Orden repetida en el lote"})
+            continue
+        vistos.add(orden_id)
+        try:
+            nuevo_estado = EstadoOrdenEnum[cambio.get('estado') or '']
+        except KeyError:
+            errores.append({"id": orden_id, "error": "Estado inválido"})
+            continue
+        notas = cambio.get('notas', '')
+        if notas is not None and not isinstance(notas, str):
+            errores.append({"id": orden_id, "error": "notas debe ser texto"})
+            continue
+        pedidos.append((orden_id, nuevo_estado, notas))
+
+    # 2) traer todas las órdenes de una (con cliente/moto para los correos),
+    #    bloqueadas hasta el commit como en PATCH /<id>/estado. FOR UPDATE OF:
+    #    los joins del perfil son outer y Postgres no deja bloquear ese lado;
+    #    por id para que dos lotes con órdenes en común no se traben entre sí
+    ordenes = {}
+    if pedidos:
+        ordenes = {
+            o.id: o for o in (
+                OrdenTrabajo.query
+                .options(*perfiles_carga.orden_resumen())
+                .filter(OrdenTrabajo.id.in_([p[0] for p in pedidos]))
+                .order_by(OrdenTrabajo.id)
+                .with_for_update(of=OrdenTrabajo)
+            )
+        }
+
+    # 3) permisos por orden
+    codigo_error = 400
+    for orden_id, nuevo_estado, _ in pedidos:
+        orden = ordenes.get(orden_id)
+        if not orden:
+            errores.append({"id": orden_id, "error": "Orden no encontrada"})
+            continue
+        rechazo = _rechazo_cambio_estado(orden, nuevo_estado, empleado_id, rol)
+        if rechazo:
+            errores.append({"id": orden_id, "error": rechazo[0]})
+            codigo_error = rechazo[1]
+
+    if errores:
+        return jsonify({"error": "No se aplicó ningún cambio", "errores": errores}), codigo_error
+
+    # 4) aplicar todo en una transacción
+    historial = []
+    correos = []
+    registrados = []
+    for orden_id, nuevo_estado, notas in pedidos:
+        orden = ordenes[orden_id]
+        registrados.append((orden, _aplicar_estado(orden, nuevo_estado)))
+        historial.append({"orden_id": orden_id, "estado": nuevo_estado, "notas": notas})
+        correo = _armar_correo_estado(orden, notas)
+        if correo:
+            correos.append(correo)
+
+    db.session.execute(insert(EstadoOrden), historial)
+    marcar_tablas(db.session, EstadoOrden.__tablename__)
+    estadisticas.registrar_cambios_estado(registrados)
+    encolar_emails(correos)
+    db.session.commit()
+
+    return jsonify({
+        "actualizadas": len(pedidos),
+        "correos_encolados": len(correos),
+        "ordenes": [ordenes[p[0]].to_dict(include_relations=False) for p in pedidos],
+    }), 200
+
+
 # =========================
 # GET /api/ordenes/<id>/historial
 # historial de estado
@@ -334,6 +528,7 @@ def historial_orden(id):
 @ordenes_bp.route('/dashboard_hoy', methods=['GET'])
 @jwt_required()
 @role_required('gerente', 'encargado', 'mecanico')
+@cache_dashboard('ordenes_dashboard_hoy')
 def dashboard_hoy():
     """
     Devuelve:
@@ -355,11 +550,8 @@ def dashboard_hoy():
         )
     )
 
-    total_hoy = base_today.count()
-    espera_hoy = base_today.filter(OrdenTrabajo.estado == EstadoOrdenEnum.EN_ESPERA).count()
-    reparacion_hoy = base_today.filter(OrdenTrabajo.estado == EstadoOrdenEnum.EN_REPARACION).count()
-    finalizadas_hoy = base_today.filter(OrdenTrabajo.estado == EstadoOrdenEnum.FINALIZADA).count()
-    canceladas_hoy = base_today.filter(OrdenTrabajo.estado == EstadoOrdenEnum.CANCELADA).count()
+    # conteos por estado: una sola fila del rollup
+    resumen_hoy = estadisticas.resumen_estados(estadisticas.leer_dia(start_today.date()))
 
     # órdenes activas hoy (pendientes en taller)
     activas_rows = (
@@ -368,6 +560,7 @@ def dashboard_hoy():
             EstadoOrdenEnum.EN_ESPERA,
             EstadoOrdenEnum.EN_REPARACION
         ]))
+        .options(*perfiles_carga.orden_resumen())
         .order_by(OrdenTrabajo.fecha_ingreso.asc())
         .all()
     )
@@ -392,12 +585,6 @@ def dashboard_hoy():
         })
 
     return jsonify({
-        "resumen_hoy": {
-            "total": total_hoy,
-            "en_espera": espera_hoy,
-            "en_reparacion": reparacion_hoy,
-            "finalizadas": finalizadas_hoy,
-            "canceladas": canceladas_hoy,
-        },
+        "resumen_hoy": resumen_hoy,
         "ordenes_activas_hoy": activas_data
     }), 200
\ No newline at end of file
@@ -0,0 +1,217 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+
+from core.extensions import db
+from core.auth import role_required
+from core.paginacion import paginar_respuesta
+from core import estadisticas
+from models.ordenes import OrdenTrabajo, Pago, TipoPagoEnum
+
+pagos_bp = Blueprint('pagos', __name__, url_prefix='/api/pagos')
+
+# tope del rango de /ingresos (el rollup tiene una fila por día, es barato igual)
+MAX_DIAS_INGRESOS = 366 * 3
+
+
+def _parse_fecha(valor):
+    """'2025-10-31' (o con hora) -> date. ValueError si no sirve."""
+    return datetime.fromisoformat(valor.strip().replace('Z', '+00:00')).date()
+
+
+def _parse_monto(valor):
+    try:
+        monto = Decimal(str(valor)).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        raise ValueError("El monto debe ser un número")
+    if monto <= 0:
+        raise ValueError("El monto debe ser mayor a 0")
+    if monto >= Decimal('1e10'):
+        raise ValueError("El monto es demasiado grande")
+    return monto
+
+
+# =========================
+# POST /api/pagos
+# registrar un pago (y sumarlo al rollup en la misma transacción)
+# =========================
+@pagos_bp.route('', methods=['POST'])
+@jwt_required()
+@role_required('gerente', 'encargado')
+def crear_pago():
+    """
+    Body: {"orden_id": 1, "tipo": "EFECTIVO", "monto": 350.50, "pagado_en": "2025-10-31T15:00:00"}
+    pagado_en es opcional (por defecto ahora), sirve para cargar un pago atrasado.
+    """
+    data = request.get_json() or {}
+
+    orden_id = data.get('orden_id')
+    orden = db.session.get(OrdenTrabajo, orden_id) if isinstance(orden_id, int) else None
+    if not orden:
+        return jsonify({"error": "Orden no encontrada"}), 404
+
+    try:
+        tipo = TipoPagoEnum[data.get('tipo') or '']
+    except KeyError:
+        return jsonify({"error": "Tipo de pago inválido (EFECTIVO, TARJETA o TRANSFERENCIA)"}), 400
+
+    try:
+        monto = _parse_monto(data.get('monto'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    pagado_en = datetime.utcnow()
+    if data.get('pagado_en'):
+        try:
+            pagado_en = datetime.fromisoformat(data['pagado_en'].replace('Z', '+00:00'))
+        except (ValueError, AttributeError):
+            return jsonify({"error": "pagado_en inválido"}), 400
+        # se guarda en UTC sin zona: con offset hay que convertir, no solo quitarlo
+        if pagado_en.tzinfo:
+            pagado_en = pagado_en.astimezone(timezone.utc).replace(tzinfo=None)
+
+    pago = Pago(orden_id=orden.id, tipo=tipo, monto=monto, pagado_en=pagado_en)
+    db.session.add(pago)
+    estadisticas.registrar_pago(pago, orden)
+    db.session.commit()
+
+    return jsonify(pago.to_dict()), 201
+
+
+# =========================
+# GET /api/pagos?orden_id=1  |  ?desde=...&hasta=...
+# =========================
+@pagos_bp.route('', methods=['GET'])
+@jwt_required()
+@role_required('gerente', 'encargado')
+def listar_pagos():
+    """
+    Pagos de una orden (?orden_id) y/o de un rango de fechas (?desde / ?hasta,
+    por pagado_en, que tiene índice). Más recientes primero, acepta ?limit / ?cursor.
+    """
+    query = Pago.query
+
+    orden_id = request.args.get('orden_id', type=int)
+    if orden_id:
+        query = query.filter(Pago.orden_id == orden_id)
+
+    try:
+        desde = request.args.get('desde', '').strip()
+        hasta = request.args.get('hasta', '').strip()
+        if desde:
+            query = query.filter(Pago.pagado_en >= datetime.combine(_parse_fecha(desde), datetime.min.time()))
+        if hasta:
+            # hasta es inclusive: todo el día
+            fin = datetime.combine(_parse_fecha(hasta) + timedelta(days=1), datetime.min.time())
+            query = query.filter(Pago.pagado_en < fin)
+    except ValueError:
+        return jsonify({"error": "Fecha inválida, use AAAA-MM-DD"}), 400
+
+    tipo = request.args.get('tipo', '').strip()
+    if tipo:
+        try:
+            query = query.filter(Pago.tipo == TipoPagoEnum[tipo])
+        except KeyError:
+            return jsonify({"error": "Tipo de pago inválido"}), 400
+
+    return paginar_respuesta(query, [Pago.pagado_en, Pago.id], lambda p: p.to_dict(), descendente=True)
+
+
+# =========================
+# GET /api/pagos/cierre?fecha=2025-10-31
+# cierre de caja del día por tipo
+# =========================
+@pagos_bp.route('/cierre', methods=['GET'])
+@jwt_required()
+@role_required('gerente', 'encargado')
+def cierre_caja():
+    """
+    Totales del día por tipo de pago. Sale de la fila del día de
+    estadisticas_diarias (un SELECT por PK), no de sumar la tabla pagos.
+    Con ?detalle=1 agrega los pagos del día (rango sobre pagado_en).
+    """
+    try:
+        fecha = _parse_fecha(request.args['fecha']) if request.args.get('fecha') else datetime.utcnow().date()
+    except ValueError:
+        return jsonify({"error": "Fecha inválida, use AAAA-MM-DD"}), 400
+
+    fila = estadisticas.leer_dia(fecha)
+    por_tipo = estadisticas.ingresos_por_tipo(fila)
+
+    resp = {
+        "fecha": fecha.isoformat(),
+        "por_tipo": {tipo: float(monto) for tipo, monto in por_tipo.items()},
+        "total": float(sum(por_tipo.values())),
+    }
+
+    if request.args.get('detalle', '').lower() in ('1', 'true', 'si'):
+        inicio = datetime.combine(fecha, datetime.min.time())
+        pagos = (
+            Pago.query
+            .filter(Pago.pagado_en >= inicio, Pago.pagado_en < inicio + timedelta(days=1))
+            .order_by(Pago.pagado_en, Pago.id)
+            .all()
+        )
+        resp["pagos"] = [p.to_dict() for p in pagos]
+
+    return jsonify(resp), 200
+
+
+# =========================
+# GET /api/pagos/ingresos?desde=2025-01-01&hasta=2025-06-30&agrupar=mes
+# =========================
+@pagos_bp.route('/ingresos', methods=['GET'])
+@jwt_required()
+@role_required('gerente')
+def ingresos():
+    """
+    Ingresos por día o por mes (?agrupar=dia|mes) y por tipo, desde el
+    rollup: a lo sumo una fila por día del rango, da igual cuántos pagos haya.
+    Por defecto los últimos 30 días. ?mecanico_id=N para los de un mecánico.
+    """
+    hoy = datetime.utcnow().date()
+    try:
+        hasta = _parse_fecha(request.args['hasta']) if request.args.get('hasta') else hoy
+        desde = _parse_fecha(request.args['desde']) if request.args.get('desde') else hasta - timedelta(days=29)
+    except ValueError:
+        return jsonify({"error": "Fecha inválida, use AAAA-MM-DD"}), 400
+
+    if desde > hasta:
+        return jsonify({"error": "'desde' no puede ser posterior a 'hasta'"}), 400
+    if (hasta - desde).days >= MAX_DIAS_INGRESOS:
+        return jsonify({"error": f"El rango no puede superar {MAX_DIAS_INGRESOS} días"}), 400
+
+    agrupar = request.args.get('agrupar', 'dia')
+    if agrupar not in ('dia', 'mes'):
+        return jsonify({"error": "agrupar debe ser 'dia' o 'mes'"}), 400
+
+    mecanico_id = request.args.get('mecanico_id', type=int) or estadisticas.TALLER
+
+    periodos = OrderedDict()
+    totales = {tipo.value: Decimal(0) for tipo in TipoPagoEnum}
+    for fila in estadisticas.leer_rango(desde, hasta, mecanico_id):
+        clave = fila.fecha.isoformat() if agrupar == 'dia' else fila.fecha.strftime('%Y-%m')
+        acumulado = periodos.setdefault(clave, {tipo.value: Decimal(0) for tipo in TipoPagoEnum})
+        for tipo, monto in estadisticas.ingresos_por_tipo(fila).items():
+            acumulado[tipo] += monto
+            totales[tipo] += monto
+
+    return jsonify({
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "agrupar": agrupar,
+        "periodos": [
+            {
+                "periodo": clave,
+                "por_tipo": {tipo: float(m) for tipo, m in montos.items()},
+                "total": float(sum(montos.values())),
+            }
+            for clave, montos in periodos.items()
+            if any(montos.values())
+        ],
+        "por_tipo": {tipo: float(m) for tipo, m in totales.items()},
+        "total": float(sum(totales.values())),
+    }), 200
@@ -1,32 +1,45 @@
 # api/reportes_routes.py
 
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, current_app
 from flask_jwt_extended import jwt_required, get_jwt
 
 from io import BytesIO
 from datetime import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+
+import click
+from flask.cli import with_appcontext
 
 from core.extensions import db
 from core.auth import role_required
+from core import perfiles_carga
+from core.catalogo import catalogo
+from core.conexiones import limitar_blueprint
+from core.reportes_jobs import encolar_job, correr_worker
 
-from models.ordenes import OrdenTrabajo
+from models.ordenes import OrdenTrabajo, EstadoOrdenEnum
 from models.personas import Cliente, Empleado
 from models.vehiculos import Motocicleta
-from models.reportes import ReporteTrabajo  # <-- este es tu modelo real
+from models.reportes import ReporteTrabajo, JobReporte, EstadoJobEnum  # <-- este es tu modelo real
 
-# para XLSX
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
-
-# para PDF
-from reportlab.pdfgen import canvas
+# para PDF (medidas; son módulos chiquitos). openpyxl, reportlab.pdfgen y
+# pypdf pesan ~0.3 s de import y se cargan recién en el primer export.
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
-from reportlab.lib import colors
 
 
 reportes_bp = Blueprint('reportes', __name__, url_prefix='/api/reportes')
 
+# un export pesado no puede quedarse con una conexión por minutos
+limitar_blueprint(reportes_bp, 'REPORTES_STATEMENT_TIMEOUT_MS')
+
 
 def _current_user():
     """
@@ -47,87 +60,193 @@ def _current_user():
 # --------------------------------------------------------------------
 # 1) DATASET GENERAL (para XLSX/PDF global o por cliente)
 # --------------------------------------------------------------------
-def _armar_dataset(cliente_id=None):
-    """
-    Arma la data cruda que vamos a exportar.
-    Si cliente_id viene, filtramos solo ese cliente.
-    Si no viene, sacamos todas las órdenes.
+# filas que trae el cursor del servidor por vuelta
+DATASET_CHUNK = 500
 
-    Retorna una lista de dicts, cada dict = UNA orden con:
-    - datos de la orden
-    - lista de trabajos realizados (reportes_trabajo) en texto formateado
+
+def _parse_filtros(args):
     """
+    Filtros opcionales del export (mismos nombres que GET /api/ordenes):
+    estado, mecanico_id, desde, hasta. `args` puede ser request.args o el
+    JSON de un job. Devuelve un dict serializable (se guarda en el job) o
+    lanza ValueError con el mensaje para el 400.
+    """
+    filtros = {}
+
+    estado = _texto(args, 'estado')
+    if estado:
+        if estado not in EstadoOrdenEnum.__members__:
+            raise ValueError(f"estado inválido: {estado}")
+        filtros['estado'] = estado
+
+    mecanico_id = args.get('mecanico_id')
+    if mecanico_id not in (None, ''):
+        if isinstance(mecanico_id, bool):
+            raise ValueError("mecanico_id inválido")
+        try:
+            filtros['mecanico_id'] = int(mecanico_id)
+        except (TypeError, ValueError):
+            raise ValueError("mecanico_id inválido")
+
+    for campo in ('desde', 'hasta'):
+        valor = _texto(args, campo)
+        if valor:
+            try:
+                _parse_fecha(valor)
+            except ValueError:
+                raise ValueError(f"{campo} inválido, usa formato ISO (YYYY-MM-DD)")
+            filtros[campo] = valor
+
+    return filtros
+
+
+def _texto(args, campo):
+    """El valor como string sin espacios ('' si no vino). Desde el JSON de un job puede llegar cualquier tipo."""
+    valor = args.get(campo)
+    if valor is None:
+        return ''
+    if not isinstance(valor, str):
+        raise ValueError(f"{campo} inválido")
+    return valor.strip()
+
+
+def _parse_fecha(valor):
+    # quiero aceptar "2025-10-31T00:00:00Z"
+    return datetime.fromisoformat(valor.replace('Z', '+00:00'))
+
+
+def _query_dataset(cliente_id=None, filtros=None):
+    """Órdenes a exportar (con joins para el perfil de carga), sin ORDER BY."""
+    filtros = filtros or {}
 
-    # query base de órdenes con joins
     q = (
         OrdenTrabajo.query
         .join(Cliente, Cliente.id == OrdenTrabajo.cliente_id)
         .join(Motocicleta, Motocicleta.id == OrdenTrabajo.motocicleta_id)
         .outerjoin(Empleado, Empleado.id == OrdenTrabajo.mecanico_asignado_id)
-        .order_by(OrdenTrabajo.fecha_ingreso.desc())
     )
 
     if cliente_id:
         q = q.filter(OrdenTrabajo.cliente_id == cliente_id)
+    if filtros.get('estado'):
+        q = q.filter(OrdenTrabajo.estado == EstadoOrdenEnum[filtros['estado']])
+    if filtros.get('mecanico_id'):
+        q = q.filter(OrdenTrabajo.mecanico_asignado_id == filtros['mecanico_id'])
+    if filtros.get('desde'):
+        q = q.filter(OrdenTrabajo.fecha_ingreso >= _parse_fecha(filtros['desde']))
+    if filtros.get('hasta'):
+        q = q.filter(OrdenTrabajo.fecha_ingreso <= _parse_fecha(filtros['hasta']))
 
-    ordenes = q.all()
+    return q
 
-    # Para cada orden también traemos sus reportes técnicos (ReporteTrabajo)
-    # y los armamos en formato tipo:
-    # "[31/10/2025 02:39, Edinilson Valdes] cambio de aceite"
-    rows = []
-    for o in ordenes:
-        cliente = getattr(o, "cliente", None)
-        moto = getattr(o, "motocicleta", None)
-        mecanico = getattr(o, "mecanico_asignado", None)
-
-        # marca / modelo vienen anidados en motocicleta.modelo / modelo.marca
-        marca_nombre = None
-        modelo_nombre = None
-        if moto and getattr(moto, "modelo", None):
-            modelo_nombre = moto.modelo.nombre
-            if getattr(moto.modelo, "marca", None):
-                marca_nombre = moto.modelo.marca.nombre
-
-        # buscar los reportes_trabajo de ESTA orden
-        # orden_id -> o.id
-        reportes = (
-            ReporteTrabajo.query
-            .filter(ReporteTrabajo.orden_id == o.id)
-            .order_by(ReporteTrabajo.creado_en.asc())
-            .all()
-        )
 
-        trabajos_list = []
-        for rep in reportes:
-            fecha_txt = rep.creado_en.strftime("%d/%m/%Y %H:%M") if rep.creado_en else "¿?"
-            linea = f"[{fecha_txt}, {rep.mecanico_nombre or '—'}] {rep.descripcion or ''}"
-            trabajos_list.append(linea)
+def _contar_dataset(cliente_id=None, filtros=None):
+    return _query_dataset(cliente_id, filtros).order_by(None).count()
+
+
+def _armar_dataset(cliente_id=None, filtros=None):
+    """
+    Arma la data cruda que vamos a exportar.
+    Si cliente_id viene, filtramos solo ese cliente.
+    Si no viene, sacamos todas las órdenes.
+    `filtros` es lo que devuelve _parse_filtros (estado, mecánico, fechas).
+
+    Es un GENERADOR: va leyendo las órdenes con yield_per (cursor del lado
+    del servidor) y entrega un dict por orden, así nunca tenemos toda la
+    historia del taller en memoria. Cada dict = UNA orden con:
+    - datos de la orden
+    - lista de trabajos realizados (reportes_trabajo) en texto formateado
+    """
+
+    # query base de órdenes con joins
+    q = _query_dataset(cliente_id, filtros).order_by(OrdenTrabajo.fecha_ingreso.desc())
 
-        trabajos_txt = "\n".join(trabajos_list)
+    ordenes = q.options(*perfiles_carga.orden_listado()).yield_per(DATASET_CHUNK)
 
-        rows.append({
-            "orden_id": o.id,
-            "fecha_ingreso": o.fecha_ingreso.isoformat() if o.fecha_ingreso else None,
-            "fecha_salida": o.fecha_salida.isoformat() if getattr(o, "fecha_salida", None) else None,
-            "estado": o.estado.value if o.estado else None,
+    # Vamos de a lotes: por cada lote de órdenes traemos TODOS sus reportes
+    # técnicos (ReporteTrabajo) en una sola query IN (...) y los agrupamos acá,
+    # en vez de una query por orden. Quedan en formato tipo:
+    # "[31/10/2025 02:39, Edinilson Valdes] cambio de aceite"
+    for lote in _en_lotes(ordenes, DATASET_CHUNK):
+        trabajos_por_orden = _trabajos_por_orden([o.id for o in lote])
 
-            "cliente_nombre": cliente.nombre if cliente else None,
-            "cliente_telefono": cliente.telefono if cliente else None,
+        for o in lote:
+            yield _fila_dataset(o, trabajos_por_orden.get(o.id, []))
 
-            "moto_placa": moto.placa if moto else None,
-            "moto_vin": moto.vin if moto else None,
-            "moto_marca": marca_nombre,
-            "moto_modelo": modelo_nombre,
 
-            "mecanico_nombre": mecanico.nombre if mecanico else "Sin asignar",
-            "observaciones": o.observaciones or "",
+def _en_lotes(iterable, tamano):
+    lote = []
+    for item in iterable:
+        lote.append(item)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
 
-            # <-- lo nuevo:
-            "trabajos_realizados": trabajos_txt,
-        })
 
-    return rows
+def _trabajos_por_orden(orden_ids):
+    """
+    orden_id -> lista de líneas "[fecha, mecánico] descripción" en orden
+    cronológico, con UNA query para todo el lote (solo las columnas que usamos).
+    """
+    trabajos = {}
+    if not orden_ids:
+        return trabajos
+
+    filas = (
+        db.session.query(
+            ReporteTrabajo.orden_id,
+            ReporteTrabajo.creado_en,
+            ReporteTrabajo.mecanico_nombre,
+            ReporteTrabajo.descripcion,
+        )
+        .filter(ReporteTrabajo.orden_id.in_(orden_ids))
+        .order_by(ReporteTrabajo.orden_id, ReporteTrabajo.creado_en.asc(), ReporteTrabajo.id)
+    )
+    for orden_id, creado_en, mecanico_nombre, descripcion in filas:
+        fecha_txt = creado_en.strftime("%d/%m/%Y %H:%M") if creado_en else "¿?"
+        linea = f"[{fecha_txt}, {mecanico_nombre or '—'}] {descripcion or ''}"
+        trabajos.setdefault(orden_id, []).append(linea)
+    return trabajos
+
+
+def _fila_dataset(o, trabajos_list):
+    """Una orden (con cliente/moto/modelo/marca ya cargados) -> dict del dataset."""
+    cliente = getattr(o, "cliente", None)
+    moto = getattr(o, "motocicleta", None)
+    mecanico = getattr(o, "mecanico_asignado", None)
+
+    # marca / modelo salen del catálogo en memoria
+    marca_nombre = None
+    modelo_nombre = None
+    modelo = catalogo.modelo(moto.modelo_id) if moto and moto.modelo_id else None
+    if modelo:
+        modelo_nombre = modelo["nombre"]
+        marca_nombre = (modelo["marca"] or {}).get("nombre")
+
+    trabajos_txt = "\n".join(trabajos_list)
+
+    return {
+        "orden_id": o.id,
+        "fecha_ingreso": o.fecha_ingreso.isoformat() if o.fecha_ingreso else None,
+        "fecha_salida": o.fecha_salida.isoformat() if getattr(o, "fecha_salida", None) else None,
+        "estado": o.estado.value if o.estado else None,
+
+        "cliente_nombre": cliente.nombre if cliente else None,
+        "cliente_telefono": cliente.telefono if cliente else None,
+
+        "moto_placa": moto.placa if moto else None,
+        "moto_vin": moto.vin if moto else None,
+        "moto_marca": marca_nombre,
+        "moto_modelo": modelo_nombre,
+
+        "mecanico_nombre": mecanico.nombre if mecanico else "Sin asignar",
+        "observaciones": o.observaciones or "",
+
+        # <-- lo nuevo:
+        "trabajos_realizados": trabajos_txt,
+    }
 
 
 # --------------------------------------------------------------------
@@ -135,11 +254,15 @@ def _armar_dataset(cliente_id=None):
 # --------------------------------------------------------------------
 def _export_xlsx(rows, titulo="Reporte de Órdenes"):
     """
-    Genera un XLSX en memoria y lo devuelve como BytesIO listo para send_file.
+    Genera un XLSX en modo write-only: las filas se escriben a disco a medida
+    que llegan (rows puede ser el generador de _armar_dataset) y el archivo
+    final queda en un temporal que send_file manda por pedazos y borra al cerrar.
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Ordenes"
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Ordenes")
 
     # encabezado
     headers = [
@@ -157,6 +280,11 @@ def _export_xlsx(rows, titulo="Reporte de Órdenes"):
         "Observaciones",
         "Trabajos realizados",
     ]
+    # ancho automático decente (en write-only va ANTES de escribir filas)
+    for col_idx, header in enumerate(headers, start=1):
+        col_letter = get_column_letter(col_idx)
+        ws.column_dimensions[col_letter].width = max(18, len(header) + 2)
+
     ws.append(headers)
 
     # filas
@@ -177,13 +305,8 @@ def _export_xlsx(rows, titulo="Reporte de Órdenes"):
             r["trabajos_realizados"],
         ])
 
-    # ancho automático decente
-    for col_idx, header in enumerate(headers, start=1):
-        col_letter = get_column_letter(col_idx)
-        ws.column_dimensions[col_letter].width = max(18, len(header) + 2)
-
-    # guardarlo en bytes
-    output = BytesIO()
+    # guardarlo en un temporal (se borra solo cuando send_file lo cierra)
+    output = tempfile.TemporaryFile()
     wb.save(output)
     output.seek(0)
 
@@ -196,200 +319,338 @@ def _export_xlsx(rows, titulo="Reporte de Órdenes"):
 # --------------------------------------------------------------------
 # 3) EXPORT GLOBAL PDF BONITO (tarjetas por orden)
 # --------------------------------------------------------------------
-def _export_pdf(rows, titulo="Reporte de Órdenes"):
+# medidas de la tarjeta (compartidas por la paginación y el dibujo)
+PDF_MARGIN_X = 2 * cm
+PDF_MARGIN_Y = 2 * cm
+PDF_TITULO_ALTO = 1 * cm
+CARD_PADDING_X = 0.6 * cm
+CARD_PADDING_Y = 0.5 * cm
+CARD_SPACING_Y = 0.8 * cm  # espacio entre tarjetas
+LINE_HEIGHT = 0.45 * cm
+
+LABEL_FONT = ("Helvetica-Bold", 9)
+VALUE_FONT = ("Helvetica", 9)
+
+
+def _bloque_trabajos(r):
+    """formatear la lista de trabajos con viñetas"""
+    trabajos_bloque = []
+    trabajos_txt = r.get("trabajos_realizados", "") or ""
+    if trabajos_txt.strip():
+        for raw_line in trabajos_txt.split("\n"):
+            trabajos_bloque.append("• " + raw_line.strip())
+    return trabajos_bloque
+
+
+def _alto_tarjeta(trabajos_bloque):
+    # Estimación de alto de tarjeta
+    base_lines = 7  # encabezado + fechas + cliente + moto + modelo + mecánico + obs + título trabajos
+    trabajos_lines = len(trabajos_bloque) if trabajos_bloque else 1
+    total_lines = base_lines + trabajos_lines
+
+    return (total_lines * LINE_HEIGHT) + (2 * CARD_PADDING_Y)
+
+
+def _paginar_pdf(rows):
     """
-    Genera un PDF presentable:
-    - Cada orden es una 'tarjeta' con borde gris y padding
-    - Etiquetas alineadas
-    - Trabajos realizados tipo lista con viñitas
+    Reparte las órdenes en páginas con la misma estimación de alto que usa
+    el dibujo. Es un generador de listas (una lista = una página), así se
+    puede renderizar por rangos de páginas en paralelo sin cambiar el diseño.
     """
+    _, page_height = A4
+    tope = page_height - PDF_MARGIN_Y - PDF_TITULO_ALTO
 
-    buffer = BytesIO()
-
-    page_width, page_height = A4
-    c = canvas.Canvas(buffer, pagesize=A4)
+    y = tope
+    pagina = []
+    for r in rows:
+        card_height = _alto_tarjeta(_bloque_trabajos(r))
 
-    margin_x = 2 * cm
-    margin_y = 2 * cm
+        # Salto de página si no cabe
+        if y - card_height < PDF_MARGIN_Y:
+            yield pagina
+            pagina = []
+            y = tope
 
-    # posición inicial arriba de la página
-    y = page_height - margin_y
+        pagina.append(r)
+        # bajar Y para siguiente tarjeta
+        y = y - card_height - CARD_SPACING_Y
 
-    # Título grande
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(margin_x, y, titulo)
-    y -= 1 * cm
+    yield pagina
 
-    # estilos
-    label_font = ("Helvetica-Bold", 9)
-    value_font = ("Helvetica", 9)
 
-    card_padding_x = 0.6 * cm
-    card_padding_y = 0.5 * cm
-    card_spacing_y = 0.8 * cm  # espacio entre tarjetas
-    card_border_color = colors.grey
+def _dibujar_tarjeta(c, r, y):
+    """Dibuja la tarjeta de una orden con el borde superior en `y`."""
+    from reportlab.lib import colors
 
-    line_height = 0.45 * cm
+    page_width, _ = A4
 
     def draw_label_value(label, value, cur_x, cur_y):
         """Dibuja `Label: value` alineado bonito"""
-        c.setFont(*label_font)
+        c.setFont(*LABEL_FONT)
         c.drawString(cur_x, cur_y, f"{label}:")
-        label_w = c.stringWidth(f"{label}:", label_font[0], label_font[1])
-        c.setFont(*value_font)
+        label_w = c.stringWidth(f"{label}:", LABEL_FONT[0], LABEL_FONT[1])
+        c.setFont(*VALUE_FONT)
         c.drawString(cur_x + label_w + 4, cur_y, value if value else "—")
 
-    for r in rows:
-        # formatear la lista de trabajos
-        trabajos_bloque = []
-        trabajos_txt = r.get("trabajos_realizados", "") or ""
-        if trabajos_txt.strip():
-            for raw_line in trabajos_txt.split("\n"):
-                trabajos_bloque.append("• " + raw_line.strip())
+    trabajos_bloque = _bloque_trabajos(r)
+    card_height = _alto_tarjeta(trabajos_bloque)
+
+    # coords tarjeta
+    card_x1 = PDF_MARGIN_X
+    card_y1 = y - card_height
+    card_x2 = page_width - PDF_MARGIN_X
+    card_y2 = y
+
+    # borde tarjeta
+    c.setStrokeColor(colors.grey)
+    c.setLineWidth(0.5)
+    c.roundRect(card_x1, card_y1, card_x2 - card_x1, card_y2 - card_y1, 6, stroke=1, fill=0)
+
+    # contenido
+    text_x = card_x1 + CARD_PADDING_X
+    text_y = card_y2 - CARD_PADDING_Y
+
+    # Encabezado orden + estado
+    c.setFont("Helvetica-Bold", 11)
+    encabezado = f"Orden #{r['orden_id']}   |   {r['estado'] or 'SIN ESTADO'}"
+    c.drawString(text_x, text_y, encabezado)
+    text_y -= LINE_HEIGHT
+
+    # Fechas
+    c.setFont("Helvetica", 9)
+    fechas_line = (
+        f"Ingreso: {r['fecha_ingreso'] or '—'}    "
+        f"Salida: {r['fecha_salida'] or '—'}"
+    )
+    c.drawString(text_x, text_y, fechas_line)
+    text_y -= LINE_HEIGHT
 
-        # Estimación de alto de tarjeta
-        base_lines = 7  # encabezado + fechas + cliente + moto + modelo + mecánico + obs + título trabajos
-        trabajos_lines = len(trabajos_bloque) if trabajos_bloque else 1
-        total_lines = base_lines + trabajos_lines
+    # Cliente
+    draw_label_value(
+        "Cliente",
+        f"{r['cliente_nombre'] or '—'}   Tel: {r['cliente_telefono'] or '—'}",
+        text_x,
+        text_y
+    )
+    text_y -= LINE_HEIGHT
+
+    # Moto
+    draw_label_value(
+        "Motocicleta",
+        f"Placa {r['moto_placa'] or '—'} / VIN {r['moto_vin'] or '—'}",
+        text_x,
+        text_y
+    )
+    text_y -= LINE_HEIGHT
 
-        card_height = (total_lines * line_height) + (2 * card_padding_y)
+    # Modelo
+    draw_label_value(
+        "Modelo",
+        f"{r['moto_marca'] or '—'} {r['moto_modelo'] or ''}".strip(),
+        text_x,
+        text_y
+    )
+    text_y -= LINE_HEIGHT
+
+    # Mecánico asignado
+    draw_label_value(
+        "Mecánico",
+        r['mecanico_nombre'] or '—',
+        text_x,
+        text_y
+    )
+    text_y -= LINE_HEIGHT
 
-        # Salto de página si no cabe
-        if y - card_height < margin_y:
-            c.showPage()
-            page_width, page_height = A4
-            y = page_height - margin_y
-
-            c.setFont("Helvetica-Bold", 16)
-            c.drawString(margin_x, y, titulo)
-            y -= 1 * cm
-
-        # coords tarjeta
-        card_x1 = margin_x
-        card_y1 = y - card_height
-        card_x2 = page_width - margin_x
-        card_y2 = y
-
-        # borde tarjeta
-        c.setStrokeColor(card_border_color)
-        c.setLineWidth(0.5)
-        c.roundRect(card_x1, card_y1, card_x2 - card_x1, card_y2 - card_y1, 6, stroke=1, fill=0)
-
-        # contenido
-        text_x = card_x1 + card_padding_x
-        text_y = card_y2 - card_padding_y
-
-        # Encabezado orden + estado
-        c.setFont("Helvetica-Bold", 11)
-        encabezado = f"Orden #{r['orden_id']}   |   {r['estado'] or 'SIN ESTADO'}"
-        c.drawString(text_x, text_y, encabezado)
-        text_y -= line_height
-
-        # Fechas
-        c.setFont("Helvetica", 9)
-        fechas_line = (
-            f"Ingreso: {r['fecha_ingreso'] or '—'}    "
-            f"Salida: {r['fecha_salida'] or '—'}"
-        )
-        c.drawString(text_x, text_y, fechas_line)
-        text_y -= line_height
-
-        # Cliente
-        draw_label_value(
-            "Cliente",
-            f"{r['cliente_nombre'] or '—'}   Tel: {r['cliente_telefono'] or '—'}",
-            text_x,
-            text_y
-        )
-        text_y -= line_height
-
-        # Moto
-        draw_label_value(
-            "Motocicleta",
-            f"Placa {r['moto_placa'] or '—'} / VIN {r['moto_vin'] or '—'}",
-            text_x,
-            text_y
-        )
-        text_y -= line_height
-
-        # Modelo
-        draw_label_value(
-            "Modelo",
-            f"{r['moto_marca'] or '—'} {r['moto_modelo'] or ''}".strip(),
-            text_x,
-            text_y
-        )
-        text_y -= line_height
-
-        # Mecánico asignado
-        draw_label_value(
-            "Mecánico",
-            r['mecanico_nombre'] or '—',
-            text_x,
-            text_y
-        )
-        text_y -= line_height
-
-        # Observaciones
-        draw_label_value(
-            "Observaciones",
-            r['observaciones'] or '—',
-            text_x,
-            text_y
-        )
-        text_y -= line_height
-
-        # línea separadora fina
-        c.setStrokeColor(colors.lightgrey)
-        c.setLineWidth(0.3)
-        c.line(
-            text_x,
-            text_y + (line_height * 0.4),
-            card_x2 - card_padding_x,
-            text_y + (line_height * 0.4)
-        )
-        text_y -= (line_height * 0.6)
-
-        # Trabajos realizados
-        c.setFont("Helvetica-Bold", 9)
-        c.drawString(text_x, text_y, "Trabajos realizados:")
-        text_y -= line_height
-
-        c.setFont("Helvetica", 9)
-
-        if trabajos_bloque:
-            for linea_rep in trabajos_bloque:
-                # wrap manual para no salirnos de la tarjeta
-                max_width = (card_x2 - card_padding_x) - text_x
-                words = linea_rep.split()
-                actual = ""
-                for w in words:
-                    probe = (actual + " " + w).strip()
-                    if c.stringWidth(probe, "Helvetica", 9) > max_width:
-                        c.drawString(text_x, text_y, actual)
-                        text_y -= line_height
-                        actual = w
-                    else:
-                        actual = probe
-                if actual:
+    # Observaciones
+    draw_label_value(
+        "Observaciones",
+        r['observaciones'] or '—',
+        text_x,
+        text_y
+    )
+    text_y -= LINE_HEIGHT
+
+    # línea separadora fina
+    c.setStrokeColor(colors.lightgrey)
+    c.setLineWidth(0.3)
+    c.line(
+        text_x,
+        text_y + (LINE_HEIGHT * 0.4),
+        card_x2 - CARD_PADDING_X,
+        text_y + (LINE_HEIGHT * 0.4)
+    )
+    text_y -= (LINE_HEIGHT * 0.6)
+
+    # Trabajos realizados
+    c.setFont("Helvetica-Bold", 9)
+    c.drawString(text_x, text_y, "Trabajos realizados:")
+    text_y -= LINE_HEIGHT
+
+    c.setFont("Helvetica", 9)
+
+    if trabajos_bloque:
+        for linea_rep in trabajos_bloque:
+            # wrap manual para no salirnos de la tarjeta
+            max_width = (card_x2 - CARD_PADDING_X) - text_x
+            words = linea_rep.split()
+            actual = ""
+            for w in words:
+                probe = (actual + " " + w).strip()
+                if c.stringWidth(probe, "Helvetica", 9) > max_width:
                     c.drawString(text_x, text_y, actual)
-                    text_y -= line_height
-        else:
-            c.drawString(text_x, text_y, "—")
-            text_y -= line_height
+                    text_y -= LINE_HEIGHT
+                    actual = w
+                else:
+                    actual = probe
+            if actual:
+                c.drawString(text_x, text_y, actual)
+                text_y -= LINE_HEIGHT
+    else:
+        c.drawString(text_x, text_y, "—")
+        text_y -= LINE_HEIGHT
 
-        # bajar Y para siguiente tarjeta
-        y = card_y1 - card_spacing_y
+    # bajar Y para siguiente tarjeta
+    return card_y1 - CARD_SPACING_Y
+
+
+def _dibujar_pagina(c, filas, titulo):
+    """Título grande arriba + las tarjetas que le tocaron a esta página."""
+    _, page_height = A4
+
+    # posición inicial arriba de la página
+    y = page_height - PDF_MARGIN_Y
+
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(PDF_MARGIN_X, y, titulo)
+    y -= PDF_TITULO_ALTO
+
+    for r in filas:
+        y = _dibujar_tarjeta(c, r, y)
 
-    # cerrar PDF
     c.showPage()
+
+
+def _render_paginas(paginas, titulo, destino=None):
+    """
+    Dibuja un rango de páginas en un PDF propio. Corre tanto en el proceso
+    web (1 worker) como dentro del ProcessPoolExecutor; en ese caso devuelve
+    los bytes del PDF parcial para unirlo después.
+    """
+    from reportlab.pdfgen import canvas
+
+    buffer = destino if destino is not None else BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    for filas in paginas:
+        _dibujar_pagina(c, filas, titulo)
     c.save()
+    if destino is None:
+        return buffer.getvalue()
+
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
 
-    buffer.seek(0)
+def _pool_pdf(workers):
+    """Pool de procesos reutilizado entre requests (levantarlo cuesta)."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None or _pdf_pool._max_workers != workers:
+            if _pdf_pool is not None:
+                _pdf_pool.shutdown(wait=False)
+            # spawn: no heredamos conexiones de DB ni hilos del proceso web
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pdf_pool
+
+
+def _render_paralelo(paginas, titulo, workers, paginas_por_shard, destino):
+    """
+    Parte las páginas en rangos de `paginas_por_shard`, los renderiza en
+    `workers` procesos y los une en orden. Como mucho hay 2 rangos por worker
+    en vuelo, así no acumulamos todo el dataset en memoria.
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    pool = _pool_pdf(workers)
+    writer = PdfWriter()
+    en_vuelo = deque()
+
+    def unir_siguiente():
+        writer.append(PdfReader(BytesIO(en_vuelo.popleft().result())))
+
+    for shard in _en_lotes(paginas, paginas_por_shard):
+        en_vuelo.append(pool.submit(_render_paginas, shard, titulo))
+        while len(en_vuelo) >= workers * 2:
+            unir_siguiente()
+
+    while en_vuelo:
+        unir_siguiente()
+
+    writer.write(destino)
+
+
+def _export_pdf(rows, titulo="Reporte de Órdenes", workers=None, paginas_por_shard=None):
+    """
+    Genera un PDF presentable:
+    - Cada orden es una 'tarjeta' con borde gris y padding
+    - Etiquetas alineadas
+    - Trabajos realizados tipo lista con viñitas
+
+    Con PDF_WORKERS > 1 las páginas se renderizan en paralelo en varios
+    procesos y se unen al final; el diseño es el mismo página por página.
+    """
+    if workers is None:
+        workers = current_app.config.get('PDF_WORKERS', 1)
+    if paginas_por_shard is None:
+        paginas_por_shard = current_app.config.get('PDF_PAGINAS_POR_SHARD', 25)
+
+    paginas = _paginar_pdf(rows)
+    output = tempfile.TemporaryFile()
+
+    if workers > 1:
+        _render_paralelo(paginas, titulo, workers, paginas_por_shard, output)
+    else:
+        _render_paginas(paginas, titulo, destino=output)
+
+    output.seek(0)
 
     filename = f"{titulo.replace(' ', '_').lower()}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.pdf"
     mimetype = "application/pdf"
-    return buffer, filename, mimetype
+    return output, filename, mimetype
+
+
+def _contando(rows, al_avanzar, cada=DATASET_CHUNK):
+    """Pasa las filas tal cual y avisa cuántas van cada `cada` filas."""
+    n = 0
+    for r in rows:
+        yield r
+        n += 1
+        if n % cada == 0:
+            al_avanzar(n)
+    al_avanzar(n)
+
+
+def _generar_export(formato, cliente_id=None, filtros=None, al_avanzar=None):
+    """
+    Dataset + archivo (xlsx o pdf). Lo usan el endpoint síncrono y los
+    jobs del worker. Devuelve (archivo, filename, mimetype).
+    """
+    rows = _armar_dataset(cliente_id=cliente_id, filtros=filtros)
+    if al_avanzar:
+        rows = _contando(rows, al_avanzar)
+
+    # si filtra por cliente_id, cambiamos título para que el archivo se llame bonito
+    if cliente_id:
+        titulo = f"Historial Cliente #{cliente_id}"
+    else:
+        titulo = "Ordenes Taller"
+
+    if formato == 'xlsx':
+        return _export_xlsx(rows, titulo=titulo)
+    return _export_pdf(rows, titulo=titulo)
 
 
 # --------------------------------------------------------------------
@@ -404,6 +665,10 @@ def exportar_ordenes():
     Query params:
       - formato = 'xlsx' | 'pdf'   (obligatorio)
       - cliente_id (opcional) -> si viene, filtra solo ese cliente
+      - estado, mecanico_id, desde, hasta (opcionales, como en /api/ordenes)
+
+    Para exports grandes conviene POST /api/reportes/jobs (se genera en
+    segundo plano y no se corta por timeout del proxy).
 
     Ejemplos desde el front:
       /api/reportes/ordenes?formato=xlsx
@@ -417,22 +682,176 @@ def exportar_ordenes():
     if formato not in ('xlsx', 'pdf'):
         return jsonify({"error": "formato inválido, use xlsx o pdf"}), 400
 
-    rows = _armar_dataset(cliente_id=cliente_id)
-
-    # si filtra por cliente_id, cambiamos título para que el archivo se llame bonito
-    if cliente_id:
-        titulo = f"Historial Cliente #{cliente_id}"
-    else:
-        titulo = "Ordenes Taller"
+    try:
+        filtros = _parse_filtros(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    if formato == 'xlsx':
-        output, filename, mimetype = _export_xlsx(rows, titulo=titulo)
-    else:
-        output, filename, mimetype = _export_pdf(rows, titulo=titulo)
+    output, filename, mimetype = _generar_export(formato, cliente_id=cliente_id, filtros=filtros)
 
     return send_file(
         output,
         mimetype=mimetype,
         as_attachment=True,
         download_name=filename
-    )
\ No newline at end of file
+    )
+
+
+# --------------------------------------------------------------------
+# 5) JOBS: EXPORT EN SEGUNDO PLANO
+# --------------------------------------------------------------------
+def _job_o_404(job_id):
+    job = db.session.get(JobReporte, job_id)
+    if not job:
+        return None, (jsonify({"error": "Job no encontrado"}), 404)
+    return job, None
+
+
+def _job_dict(job):
+    data = job.to_dict()
+    if job.estado == EstadoJobEnum.LISTO:
+        data["descarga"] = f"/api/reportes/jobs/{job.id}/archivo"
+    return data
+
+
+@reportes_bp.route('/jobs', methods=['POST'])
+@jwt_required()
+@role_required("gerente", "encargado")
+def crear_job_export():
+    """
+    Encola un export de órdenes y responde al toque con el id del job.
+    Body JSON:
+    {
+        "formato": "xlsx" | "pdf",
+        "cliente_id": 7,          (opcional)
+        "estado": "FINALIZADA",   (opcional)
+        "mecanico_id": 3,         (opcional)
+        "desde": "2025-01-01",    (opcional)
+        "hasta": "2025-12-31"     (opcional)
+    }
+    Después: GET /api/reportes/jobs/<id> hasta que estado = LISTO y bajar
+    el archivo de /api/reportes/jobs/<id>/archivo.
+    """
+    data = request.get_json() or {}
+
+    formato = (data.get('formato') or '').lower().strip()
+    if formato not in ('xlsx', 'pdf'):
+        return jsonify({"error": "formato inválido, use xlsx o pdf"}), 400
+
+    cliente_id = data.get('cliente_id')
+    if cliente_id not in (None, ''):
+        try:
+            cliente_id = int(cliente_id)
+        except (TypeError, ValueError):
+            return jsonify({"error": "cliente_id inválido"}), 400
+        if not db.session.get(Cliente, cliente_id):
+            return jsonify({"error": f"El cliente {cliente_id} no existe"}), 404
+    else:
+        cliente_id = None
+
+    try:
+        filtros = _parse_filtros(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    job = encolar_job(formato, cliente_id=cliente_id, filtros=filtros,
+                      usuario_id=_current_user().get("id"))
+
+    return jsonify({"mensaje": "Export en cola", "job": _job_dict(job)}), 202
+
+
+@reportes_bp.route('/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+@role_required("gerente", "encargado")
+def estado_job_export(job_id):
+    """Estado y avance (progreso 0-100) del job."""
+    job, error = _job_o_404(job_id)
+    if error:
+        return error
+    return jsonify(_job_dict(job)), 200
+
+
+@reportes_bp.route('/jobs/<int:job_id>/archivo', methods=['GET'])
+@jwt_required()
+@role_required("gerente", "encargado")
+def descargar_job_export(job_id):
+    """Manda el archivo generado directo desde disco."""
+    job, error = _job_o_404(job_id)
+    if error:
+        return error
+
+    if job.estado != EstadoJobEnum.LISTO:
+        return jsonify({"error": "El export todavía no está listo", "estado": job.estado.value}), 409
+    if not job.ruta_archivo or not os.path.exists(job.ruta_archivo):
+        return jsonify({"error": "El archivo ya no está disponible, vuelve a pedir el export"}), 410
+
+    return send_file(
+        job.ruta_archivo,
+        mimetype=job.mimetype,
+        as_attachment=True,
+        download_name=job.nombre_archivo
+    )
+
+
+# --------------------------------------------------------------------
+# 6) CLI: worker de jobs + medir el render de PDF
+# --------------------------------------------------------------------
+@click.group('reportes')
+def reportes_cli():
+    """Utilidades de reportes/exportación."""
+
+
+@reportes_cli.command('worker')
+@click.option('--procesos', default=None, type=int, help='Procesos generando exports en paralelo.')
+@click.option('--una-vez', is_flag=True, help='Procesar los jobs pendientes y salir.')
+@with_appcontext
+def worker_cmd(procesos, una_vez):
+    """Genera los exports encolados en /api/reportes/jobs."""
+    cfg = current_app.config
+    correr_worker(
+        procesos=procesos or cfg['REPORTES_JOBS_PROCESOS'],
+        una_vez=una_vez,
+        espera=cfg['REPORTES_JOBS_ESPERA_SEG'],
+    )
+
+
+def _filas_sinteticas(n):
+    """Filas con la misma forma que _fila_dataset, sin tocar la base."""
+    rnd = random.Random(n)
+    for i in range(1, n + 1):
+        trabajos = "\n".join(
+            f"[01/01/2025 10:{j:02d}, Mecánico] " + "cambio de aceite y ajuste de frenos " * rnd.randint(1, 8)
+            for j in range(rnd.randint(0, 6))
+        )
+        yield {
+            "orden_id": i,
+            "fecha_ingreso": "2025-01-01T10:00:00",
+            "fecha_salida": None,
+            "estado": "EN_REPARACION",
+            "cliente_nombre": f"Cliente {i}",
+            "cliente_telefono": "5550000000",
+            "moto_placa": f"ABC{i:04d}",
+            "moto_vin": None,
+            "moto_marca": "Honda",
+            "moto_modelo": "CB190",
+            "mecanico_nombre": "Mecánico",
+            "observaciones": "ruido en la cadena " * rnd.randint(0, 4),
+            "trabajos_realizados": trabajos,
+        }
+
+
+@reportes_cli.command('benchmark-pdf')
+@click.option('--ordenes', default=5000, show_default=True, help='Órdenes sintéticas a renderizar.')
+@click.option('--workers', default=None, type=int, help='Procesos a comparar contra 1 (default: núcleos).')
+@with_appcontext
+def benchmark_pdf_cmd(ordenes, workers):
+    """Compara el tiempo del export PDF secuencial vs en paralelo."""
+    workers = workers or os.cpu_count() or 1
+    shard = current_app.config['PDF_PAGINAS_POR_SHARD']
+
+    for w in sorted({1, workers}):
+        inicio = time.perf_counter()
+        output, _, _ = _export_pdf(_filas_sinteticas(ordenes), workers=w, paginas_por_shard=shard)
+        tam = output.seek(0, os.SEEK_END)
+        output.close()
+        click.echo(f"{w} proceso(s): {time.perf_counter() - inicio:.2f}s  ({tam / 1024:.0f} KB)")
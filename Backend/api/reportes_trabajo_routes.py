@@ -1,35 +1,36 @@
-from flask import Blueprint, request, jsonify, Response
-from flask_jwt_extended import jwt_required, get_jwt
+import csv
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from flask_jwt_extended import jwt_required
 from core.extensions import db
-from core.auth import role_required
+from core.auth import role_required, identidad_actual
+from core.catalogo import catalogo
+from core.conexiones import statement_timeout
 
 from models.ordenes import OrdenTrabajo
-from models.personas import Usuario, Empleado
+from models.personas import Empleado
 from models.reportes import ReporteTrabajo
 
 reportes_trabajo_bp = Blueprint('reportes_trabajo', __name__, url_prefix='/api/reportes_trabajo')
 
+# filas por pedazo en el export CSV
+EXPORT_CHUNK = 500
+
 
 def _get_current_user_and_employee():
     """
-    Lee el JWT y regresa:
-    - usuario (row de Usuario)
-    - empleado_id vinculado (si existe)
-    - rol string ('mecanico', 'gerente', etc.)
+    Usuario del JWT (sin ir a la base, ver core.auth.identidad_actual):
+    - identidad (o None si el token ya no es válido)
+    - empleado_id (si el usuario está vinculado a un empleado)
+    - rol (string: 'mecanico', 'gerente', 'encargado', etc.)
     """
-    claims = get_jwt()
-    data_user = claims.get("user") or {}
-    user_id = data_user.get("id")
-    rol = data_user.get("rol")
-
-    if not user_id:
-        return None, None, None
-
-    usuario = Usuario.query.get(user_id)
-    if not usuario:
+    ident = identidad_actual()
+    if not ident:
         return None, None, None
 
-    return usuario, usuario.empleado_id, rol
+    return ident, ident.empleado_id, ident.rol
 
 
 @reportes_trabajo_bp.route('', methods=['POST'])
@@ -97,10 +98,10 @@ def crear_reporte_trabajo():
 
     modelo_nombre = None
     marca_nombre = None
-    if moto and getattr(moto, "modelo", None):
-        modelo_nombre = moto.modelo.nombre
-        if getattr(moto.modelo, "marca", None):
-            marca_nombre = moto.modelo.marca.nombre
+    modelo = catalogo.modelo(moto.modelo_id) if moto and moto.modelo_id else None
+    if modelo:
+        modelo_nombre = modelo["nombre"]
+        marca_nombre = (modelo["marca"] or {}).get("nombre")
 
     nuevo_rep = ReporteTrabajo(
         orden_id=orden.id,
@@ -158,14 +159,77 @@ def listar_reportes_trabajo():
     return jsonify(data), 200
 
 
+def _parse_fecha(valor, hasta=False):
+    """
+    Acepta '2025-10-31' o '2025-10-31T00:00:00Z'. None si viene vacío.
+    Con zona se pasa a UTC sin zona (así se guarda creado_en). Con hasta=True
+    una fecha sola devuelve el inicio del día siguiente: el filtro es `<` y
+    el día entero queda adentro, igual que en /api/pagos.
+    """
+    valor = (valor or "").strip()
+    if not valor:
+        return None
+    fecha = datetime.fromisoformat(valor.replace('Z', '+00:00'))
+    if fecha.tzinfo:
+        fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+    if hasta and len(valor) == 10:
+        return fecha + timedelta(days=1)
+    if hasta:
+        # con hora es inclusive, la pasamos a límite exclusivo
+        return fecha + timedelta(microseconds=1)
+    return fecha
+
+
+def _csv_reportes(query, chunk=EXPORT_CHUNK):
+    """
+    Genera el CSV por pedazos: la query se recorre con yield_per y cada
+    `chunk` filas se manda lo acumulado. El módulo csv se encarga de
+    escapar comillas/comas de la descripción.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator="\n")
+
+    def vaciar():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(["fecha_hora", "mecanico", "cliente", "moto", "descripcion", "orden_id"])
+    yield vaciar()
+
+    pendientes = 0
+    for r in query.yield_per(chunk):
+        # una línea por reporte, como antes
+        desc_txt = (r.descripcion or "").replace("\n", " ").replace("\r", " ").strip()
+        writer.writerow([
+            r.creado_en.isoformat() if r.creado_en else "",
+            r.mecanico_nombre or "",
+            r.cliente_nombre or "",
+            r.moto_placa or r.moto_vin or "",
+            desc_txt,
+            r.orden_id,
+        ])
+        pendientes += 1
+        if pendientes >= chunk:
+            yield vaciar()
+            pendientes = 0
+
+    if pendientes:
+        yield vaciar()
+
+
 @reportes_trabajo_bp.route('/export', methods=['GET'])
 @jwt_required()
 @role_required("mecanico", "gerente", "encargado")
+@statement_timeout('REPORTES_STATEMENT_TIMEOUT_MS')
 def exportar_reportes_csv():
     """
-    Descarga CSV de reportes técnicos.
+    Descarga CSV de reportes técnicos (se manda en streaming).
     Opcional:
     ?mecanico_id=7   -> solo ese mecánico
+    ?orden_id=123    -> solo esa orden
+    ?desde=2025-01-01&hasta=2025-12-31 -> rango sobre creado_en
     Si no se manda mecanico_id -> todos.
 
     Reglas:
@@ -174,6 +238,13 @@ def exportar_reportes_csv():
     """
 
     mecanico_id = request.args.get("mecanico_id", type=int)
+    orden_id = request.args.get("orden_id", type=int)
+
+    try:
+        desde = _parse_fecha(request.args.get("desde"))
+        hasta = _parse_fecha(request.args.get("hasta"), hasta=True)
+    except ValueError:
+        return jsonify({"error": "Fechas inválidas, usa formato ISO (YYYY-MM-DD)"}), 400
 
     usuario, empleado_id, rol = _get_current_user_and_employee()
     if not usuario:
@@ -191,26 +262,19 @@ def exportar_reportes_csv():
         if mecanico_id:
             q = q.filter(ReporteTrabajo.mecanico_id == mecanico_id)
 
-    q = q.order_by(ReporteTrabajo.creado_en.asc()).all()
-
-    # armamos CSV manual
-    rows = [
-        "fecha_hora,mecanico,cliente,moto,descripcion,orden_id"
-    ]
-    for r in q:
-        fecha_str = r.creado_en.isoformat() if r.creado_en else ""
-        moto_txt = r.moto_placa or r.moto_vin or ""
-        desc_txt = (r.descripcion or "").replace("\n", " ").replace("\r", " ").strip()
+    if orden_id:
+        q = q.filter(ReporteTrabajo.orden_id == orden_id)
+    if desde:
+        q = q.filter(ReporteTrabajo.creado_en >= desde)
+    if hasta:
+        q = q.filter(ReporteTrabajo.creado_en < hasta)
 
-        line = f'"{fecha_str}","{r.mecanico_nombre or ""}","{r.cliente_nombre or ""}","{moto_txt}","{desc_txt}","{r.orden_id}"'
-        rows.append(line)
-
-    csv_data = "\n".join(rows)
+    q = q.order_by(ReporteTrabajo.creado_en.asc(), ReporteTrabajo.id.asc())
 
     return Response(
-        csv_data,
+        stream_with_context(_csv_reportes(q)),
         mimetype='text/csv',
         headers={
             "Content-Disposition": "attachment; filename=reportes_trabajo.csv"
         }
-    )
\ No newline at end of file
+    )
@@ -2,12 +2,14 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from core.extensions import db
 from core.auth import role_required
+from core.etag import con_etag
 from models.catalogos import Rol
 
 roles_bp = Blueprint('roles', __name__, url_prefix='/api/roles')
 
 @roles_bp.route('', methods=['GET'])
 @jwt_required()
+@con_etag(Rol)
 def get_roles():
     roles = Rol.query.order_by(Rol.nombre).all()
     return jsonify([r.to_dict() for r in roles]), 200
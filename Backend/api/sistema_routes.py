@@ -0,0 +1,21 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from core.extensions import db
+from core.auth import role_required
+from core.conexiones import estadisticas_pool
+
+sistema_bp = Blueprint('sistema', __name__, url_prefix='/api/sistema')
+
+
+@sistema_bp.route('/pool', methods=['GET'])
+@jwt_required()
+@role_required("gerente")
+def pool_conexiones():
+    """
+    Estado del pool de conexiones de ESTE proceso: conexiones en uso/libres,
+    overflow, cuántos checkouts tuvieron que esperar (histograma) y cuántos
+    se vencieron por pool lleno.
+    """
+    data = estadisticas_pool.resumen(db.engine.pool)
+    data["estado"] = db.engine.pool.status()
+    return jsonify(data), 200
@@ -2,8 +2,10 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from core.extensions import db
 from core.auth import role_required
+from core.paginacion import paginar_respuesta
+from core import perfiles_carga
 from models.personas import Usuario, Empleado
-from models.catalogos import Rol
+from core.catalogo import catalogo
 from sqlalchemy.exc import IntegrityError
 
 usuarios_bp = Blueprint("usuarios", __name__, url_prefix="/api/usuarios")
@@ -15,7 +17,7 @@ def usuario_public_dict(u: Usuario):
         "id": u.id,
         "usuario": u.usuario,
         "correo": u.correo,
-        "rol": u.rol.nombre if u.rol else None,
+        "rol": (u.rol_dict() or {}).get("nombre"),
         "empleado": u.empleado.to_dict() if u.empleado else None,
         "creado_en": u.creado_en.isoformat() if u.creado_en else None,
         "actualizado_en": u.actualizado_en.isoformat() if u.actualizado_en else None,
@@ -29,16 +31,15 @@ def listar_usuarios():
     """
     Lista usuarios existentes.
     Solo gerente puede ver esto por ahora.
-    En el futuro si quieres, metemos paginación / búsqueda.
+    Acepta ?limit / ?cursor para paginar (ver core.paginacion).
     """
-    usuarios = (
+    query = (
         Usuario.query
-        .outerjoin(Rol, Usuario.rol_id == Rol.id)
         .outerjoin(Empleado, Usuario.empleado_id == Empleado.id)
-        .all()
+        .options(*perfiles_carga.usuario_listado())
     )
 
-    return jsonify([usuario_public_dict(u) for u in usuarios]), 200
+    return paginar_respuesta(query, [Usuario.usuario, Usuario.id], usuario_public_dict)
 
 
 @usuarios_bp.post("")
@@ -83,7 +84,7 @@ def crear_usuario():
         return jsonify({"error": "El campo 'rol' es requerido"}), 400
 
     # Buscar rol
-    rol_obj = Rol.query.filter(Rol.nombre == rol_nombre).first()
+    rol_obj = catalogo.rol_por_nombre(rol_nombre)
     if not rol_obj:
         return jsonify({"error": f"El rol '{rol_nombre}' no existe"}), 400
 
@@ -112,7 +113,7 @@ def crear_usuario():
     nuevo = Usuario(
         usuario=usuario_login,
         correo=correo,
-        rol_id=rol_obj.id,
+        rol_id=rol_obj["id"],
         empleado_id=empleado_row.id if empleado_row else None
     )
     nuevo.set_password(contrasena)
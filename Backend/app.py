@@ -1,6 +1,19 @@
+import os
+import subprocess
+import sys
+import time
+
+import click
 from flask import Flask, jsonify
+from flask.cli import with_appcontext
 from core.config import Config
 from core.extensions import db, migrate, jwt, cors
+from core.busqueda import instalar_indices_busqueda
+from core.replicas import CABECERA_ESCRITURA, instalar_replica
+from core.estadisticas import estadisticas_cli, inicializar_carga, inicializar_estadisticas
+from core.email_outbox import correos_cli
+from core.passwords import auth_cli
+from core.importacion import importar_cli
 from api.auth_routes import auth_bp
 from api.roles_routes import roles_bp
 from api.marcas_routes import marcas_bp
@@ -8,12 +21,15 @@ from api.modelos_routes import modelos_bp
 from api.clientes_routes import clientes_bp
 from api.motos_routes import motos_bp
 from api.ordenes_routes import ordenes_bp
-from api.reportes_routes import reportes_bp
+from api.reportes_routes import reportes_bp, reportes_cli
 from api.usuarios_routes import usuarios_bp
 from api.reportes_trabajo_routes import reportes_trabajo_bp
 from api.mecanicos_routes import mecanicos_bp
 from api.dashboard_routes import dashboard_bp
 from api.herramientas_routes import herramientas_bp
+from api.sistema_routes import sistema_bp
+from api.pagos_routes import pagos_bp
+from api.analytics_routes import analytics_bp
 
 def create_app():
     app = Flask(__name__)
@@ -22,10 +38,12 @@ def create_app():
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    instalar_replica(app)
     cors.init_app(app, 
                 origins=app.config['CORS_ORIGINS'],
                 supports_credentials=True,
-                allow_headers=["Content-Type", "Authorization"],
+                allow_headers=["Content-Type", "Authorization", CABECERA_ESCRITURA],
+                expose_headers=[CABECERA_ESCRITURA],
                 methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
     
     app.register_blueprint(auth_bp)
@@ -41,6 +59,15 @@ def create_app():
     app.register_blueprint(mecanicos_bp)
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(herramientas_bp)
+    app.register_blueprint(sistema_bp)
+    app.register_blueprint(pagos_bp)
+    app.register_blueprint(analytics_bp)
+
+    app.cli.add_command(estadisticas_cli)
+    app.cli.add_command(correos_cli)
+    app.cli.add_command(reportes_cli)
+    app.cli.add_command(auth_cli)
+    app.cli.add_command(importar_cli)
     
     @app.route('/')
     def index():
@@ -69,22 +96,95 @@ def create_app():
     def internal_error(error):
         return jsonify({"error": "Error interno del servidor"}), 500
     
-    with app.app_context():
-        db.create_all()
-        seed_initial_data()
+    app.cli.add_command(moteka_cli)
     
+    # ojo: create_app ya NO crea tablas ni hace seed (cada worker de gunicorn
+    # pasa por acá); eso va en `flask --app app moteka init`
     return app
 
 
+def inicializar_base():
+    """Tablas, índices de búsqueda y datos iniciales. Idempotente."""
+    db.create_all()
+    crear_indices_faltantes()
+    rellenar_columnas_keyset()
+    instalar_indices_busqueda()
+    inicializar_estadisticas()
+    inicializar_carga()
+    seed_initial_data()
+
+
+def crear_indices_faltantes():
+    """
+    create_all no toca tablas que ya existen: los índices que se agregan a
+    un modelo después (ej. pagos.pagado_en) se crean acá. Devuelve cuántos creó.
+    """
+    from sqlalchemy import inspect
+
+    inspector = inspect(db.engine)
+    creados = 0
+    for tabla in db.metadata.sorted_tables:
+        if not inspector.has_table(tabla.name):
+            continue
+        existentes = {i['name'] for i in inspector.get_indexes(tabla.name)}
+        for indice in tabla.indexes:
+            if indice.name not in existentes:
+                indice.create(bind=db.engine)
+                creados += 1
+                print(f"✓ Índice {indice.name} creado")
+    return creados
+
+
+def rellenar_columnas_keyset():
+    """
+    Las columnas por las que pagina el keyset (core/paginacion.py) pasaron a
+    NOT NULL, pero create_all no cambia tablas existentes: si quedó algún NULL
+    de antes se rellena acá y en Postgres además se agrega la restricción.
+    Devuelve cuántas filas rellenó.
+    """
+    from datetime import datetime
+    from sqlalchemy import func, inspect, text
+    from models.ordenes import OrdenTrabajo, Pago
+    from models.vehiculos import Motocicleta
+
+    ahora = datetime.utcnow()
+    columnas = [
+        (OrdenTrabajo.fecha_ingreso, func.coalesce(OrdenTrabajo.creado_en, ahora)),
+        (Motocicleta.creado_en, func.coalesce(Motocicleta.actualizado_en, ahora)),
+        (Pago.pagado_en, ahora),
+    ]
+
+    inspector = inspect(db.engine)
+    rellenadas = 0
+    for col, valor in columnas:
+        tabla = col.class_.__table__
+        if not inspector.has_table(tabla.name):
+            continue
+        res = db.session.execute(
+            tabla.update().where(col.is_(None)).values({col.key: valor})
+        )
+        rellenadas += res.rowcount
+        if res.rowcount:
+            print(f"✓ {res.rowcount} filas de {tabla.name}.{col.key} sin valor rellenadas")
+        if db.engine.dialect.name == 'postgresql':
+            # SET NOT NULL es idempotente
+            db.session.execute(text(
+                f'ALTER TABLE {tabla.name} ALTER COLUMN {col.key} SET NOT NULL'
+            ))
+    db.session.commit()
+    return rellenadas
+
+
 def seed_initial_data():
     """Crea roles iniciales y usuario admin si no existen"""
+    from core.catalogo import catalogo
     from models.catalogos import Rol
     from models.personas import Usuario
     
     roles_nombres = ['gerente', 'encargado', 'mecanico']
     
     for rol_nombre in roles_nombres:
-        if not Rol.query.filter_by(nombre=rol_nombre).first():
+        if not catalogo.rol_por_nombre(rol_nombre):
             rol = Rol(nombre=rol_nombre)
             db.session.add(rol)
             print(f"✓ Rol '{rol_nombre}' creado")
@@ -93,12 +193,12 @@ def seed_initial_data():
     
     if Usuario.query.count() == 0:
         from core.config import Config
-        rol_gerente = Rol.query.filter_by(nombre='gerente').first()
+        rol_gerente = catalogo.rol_por_nombre('gerente')
         if rol_gerente:
             admin = Usuario(
                 usuario='admin',
                 correo='admin@moteka.com',
-                rol_id=rol_gerente.id
+                rol_id=rol_gerente['id']
             )
             admin.set_password(Config.SEED_ADMIN_PASS)
             db.session.add(admin)
@@ -106,6 +206,232 @@ def seed_initial_data():
             print(f"✓ Usuario admin creado (contraseña: {Config.SEED_ADMIN_PASS})")
 
 
+# módulos que NO deberían cargarse al arrancar (son de los exports)
+IMPORTS_PESADOS = ('openpyxl', 'reportlab.pdfgen', 'pypdf')
+
+
+@click.group('moteka')
+def moteka_cli():
+    """Instalación y chequeos de la app."""
+
+
+@moteka_cli.command('init')
+@with_appcontext
+def init_cmd():
+    """Crea tablas/índices y los datos iniciales (roles + admin)."""
+    inicializar_base()
+    click.echo("✓ Base lista")
+
+
+@moteka_cli.command('importtime')
+@click.option('--presupuesto-ms', default=1500, show_default=True, help='Tope para `import app`.')
+@click.option('--top', default=10, show_default=True, help='Módulos más pesados a mostrar.')
+def importtime_cmd(presupuesto_ms, top):
+    """
+    Mide `python -X importtime -c "import app"` en un proceso limpio y falla
+    (exit 1) si se pasa del presupuesto o si al arrancar se cargan los
+    módulos de export (IMPORTS_PESADOS).
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise click.ClickException(proc.stderr.strip().splitlines()[-1])
+
+    # líneas: "import time: self [us] | cumulative | imported package"
+    tiempos = []
+    for linea in proc.stderr.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        partes = linea.split(':', 1)[1].split('|')
+        propio, acumulado, nombre = int(partes[0]), int(partes[1]), partes[2].strip()
+        tiempos.append((propio, acumulado, nombre))
+
+    total_ms = next(ac for _, ac, nombre in tiempos if nombre == 'app') / 1000
+    pesados = sorted({n for _, _, n in tiempos for p in IMPORTS_PESADOS if n == p or n.startswith(p + '.')})
+
+    click.echo(f"import app: {total_ms:.0f} ms (presupuesto {presupuesto_ms} ms)")
+    for propio, acumulado, nombre in sorted(tiempos, reverse=True)[:top]:
+        click.echo(f"  {propio / 1000:7.1f} ms  {nombre}")
+
+    errores = []
+    if total_ms > presupuesto_ms:
+        errores.append(f"se pasó del presupuesto por {total_ms - presupuesto_ms:.0f} ms")
+    if pesados:
+        errores.append("se importan al arrancar: " + ", ".join(pesados))
+    if errores:
+        raise click.ClickException("; ".join(errores))
+
+
+
+@moteka_cli.command('planes')
+@click.option('--min-filas', default=10000, show_default=True,
+              help='Solo se consideran grandes las tablas con al menos estas filas.')
+@click.option('--mostrar', is_flag=True, help='Imprime el SQL y el plan de cada consulta.')
+@with_appcontext
+def planes_cmd(min_filas, mostrar):
+    """
+    Corre los listados más usados (órdenes, dashboard_hoy, reportes de una
+    orden, dataset del export) contra la base configurada y hace EXPLAIN de
+    cada SELECT. Falla (exit 1) si alguno recorre entera una tabla grande.
+    """
+    from flask import current_app
+    from core import planes
+    from core.bench import token_de_rol
+
+    token = token_de_rol('gerente')
+    if not token:
+        raise click.ClickException("Hace falta un usuario gerente (flask --app app moteka init)")
+
+    try:
+        resultados, grandes = planes.revisar(current_app, token, min_filas)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    if not grandes:
+        click.echo(f"⚠ Ninguna tabla llega a {min_filas} filas: cargue más datos para que el chequeo sirva")
+    else:
+        click.echo("Tablas grandes: " + ", ".join(f"{t} ({n})" for t, n in grandes.items()))
+
+    fallas = 0
+    for nombre, sql, recorridas, plan in resultados:
+        if recorridas:
+            fallas += 1
+            click.echo(f"✗ {nombre}: recorre entera {', '.join(recorridas)}")
+        elif mostrar:
+            click.echo(f"✓ {nombre}")
+        if mostrar or recorridas:
+            sql = " ".join(sql.split())
+            click.echo("    " + (sql if len(sql) <= 400 else sql[:400] + " …"))
+            click.echo("    " + plan.replace("\n", "\n    "))
+
+    click.echo(f"{len(resultados)} consultas revisadas, {fallas} con recorridos completos")
+    if fallas:
+        raise click.ClickException("hay consultas que no usan índice")
+
+
+@moteka_cli.command('queries')
+@with_appcontext
+def queries_cmd():
+    """
+    Chequeo de N+1: cuenta las queries de cada listado con 1 fila y con una
+    página llena, y las del dataset del export con 1 orden y con varios
+    lotes. Falla (exit 1) si crecen con las filas.
+    """
+    from core import bench
+
+    try:
+        resultados = bench.revisar_queries() + bench.revisar_queries_export()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    fallas = 0
+    for nombre, (chica, grande), (q_chica, q_grande), error in resultados:
+        if error:
+            fallas += 1
+            click.echo(f"✗ {nombre}: {error}")
+        elif grande <= chica:
+            click.echo(f"⚠ {nombre}: {q_chica} queries, pero con {grande} fila(s) no se puede comparar (genere datos con `moteka generar`)")
+        else:
+            click.echo(f"✓ {nombre}: {q_chica} queries con {chica} y {q_grande} con {grande} filas")
+    if fallas:
+        raise click.ClickException(f"{fallas} listados hacen más queries con más filas")
+
+
+@moteka_cli.command('generar')
+@click.option('--ordenes', default=10000, show_default=True, help='Órdenes a generar (10 mil a 5 millones).')
+@click.option('--clientes', type=int, default=None, help='Clientes (por defecto ordenes / 4).')
+@click.option('--mecanicos', default=8, show_default=True, help='Mecánicos mínimos (se crean los que falten).')
+@click.option('--anios', default=3, show_default=True, help='Años hacia atrás en que se reparten las órdenes.')
+@click.option('--semilla', default=1, show_default=True, help='Misma semilla = mismos datos.')
+@click.option('--lote', default=5000, show_default=True, help='Filas por INSERT/commit.')
+@with_appcontext
+def generar_cmd(ordenes, clientes, mecanicos, anios, semilla, lote):
+    """
+    Llena la base con datos sintéticos (clientes, motos, órdenes con
+    historial, pagos y reportes) para probar a escala. NO usar en producción.
+    """
+    from core import sinteticos
+
+    if ordenes < 1:
+        raise click.ClickException("--ordenes tiene que ser mayor a 0")
+
+    def progreso(tabla, hechas, total):
+        click.echo(f"\r  {tabla}: {hechas}/{total}", nl=hechas >= total)
+
+    inicio = time.perf_counter()
+    try:
+        totales = sinteticos.generar(
+            ordenes, anios=anios, clientes=clientes, mecanicos=mecanicos,
+            semilla=semilla, lote=lote, progreso=progreso,
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    click.echo(f"✓ Datos generados en {time.perf_counter() - inicio:.0f} s")
+    for tabla, filas in totales.items():
+        click.echo(f"  {tabla}: {filas}")
+    click.echo(f"  (usuarios mecanicoN, contraseña '{sinteticos.CONTRASENA_MECANICOS}')")
+
+
+@moteka_cli.command('bench')
+@click.option('--repeticiones', default=20, show_default=True, help='Pedidos medidos por escenario.')
+@click.option('--solo', default=None, help='Solo escenarios cuyo nombre contenga esto.')
+@click.option('--escrituras', is_flag=True, help='Incluye POST/PATCH (modifica la base).')
+@click.option('--con-cache', is_flag=True, help='Deja prendidos los cachés de dashboards/analytics.')
+@click.option('--baseline', type=click.Path(dir_okay=False), default=None,
+              help='Línea base JSON contra la que comparar.')
+@click.option('--guardar', type=click.Path(dir_okay=False), default=None,
+              help='Guarda el resultado como nueva línea base.')
+@click.option('--tolerancia', default=0.25, show_default=True, help='Crecimiento aceptado de p95 y memoria.')
+@with_appcontext
+def bench_cmd(repeticiones, solo, escrituras, con_cache, baseline, guardar, tolerancia):
+    """
+    Mide p50/p95, queries y pico de memoria de cada endpoint con el test
+    client. Con --baseline falla (exit 1) si algo empeoró.
+    """
+    from core import bench
+
+    click.echo(f"{'escenario':<32} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'mem KB':>9}")
+
+    def progreso(nombre, r):
+        click.echo(
+            f"{nombre:<32} {r['status']:>6} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+            f"{r['queries']:>8} {r['memoria_kb']:>9.1f}"
+        )
+
+    try:
+        resultado = bench.correr(
+            repeticiones=max(1, repeticiones), escrituras=escrituras,
+            con_cache=con_cache, filtro=solo, progreso=progreso,
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    meta = resultado["meta"]
+    click.echo(f"{len(resultado['escenarios'])} escenarios, {meta['motor']}, {meta['ordenes']} órdenes")
+
+    if guardar:
+        bench.guardar_base(resultado, guardar)
+        click.echo(f"✓ Línea base guardada en {guardar}")
+
+    if baseline:
+        base = bench.leer_base(baseline)
+        if base.get("meta", {}).get("ordenes") != meta["ordenes"]:
+            click.echo(f"⚠ La línea base se tomó con {base.get('meta', {}).get('ordenes')} órdenes")
+        regresiones = bench.comparar(resultado, base, tolerancia)
+        for r in regresiones:
+            click.echo(f"✗ {r}")
+        if regresiones:
+            raise click.ClickException(f"{len(regresiones)} regresiones contra {baseline}")
+        click.echo(f"✓ Sin regresiones contra {baseline}")
+
+
 if __name__ == '__main__':
     app = create_app()
+    # servidor de desarrollo: de paso deja la base lista
+    with app.app_context():
+        inicializar_base()
     app.run(host='0.0.0.0', port=5000, debug=True)
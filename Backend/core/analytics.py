@@ -0,0 +1,198 @@
+"""
+Estadísticas de gestión sobre ordenes_trabajo / estados_orden:
+tiempo de entrega, tiempo en cada estado y órdenes terminadas por mecánico
+por semana.
+
+Todo se resuelve en la base con pocas columnas (nada de armar objetos ORM):
+- las duraciones se calculan en SQL (resta de timestamps en segundos),
+- el tiempo en cada estado sale de LEAD() sobre el historial de la orden,
+- en PostgreSQL los percentiles también salen en SQL (percentile_cont),
+  en SQLite traemos una sola columna, la ordenamos en Python e
+  interpolamos igual que percentile_cont.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Float, cast, func, literal_column, select
+
+from core.extensions import db
+from models.ordenes import OrdenTrabajo, EstadoOrden, EstadoOrdenEnum
+
+PERCENTILES = (0.5, 0.9, 0.95)
+
+
+def _dialecto():
+    return db.session.get_bind().dialect.name
+
+
+def _segundos(fin, inicio):
+    """Expresión SQL: fin - inicio en segundos."""
+    if _dialecto() == 'postgresql':
+        return cast(func.extract('epoch', fin - inicio), Float)
+    return (func.julianday(fin) - func.julianday(inicio)) * 86400.0
+
+
+def _lunes(columna):
+    """Expresión SQL: lunes de la semana de `columna` (semana ISO)."""
+    if _dialecto() == 'postgresql':
+        # literal y no parámetro: si no, el GROUP BY no reconoce la expresión del SELECT
+        return func.date_trunc(literal_column("'week'"), columna)
+    # 'weekday 0' avanza al domingo (o se queda si ya es), -6 días = lunes
+    return func.date(columna, 'weekday 0', '-6 days')
+
+
+def _como_fecha(valor):
+    # SQLite devuelve date() como string 'YYYY-MM-DD'
+    if isinstance(valor, str):
+        return date.fromisoformat(valor[:10])
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+def _percentil(ordenados, p):
+    """Interpolación lineal, igual que percentile_cont. `ordenados` no vacío."""
+    pos = (len(ordenados) - 1) * p
+    i = int(pos)
+    if i + 1 >= len(ordenados):
+        return ordenados[-1]
+    return ordenados[i] + (ordenados[i + 1] - ordenados[i]) * (pos - i)
+
+
+def _horas(segundos):
+    return round(segundos / 3600.0, 2) if segundos is not None else None
+
+
+def _resumen(cantidad, promedio, minimo, maximo, percentiles):
+    return {
+        "cantidad": cantidad,
+        "promedio_horas": _horas(promedio),
+        "min_horas": _horas(minimo),
+        "max_horas": _horas(maximo),
+        **{f"p{int(p * 100)}_horas": _horas(v) for p, v in zip(PERCENTILES, percentiles)},
+    }
+
+
+def _resumen_vacio():
+    return _resumen(0, None, None, None, [None] * len(PERCENTILES))
+
+
+def _resumir_por_grupo(segundos, grupo, filtros):
+    """
+    {grupo: resumen} de la expresión `segundos`, agrupada por `grupo`
+    (None = un solo grupo) y filtrada por `filtros`.
+    """
+    grupos = [grupo] if grupo is not None else []
+
+    if _dialecto() == 'postgresql':
+        stmt = select(
+            *grupos,
+            func.count(), func.avg(segundos), func.min(segundos), func.max(segundos),
+            *[func.percentile_cont(p).within_group(segundos) for p in PERCENTILES],
+        ).where(*filtros)
+        if grupos:
+            stmt = stmt.group_by(*grupos)
+
+        resultado = {}
+        for fila in db.session.execute(stmt):
+            clave = fila[0] if grupos else None
+            cantidad, promedio, minimo, maximo, *pcts = fila[len(grupos):]
+            if cantidad:
+                resultado[clave] = _resumen(
+                    cantidad, float(promedio), float(minimo), float(maximo), [float(v) for v in pcts]
+                )
+        return resultado
+
+    # SQLite: traemos (grupo, valor) sin ORDER BY (ordenar en Python es
+    # bastante más rápido que el sort de SQLite) e interpolamos acá
+    valores_por_grupo = defaultdict(list)
+    for fila in db.session.execute(select(*grupos, segundos).where(*filtros)):
+        valores_por_grupo[fila[0] if grupos else None].append(fila[-1])
+
+    resultado = {}
+    for clave, valores in valores_por_grupo.items():
+        valores.sort()
+        resultado[clave] = _resumen(
+            len(valores), sum(valores) / len(valores), valores[0], valores[-1],
+            [_percentil(valores, p) for p in PERCENTILES],
+        )
+    return resultado
+
+
+def _rango(desde, hasta):
+    """(inicio, fin) datetimes, hasta inclusive."""
+    return (
+        datetime.combine(desde, datetime.min.time()),
+        datetime.combine(hasta + timedelta(days=1), datetime.min.time()),
+    )
+
+
+def tiempo_entrega(desde, hasta, mecanico_id=None):
+    """
+    fecha_salida - fecha_ingreso de las órdenes FINALIZADAS con salida en
+    el rango (las canceladas no cuentan como entrega).
+    """
+    inicio, fin = _rango(desde, hasta)
+    filtros = [
+        OrdenTrabajo.estado == EstadoOrdenEnum.FINALIZADA,
+        OrdenTrabajo.fecha_salida >= inicio,
+        OrdenTrabajo.fecha_salida < fin,
+        OrdenTrabajo.fecha_ingreso.isnot(None),
+    ]
+    if mecanico_id:
+        filtros.append(OrdenTrabajo.mecanico_asignado_id == mecanico_id)
+
+    segundos = _segundos(OrdenTrabajo.fecha_salida, OrdenTrabajo.fecha_ingreso)
+    return _resumir_por_grupo(segundos, None, filtros).get(None) or _resumen_vacio()
+
+
+def tiempo_por_estado(desde, hasta):
+    """
+    Cuánto estuvieron las órdenes en cada estado, para los tramos que
+    EMPEZARON en el rango. Un tramo va de un registro de estados_orden al
+    siguiente de la misma orden; el último (FINALIZADA / CANCELADA o un
+    estado todavía abierto) no tiene fin y no cuenta.
+    """
+    inicio, fin = _rango(desde, hasta)
+
+    # LEAD solo mira hacia adelante: se puede recortar el inicio antes de
+    # la ventana, el fin no (el siguiente registro puede caer después)
+    tramos = (
+        select(
+            EstadoOrden.estado,
+            EstadoOrden.creado_en.label('desde'),
+            func.lead(EstadoOrden.creado_en).over(
+                partition_by=EstadoOrden.orden_id,
+                order_by=(EstadoOrden.creado_en, EstadoOrden.id),
+            ).label('hasta'),
+        )
+        .where(EstadoOrden.creado_en >= inicio)
+        .subquery()
+    )
+    por_estado = _resumir_por_grupo(
+        _segundos(tramos.c.hasta, tramos.c.desde),
+        tramos.c.estado,
+        [tramos.c.hasta.isnot(None), tramos.c.desde < fin],
+    )
+    return {
+        estado.value: por_estado.get(estado) or _resumen_vacio()
+        for estado in EstadoOrdenEnum
+        if estado not in (EstadoOrdenEnum.FINALIZADA, EstadoOrdenEnum.CANCELADA)
+    }
+
+
+def finalizadas_por_semana(desde, hasta):
+    """
+    [(lunes, mecanico_id, cantidad)] de órdenes FINALIZADAS por semana de
+    fecha_salida. mecanico_id None = sin asignar.
+    """
+    inicio, fin = _rango(desde, hasta)
+    semana = _lunes(OrdenTrabajo.fecha_salida)
+    stmt = (
+        select(semana, OrdenTrabajo.mecanico_asignado_id, func.count())
+        .where(
+            OrdenTrabajo.estado == EstadoOrdenEnum.FINALIZADA,
+            OrdenTrabajo.fecha_salida >= inicio,
+            OrdenTrabajo.fecha_salida < fin,
+        )
+        .group_by(semana, OrdenTrabajo.mecanico_asignado_id)
+    )
+    return [(_como_fecha(lunes), mecanico_id, cantidad) for lunes, mecanico_id, cantidad in db.session.execute(stmt)]
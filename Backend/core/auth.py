@@ -1,24 +1,144 @@
+import threading
+import time
+import zlib
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt
+
+from flask import jsonify, g, current_app
+from flask_jwt_extended import create_access_token, verify_jwt_in_request, get_jwt
+
+from core.extensions import db
+from core.eventos import al_confirmar
+from models.catalogos import Rol
 from models.personas import Usuario
 
+
+def version_permisos(rol_id, empleado_id):
+    """
+    Versión de permisos que va en el token ('pv'). Sale de rol_id y
+    empleado_id, así cambia sola cuando cambia alguno de los dos y un token
+    viejo deja de valer sin guardar nada extra en la tabla.
+    """
+    return zlib.crc32(f"{rol_id}:{empleado_id or 0}".encode())
+
+
+def claims_usuario(usuario):
+    """Lo que va en claims['user'] al hacer login."""
+    return {
+        'id': usuario.id,
+        'usuario': usuario.usuario,
+        'rol': (usuario.rol_dict() or {}).get('nombre'),
+        'rol_id': usuario.rol_id,
+        'empleado_id': usuario.empleado_id,
+        'pv': version_permisos(usuario.rol_id, usuario.empleado_id),
+    }
+
+
+def emitir_token(usuario):
+    """Access token con claims['user'] (lo que devuelve el login)."""
+    return create_access_token(identity=str(usuario.id), additional_claims={"user": claims_usuario(usuario)})
+
+
+class Identidad:
+    """Usuario del request actual, armado una sola vez (ver identidad_actual)."""
+    __slots__ = ('id', 'usuario', 'rol', 'rol_id', 'empleado_id')
+
+    def __init__(self, id, usuario, rol, rol_id, empleado_id):
+        self.id = id
+        self.usuario = usuario
+        self.rol = rol
+        self.rol_id = rol_id
+        self.empleado_id = empleado_id
+
+
+class _CacheUsuarios:
+    """
+    user_id -> Identidad vigente en la base, por proceso y con TTL
+    (AUTH_CACHE_TTL). Se vacía cuando un commit toca usuarios o roles; los
+    otros procesos se enteran al vencer el TTL.
+    """
+
+    def __init__(self):
+        self._datos = {}   # user_id -> (expira_en, Identidad | None)
+        self._lock = threading.Lock()
+        al_confirmar('usuarios', 'roles')(self._al_confirmar)
+
+    def _al_confirmar(self, _tocadas):
+        self.invalidar()
+
+    def invalidar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def obtener(self, user_id):
+        item = self._datos.get(user_id)
+        if item and item[0] > time.monotonic():
+            return item[1]
+
+        fila = (
+            db.session.query(Usuario.id, Usuario.usuario, Rol.nombre, Usuario.rol_id, Usuario.empleado_id)
+            .outerjoin(Rol, Rol.id == Usuario.rol_id)
+            .filter(Usuario.id == user_id)
+            .first()
+        )
+        ident = Identidad(*fila) if fila else None
+
+        ttl = current_app.config.get('AUTH_CACHE_TTL', 60)
+        with self._lock:
+            self._datos[user_id] = (time.monotonic() + ttl, ident)
+        return ident
+
+
+usuarios_cache = _CacheUsuarios()
+
+
+def _resolver_identidad():
+    data_user = get_jwt().get('user') or {}
+    user_id = data_user.get('id')
+    if not user_id:
+        return None
+
+    ident = usuarios_cache.obtener(user_id)
+    if not ident:
+        # el usuario se borró después de emitir el token
+        return None
+
+    pv = data_user.get('pv')
+    if pv is not None and pv != version_permisos(ident.rol_id, ident.empleado_id):
+        # le cambiaron el rol o el empleado: tiene que volver a iniciar sesión
+        return None
+
+    return ident
+
+
+def identidad_actual():
+    """
+    Identidad del usuario autenticado, resuelta una vez por request (queda
+    en flask.g). Devuelve None si el token no trae usuario, el usuario ya no
+    existe o sus permisos cambiaron desde el login.
+    """
+    if 'identidad' not in g:
+        g.identidad = _resolver_identidad()
+    return g.identidad
+
+
 def role_required(*allowed_roles):
     """Decorador para verificar roles de usuario"""
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
             verify_jwt_in_request()
-            claims = get_jwt()
-            user_data = claims.get('user')
-            
+            user_data = get_jwt().get('user')
+
             if not user_data or 'rol' not in user_data:
                 return jsonify({"error": "No se pudo verificar el rol del usuario"}), 403
-            
-            user_rol = user_data.get('rol')
-            if user_rol not in allowed_roles:
+
+            ident = identidad_actual()
+            if not ident:
+                return jsonify({"error": "Sesión desactualizada, vuelva a iniciar sesión"}), 401
+
+            if ident.rol not in allowed_roles:
                 return jsonify({"error": "No tiene permisos para realizar esta acción"}), 403
-            
+
             return fn(*args, **kwargs)
         return wrapper
     return decorator
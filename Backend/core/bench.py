@@ -0,0 +1,323 @@
+"""
+Benchmark de endpoints (`flask moteka bench`).
+
+Recorre todos los blueprints con el test client de Flask (sin red, mismo
+proceso) contra la base configurada y por cada escenario anota:
+- latencia p50 / p95 en ms sobre `repeticiones` pedidos,
+- queries por pedido (del último pedido, tiene que ser estable),
+- pico de memoria de Python del pedido (tracemalloc, en una pasada
+  aparte para no inflar las latencias).
+
+`revisar_queries` (`flask moteka queries`) es el chequeo de N+1: los
+listados tienen que hacer las mismas queries con 1 fila que con 500, y
+el dataset del export una query más por lote, no por orden.
+
+El resultado se puede guardar como línea base (JSON) y comparar contra
+ella: falla si un escenario hace más queries, o si su p95 o su memoria
+crecen más que la tolerancia. Conviene correrlo contra una base generada
+con `flask moteka generar` y siempre en la misma máquina.
+
+Por defecto solo hace GET (se puede repetir sobre la misma base). Con
+`escrituras=True` también crea órdenes, cambia estados y registra pagos.
+"""
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from itertools import islice
+
+from flask import current_app
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+
+from core.auth import emitir_token
+from core.catalogo import catalogo
+from core.extensions import db
+from core.paginacion import MAX_LIMIT
+from core.planes import muestra
+from models.ordenes import OrdenTrabajo
+from models.personas import Usuario
+
+# por debajo de esto una diferencia de p95 es ruido
+RUIDO_MS = 5.0
+
+# cachés de respuesta que se apagan por defecto para medir el trabajo real
+CACHES_CONFIG = ('DASHBOARD_CACHE_TTL', 'ANALYTICS_CACHE_TTL')
+
+
+def token_de_rol(nombre_rol):
+    """Token de algún usuario con ese rol (None si no hay)."""
+    rol = catalogo.rol_por_nombre(nombre_rol)
+    usuario = Usuario.query.filter_by(rol_id=rol['id']).first() if rol else None
+    return emitir_token(usuario) if usuario else None
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    pos = (len(ordenados) - 1) * p
+    i = int(pos)
+    if i + 1 >= len(ordenados):
+        return ordenados[-1]
+    return ordenados[i] + (ordenados[i + 1] - ordenados[i]) * (pos - i)
+
+
+def escenarios(m, escrituras=False):
+    """
+    [(nombre, método, url, body)] de todos los blueprints. `m` son ids
+    reales de core.planes.muestra(). Los GET de export usan un cliente para
+    no armar el archivo de toda la historia.
+    """
+    hoy = datetime.utcnow().date()
+    hace_30 = (hoy - timedelta(days=30)).isoformat()
+    hace_365 = (hoy - timedelta(days=365)).isoformat()
+
+    lista = [
+        ("index", "GET", "/", None),
+        ("auth.me", "GET", "/api/auth/me", None),
+        ("auth.hashing", "GET", "/api/auth/hashing", None),
+        ("roles", "GET", "/api/roles", None),
+        ("marcas", "GET", "/api/marcas", None),
+        ("modelos", "GET", "/api/modelos", None),
+        ("mecanicos", "GET", "/api/mecanicos", None),
+        ("herramientas", "GET", "/api/herramientas", None),
+        ("usuarios", "GET", "/api/usuarios", None),
+        ("clientes", "GET", "/api/clientes?limit=50", None),
+        ("clientes?q", "GET", "/api/clientes?q=garcia&limit=50", None),
+        ("motocicletas", "GET", "/api/motocicletas?limit=50", None),
+        ("motocicletas?cliente_id", "GET", f"/api/motocicletas?cliente_id={m['cliente_id']}", None),
+        ("ordenes", "GET", "/api/ordenes?limit=50", None),
+        ("ordenes?cliente_id", "GET", f"/api/ordenes?cliente_id={m['cliente_id']}&limit=50", None),
+        ("ordenes?mecanico_id", "GET", f"/api/ordenes?mecanico_id={m['mecanico_id']}&limit=50", None),
+        ("ordenes?estado&desde", "GET", f"/api/ordenes?estado=EN_ESPERA&desde={m['desde']}&limit=50", None),
+        ("ordenes.historial", "GET", f"/api/ordenes/{m['orden_id']}/historial", None),
+        ("ordenes.dashboard_hoy", "GET", "/api/ordenes/dashboard_hoy", None),
+        ("dashboard.resumen", "GET", "/api/dashboard/resumen", None),
+        ("reportes_trabajo?orden_id", "GET", f"/api/reportes_trabajo?orden_id={m['orden_id']}", None),
+        ("reportes_trabajo.export", "GET", f"/api/reportes_trabajo/export?orden_id={m['orden_id']}", None),
+        ("reportes.ordenes xlsx", "GET", f"/api/reportes/ordenes?formato=xlsx&cliente_id={m['cliente_id']}", None),
+        ("pagos", "GET", "/api/pagos?limit=50", None),
+        ("pagos?orden_id", "GET", f"/api/pagos?orden_id={m['orden_id']}", None),
+        ("pagos.cierre", "GET", "/api/pagos/cierre", None),
+        ("pagos.ingresos", "GET", f"/api/pagos/ingresos?desde={hace_365}&agrupar=mes", None),
+        ("analytics.tiempo_entrega", "GET", f"/api/analytics/tiempo-entrega?desde={hace_30}", None),
+        ("analytics.tiempo_por_estado", "GET", f"/api/analytics/tiempo-por-estado?desde={hace_30}", None),
+        ("analytics.finalizadas_semana", "GET", f"/api/analytics/finalizadas-por-semana?desde={hace_365}", None),
+        ("sistema.pool", "GET", "/api/sistema/pool", None),
+    ]
+    if escrituras:
+        lista += [
+            ("ordenes POST", "POST", "/api/ordenes",
+             {"cliente_id": m['cliente_id'], "motocicleta_id": m['motocicleta_id'], "mecanico_id": m['mecanico_id'] or None}),
+            ("ordenes PATCH estado", "PATCH", f"/api/ordenes/{m['orden_id']}/estado",
+             {"estado": "EN_REPARACION", "notas": "bench"}),
+            ("pagos POST", "POST", "/api/pagos",
+             {"orden_id": m['orden_id'], "tipo": "EFECTIVO", "monto": 10}),
+        ]
+    return lista
+
+
+class _ContadorQueries:
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, *args, **kwargs):
+        self.total += 1
+
+    def __enter__(self):
+        event.listen(Engine, 'before_cursor_execute', self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, 'before_cursor_execute', self)
+
+
+def correr(repeticiones=20, escrituras=False, con_cache=False, filtro=None, progreso=None):
+    """
+    Corre los escenarios y devuelve el resultado como dict (lo mismo que se
+    guarda en la línea base). Lanza ValueError si falta algo para correrlo.
+    """
+    m = muestra()
+    if m is None:
+        raise ValueError("No hay órdenes en la base: genere datos con `flask moteka generar`")
+    token = token_de_rol('gerente')
+    if not token:
+        raise ValueError("Hace falta un usuario gerente (flask --app app moteka init)")
+
+    app = current_app._get_current_object()
+    cache_antes = {k: app.config.get(k) for k in CACHES_CONFIG}
+    if not con_cache:
+        app.config.update({k: 0 for k in CACHES_CONFIG})
+
+    cliente = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+    progreso = progreso or (lambda *a: None)
+
+    def pedir(metodo, url, body):
+        resp = cliente.open(url, method=metodo, json=body, headers=headers)
+        resp.get_data()  # streaming: que se consuma dentro de la medición
+        return resp.status_code
+
+    resultados = {}
+    try:
+        for nombre, metodo, url, body in escenarios(m, escrituras):
+            if filtro and filtro not in nombre:
+                continue
+
+            pedir(metodo, url, body)  # calentar (catálogo, planes, imports perezosos)
+            tiempos = []
+            for _ in range(repeticiones):
+                with _ContadorQueries() as contador:
+                    inicio = time.perf_counter()
+                    status = pedir(metodo, url, body)
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+
+            tracemalloc.start()
+            try:
+                pedir(metodo, url, body)
+                pico = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+            resultados[nombre] = {
+                "url": f"{metodo} {url}",
+                "status": status,
+                "p50_ms": round(_percentil(tiempos, 0.5), 2),
+                "p95_ms": round(_percentil(tiempos, 0.95), 2),
+                "queries": contador.total,
+                "memoria_kb": round(pico / 1024, 1),
+            }
+            progreso(nombre, resultados[nombre])
+    finally:
+        app.config.update(cache_antes)
+        db.session.rollback()
+
+    return {
+        "meta": {
+            "fecha": datetime.utcnow().isoformat(timespec='seconds'),
+            "motor": db.engine.dialect.name,
+            "ordenes": db.session.execute(select(func.count()).select_from(OrdenTrabajo)).scalar(),
+            "repeticiones": repeticiones,
+            "con_cache": con_cache,
+        },
+        "escenarios": resultados,
+    }
+
+
+# listados paginados que tienen que salir en un número fijo de queries
+# (perfiles de carga, core.perfiles_carga) sin importar cuántas filas traen
+LISTADOS = (
+    ("ordenes", "/api/ordenes"),
+    ("ordenes?estado", "/api/ordenes?estado=FINALIZADA"),
+    ("clientes", "/api/clientes"),
+    ("motocicletas", "/api/motocicletas"),
+    ("usuarios", "/api/usuarios"),
+    ("pagos", "/api/pagos"),
+    ("modelos", "/api/modelos"),
+    ("herramientas", "/api/herramientas"),
+)
+
+
+def contar_queries(fn):
+    """(resultado de fn(), queries que emitió)."""
+    with _ContadorQueries() as contador:
+        resultado = fn()
+    return resultado, contador.total
+
+
+def revisar_queries(filas_grande=MAX_LIMIT):
+    """
+    Chequeo de N+1: cada listado se pide con ?limit=1 y con
+    ?limit=filas_grande y las dos páginas tienen que hacer las mismas
+    queries. Devuelve [(nombre, filas, queries, error | None)], donde
+    filas y queries son (chica, grande).
+    """
+    token = token_de_rol('gerente')
+    if not token:
+        raise ValueError("Hace falta un usuario gerente (flask --app app moteka init)")
+
+    cliente = current_app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def pagina(url, limite):
+        separador = '&' if '?' in url else '?'
+        resp = cliente.get(f"{url}{separador}limit={limite}", headers=headers)
+        if resp.status_code != 200:
+            raise ValueError(f"{url} respondió {resp.status_code}")
+        return len(resp.get_json()["items"])
+
+    resultados = []
+    try:
+        for nombre, url in LISTADOS:
+            pagina(url, 1)  # calentar catálogo / cachés de proceso
+            chica, q_chica = contar_queries(lambda: pagina(url, 1))
+            grande, q_grande = contar_queries(lambda: pagina(url, filas_grande))
+            error = None
+            if q_grande > q_chica:
+                error = f"{q_chica} queries con {chica} fila(s) y {q_grande} con {grande}"
+            resultados.append((nombre, (chica, grande), (q_chica, q_grande), error))
+    finally:
+        db.session.rollback()
+    return resultados
+
+
+def revisar_queries_export():
+    """
+    Lo mismo para el dataset del export (reportes_routes._armar_dataset):
+    con 1 orden y con un lote entero (DATASET_CHUNK) tienen que salir las
+    mismas queries, y cada lote de más suma una sola (los reportes de
+    trabajo de todo el lote). Devuelve [(nombre, ordenes, queries, error | None)].
+    """
+    from api.reportes_routes import DATASET_CHUNK, _armar_dataset
+
+    def consumir(cantidad):
+        filas = _armar_dataset()
+        try:
+            return sum(1 for _ in islice(filas, cantidad))
+        finally:
+            filas.close()
+
+    resultados = []
+    try:
+        consumir(1)  # calentar catálogo
+        una, q_una = contar_queries(lambda: consumir(1))
+        for lotes in (1, 3):
+            ordenes, queries = contar_queries(lambda: consumir(DATASET_CHUNK * lotes))
+            # lotes que se llegaron a leer (el último puede venir incompleto)
+            leidos = max(1, -(-ordenes // DATASET_CHUNK))
+            permitidas = q_una + leidos - 1
+            error = None
+            if queries > permitidas:
+                error = f"{q_una} queries con {una} orden(es) y {queries} con {ordenes} (esperaba {permitidas})"
+            resultados.append((f"export dataset x{lotes} lote(s)", (una, ordenes), (q_una, queries), error))
+    finally:
+        db.session.rollback()
+    return resultados
+
+
+def comparar(actual, base, tolerancia=0.25):
+    """[mensaje] de cada regresión de `actual` contra la línea base `base`."""
+    regresiones = []
+    for nombre, r in actual["escenarios"].items():
+        b = base.get("escenarios", {}).get(nombre)
+        if not b:
+            continue
+        if r["status"] != b["status"]:
+            regresiones.append(f"{nombre}: status {b['status']} -> {r['status']}")
+        if r["queries"] > b["queries"]:
+            regresiones.append(f"{nombre}: queries {b['queries']} -> {r['queries']}")
+        if r["p95_ms"] > b["p95_ms"] * (1 + tolerancia) and r["p95_ms"] - b["p95_ms"] > RUIDO_MS:
+            regresiones.append(f"{nombre}: p95 {b['p95_ms']} ms -> {r['p95_ms']} ms")
+        if r["memoria_kb"] > b["memoria_kb"] * (1 + tolerancia) and r["memoria_kb"] - b["memoria_kb"] > 64:
+            regresiones.append(f"{nombre}: memoria {b['memoria_kb']} KB -> {r['memoria_kb']} KB")
+    return regresiones
+
+
+def leer_base(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def guardar_base(resultado, ruta):
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
@@ -0,0 +1,247 @@
+"""
+Búsqueda por subcadena (los filtros tipo "contiene") para clientes y motos.
+
+- PostgreSQL: índices GIN con pg_trgm sobre moteka_norm(columna), donde
+  moteka_norm = lower(unaccent(x)). Los filtros se escriben como
+  moteka_norm(col) LIKE '%texto%' y así Postgres usa el índice en vez de
+  recorrer toda la tabla con ILIKE.
+- SQLite (local): registramos moteka_norm como función Python en cada
+  conexión y usamos un índice de trigramas en memoria para reducir los
+  candidatos a un IN (ids) antes del LIKE. Antes de reusarlo se compara
+  la versión de la tabla (core.etag.version_tablas), así también ve lo
+  que escriben otros procesos (flask importar, moteka generar, otros
+  workers).
+
+Si el índice de Postgres no está instalado (sin permisos para crear
+extensiones, por ejemplo) se cae al ILIKE de siempre.
+"""
+import sqlite3
+import threading
+import unicodedata
+from collections import defaultdict
+
+from flask import g, has_app_context
+from sqlalchemy import event, func, or_, select, text
+from sqlalchemy.engine import Engine
+
+from core.etag import version_tablas
+from core.extensions import db
+from core.eventos import al_confirmar
+from models.personas import Cliente
+from models.vehiculos import Motocicleta
+
+NGRAMA = 3
+
+# si un texto matchea más ids que esto, no vale la pena el IN (...)
+MAX_CANDIDATOS = 5000
+
+# columnas con índice de búsqueda: (tabla, columna)
+COLUMNAS_INDEXADAS = [
+    (Cliente.__tablename__, 'nombre'),
+    (Cliente.__tablename__, 'telefono'),
+    (Cliente.__tablename__, 'correo'),
+    (Motocicleta.__tablename__, 'placa'),
+    (Motocicleta.__tablename__, 'vin'),
+    (Motocicleta.__tablename__, 'color'),
+]
+
+_PG_DDL_BASE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() no es IMMUTABLE, por eso la envolvemos para poder indexarla
+    """
+    CREATE OR REPLACE FUNCTION moteka_norm(txt text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+    $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1)) $$
+    """,
+]
+
+# None = no sabemos todavía si el índice de Postgres existe
+_pg_disponible = None
+
+
+def normalizar(valor):
+    """Minúsculas y sin tildes, igual que moteka_norm en Postgres."""
+    if valor is None:
+        return None
+    descompuesto = unicodedata.normalize('NFKD', str(valor))
+    sin_tildes = ''.join(ch for ch in descompuesto if not unicodedata.combining(ch))
+    return sin_tildes.lower()
+
+
+def _ngramas(valor):
+    return {valor[i:i + NGRAMA] for i in range(len(valor) - NGRAMA + 1)}
+
+
+def _escapar_like(valor):
+    return valor.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+# --------------------------------------------------------------------
+# índice de trigramas en memoria (fallback para SQLite)
+# --------------------------------------------------------------------
+def _version(modelo):
+    """
+    version_tablas del modelo, una vez por request (las 3 columnas de
+    clientes comparten la misma query).
+    """
+    if not has_app_context():
+        return version_tablas(modelo)
+    versiones = g.setdefault('_versiones_busqueda', {})
+    if modelo not in versiones:
+        versiones[modelo] = version_tablas(modelo)
+    return versiones[modelo]
+
+
+class IndiceNgramas:
+    """
+    trigrama -> set(ids) para una columna. Se arma perezosamente la primera
+    vez que se busca y se descarta cuando se hace commit sobre la tabla o
+    cuando cambia la versión de la tabla (count + max(actualizado_en)), que
+    es como nos enteramos de lo que escribió otro proceso.
+    """
+
+    def __init__(self, columna):
+        self.columna = columna
+        self.tabla = columna.class_.__tablename__
+        self._postings = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def invalidar(self):
+        self._postings = None
+
+    def _construir(self):
+        modelo = self.columna.class_
+        postings = defaultdict(set)
+        filas = db.session.execute(
+            select(modelo.id, self.columna).where(self.columna.isnot(None))
+        )
+        for id_, valor in filas:
+            for ng in _ngramas(normalizar(valor)):
+                postings[ng].add(id_)
+        return postings
+
+    def candidatos(self, texto_norm):
+        """
+        Devuelve el set de ids que contienen todos los trigramas de texto_norm,
+        o None si el texto es muy corto para usar el índice.
+        """
+        ngramas = _ngramas(texto_norm)
+        if not ngramas:
+            return None
+
+        version = _version(self.columna.class_)
+        postings = self._postings
+        if postings is None or self._version != version:
+            with self._lock:
+                if self._postings is None or self._version != version:
+                    # la versión se leyó ANTES de armar: si alguien escribe
+                    # mientras tanto, la próxima búsqueda vuelve a armarlo
+                    self._postings = self._construir()
+                    self._version = version
+                postings = self._postings
+
+        resultado = None
+        # empezamos por el trigrama más raro para que la intersección sea corta
+        for ng in sorted(ngramas, key=lambda n: len(postings.get(n, ()))):
+            ids = postings.get(ng)
+            if not ids:
+                return set()
+            resultado = set(ids) if resultado is None else resultado & ids
+            if not resultado:
+                break
+        return resultado
+
+
+_indices_memoria = {}
+
+
+def _indice_memoria(columna):
+    clave = (columna.class_.__tablename__, columna.key)
+    indice = _indices_memoria.get(clave)
+    if indice is None:
+        indice = _indices_memoria.setdefault(clave, IndiceNgramas(columna))
+    return indice
+
+
+@al_confirmar(Cliente.__tablename__, Motocicleta.__tablename__)
+def _invalidar_indices(tocadas):
+    for (tabla, _col), indice in _indices_memoria.items():
+        if tabla in tocadas:
+            indice.invalidar()
+
+
+# --------------------------------------------------------------------
+# instalación de índices / función de normalización
+# --------------------------------------------------------------------
+@event.listens_for(Engine, 'connect')
+def _registrar_funcion_sqlite(dbapi_conn, _record):
+    """En SQLite, moteka_norm es una función Python registrada por conexión."""
+    if isinstance(dbapi_conn, sqlite3.Connection):
+        dbapi_conn.create_function('moteka_norm', 1, normalizar, deterministic=True)
+
+
+def instalar_indices_busqueda():
+    """
+    Crea (si no existen) las extensiones, la función moteka_norm y los
+    índices GIN de trigramas. Es idempotente. No hace nada fuera de Postgres.
+    """
+    global _pg_disponible
+
+    if db.engine.dialect.name != 'postgresql':
+        return
+
+    try:
+        with db.engine.begin() as conn:
+            for ddl in _PG_DDL_BASE:
+                conn.execute(text(ddl))
+            for tabla, columna in COLUMNAS_INDEXADAS:
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{tabla}_{columna}_trgm "
+                    f"ON {tabla} USING gin (moteka_norm({columna}) gin_trgm_ops)"
+                ))
+        _pg_disponible = True
+    except Exception as e:
+        _pg_disponible = False
+        print("[WARN] No se pudieron crear los índices de búsqueda (pg_trgm):", e)
+
+
+def _pg_tiene_indices():
+    global _pg_disponible
+    if _pg_disponible is None:
+        existe = db.session.execute(text("SELECT to_regproc('moteka_norm')")).scalar()
+        _pg_disponible = existe is not None
+    return _pg_disponible
+
+
+# --------------------------------------------------------------------
+# API para las rutas
+# --------------------------------------------------------------------
+def filtro_contiene(columnas, texto):
+    """
+    Condición "alguna de estas columnas contiene `texto`" (sin importar
+    mayúsculas ni tildes). Reemplaza a or_(col.ilike('%texto%'), ...).
+    """
+    dialecto = db.engine.dialect.name
+
+    if dialecto not in ('postgresql', 'sqlite') or (
+        dialecto == 'postgresql' and not _pg_tiene_indices()
+    ):
+        return or_(*[c.ilike(f'%{texto}%') for c in columnas])
+
+    texto_norm = normalizar(texto)
+    patron = f'%{_escapar_like(texto_norm)}%'
+
+    condiciones = []
+    for col in columnas:
+        cond = func.moteka_norm(col).like(patron, escape='\\')
+
+        if dialecto == 'sqlite':
+            ids = _indice_memoria(col).candidatos(texto_norm)
+            if ids is not None and len(ids) <= MAX_CANDIDATOS:
+                cond = col.class_.id.in_(ids) & cond
+
+        condiciones.append(cond)
+
+    return or_(*condiciones)
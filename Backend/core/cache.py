@@ -0,0 +1,150 @@
+"""
+Caché corto para respuestas que muchos clientes consultan igual
+(los dashboards que el front refresca cada rato en cada estación) y
+para los reportes de /api/analytics, que son caros y se piden por rango.
+
+- Clave: nombre del endpoint + día UTC + query string (+ rol si la
+  respuesta cambia por rol).
+- TTL corto (DASHBOARD_CACHE_TTL en Config) como red de seguridad.
+- Se vacía al hacer commit sobre las tablas de las que depende.
+- Si llegan varios pedidos a la vez sin caché, solo uno calcula y los
+  demás esperan ese resultado.
+"""
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, Response, request
+from flask_jwt_extended import get_jwt
+
+from core.eventos import al_confirmar
+
+
+class CacheRespuestas:
+
+    MAX_CLAVES = 256
+
+    def __init__(self, tablas):
+        self._datos = {}          # clave -> (expira_en, body, status, mimetype)
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._generacion = 0
+        al_confirmar(*tablas)(self._al_confirmar)
+
+    def _al_confirmar(self, _tocadas):
+        self.invalidar()
+
+    def invalidar(self):
+        with self._lock:
+            self._generacion += 1
+            self._datos.clear()
+            self._locks.clear()
+
+    def _lock_de(self, clave):
+        with self._lock:
+            return self._locks.setdefault(clave, threading.Lock())
+
+    def _vigente(self, clave):
+        item = self._datos.get(clave)
+        if item and item[0] > time.monotonic():
+            return item
+        return None
+
+    def _recortar(self, ahora):
+        """
+        Rangos arbitrarios (analytics) => primero sacamos lo vencido y, si
+        igual está lleno, las claves más viejas (el dict guarda el orden de
+        llegada). Se llama con self._lock tomado.
+        """
+        for k in [k for k, v in self._datos.items() if v[0] <= ahora]:
+            del self._datos[k]
+        while len(self._datos) >= self.MAX_CLAVES:
+            del self._datos[next(iter(self._datos))]
+        # los locks de claves que ya no están (y nadie usa) tampoco se guardan
+        for k in [k for k, l in self._locks.items() if k not in self._datos and not l.locked()]:
+            del self._locks[k]
+
+    def obtener(self, clave, calcular, ttl):
+        """
+        Devuelve (body, status, mimetype) desde caché o llamando a calcular(),
+        que debe devolver un Response de Flask (o (Response, status)).
+        """
+        item = self._vigente(clave)
+        if item:
+            return item[1:]
+
+        with self._lock_de(clave):
+            # otro request pudo haberlo calculado mientras esperábamos
+            item = self._vigente(clave)
+            if item:
+                return item[1:]
+
+            generacion = self._generacion
+            resp = calcular()
+            status = None
+            if isinstance(resp, tuple):
+                resp, status = resp
+            status = status or resp.status_code
+            body = resp.get_data()
+
+            # solo guardamos respuestas OK y si nadie invalidó mientras calculábamos
+            with self._lock:
+                if status == 200 and generacion == self._generacion:
+                    ahora = time.monotonic()
+                    # reinsertamos para que quede última en el orden de llegada
+                    self._datos.pop(clave, None)
+                    if len(self._datos) >= self.MAX_CLAVES:
+                        self._recortar(ahora)
+                    self._datos[clave] = (ahora + ttl, body, status, resp.mimetype)
+            return body, status, resp.mimetype
+
+
+# dashboards: dependen de órdenes, historial de estados y pagos
+# (clientes/motos/empleados casi no cambian pero también salen en el resumen)
+dashboard_cache = CacheRespuestas([
+    'ordenes_trabajo', 'estados_orden', 'pagos',
+    'clientes', 'motocicletas', 'empleados',
+])
+
+
+# analytics: rangos de fechas largos que toleran unos minutos de atraso.
+# No se vacía con cada commit (en horario de taller hay commits todo el
+# tiempo y nunca llegaría a servir), vence por ANALYTICS_CACHE_TTL.
+analytics_cache = CacheRespuestas([])
+
+
+def cache_respuesta(cache, nombre, ttl_config, por_rol=False):
+    """
+    Decorador genérico: guarda la respuesta en `cache` por
+    nombre + día + query string (+ rol) durante config[ttl_config] segundos.
+    Va DEBAJO de jwt_required / role_required, así primero se valida el
+    token y después se usa el caché.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            ttl = current_app.config.get(ttl_config, 0)
+            if not ttl:
+                return fn(*args, **kwargs)
+
+            clave = [nombre, datetime.utcnow().date().isoformat(), request.query_string.decode()]
+            if por_rol:
+                clave.append((get_jwt().get('user') or {}).get('rol'))
+
+            body, status, mimetype = cache.obtener(
+                tuple(clave), lambda: fn(*args, **kwargs), ttl
+            )
+            return Response(body, status=status, mimetype=mimetype)
+        return wrapper
+    return decorator
+
+
+def cache_dashboard(nombre, por_rol=False):
+    """Para endpoints de dashboard (DASHBOARD_CACHE_TTL)."""
+    return cache_respuesta(dashboard_cache, nombre, 'DASHBOARD_CACHE_TTL', por_rol)
+
+
+def cache_analytics(nombre):
+    """Para /api/analytics: la clave incluye el rango (?desde / ?hasta)."""
+    return cache_respuesta(analytics_cache, nombre, 'ANALYTICS_CACHE_TTL')
@@ -0,0 +1,164 @@
+"""
+Catálogo en memoria: marcas, modelos, roles y mecánicos.
+
+Son tablas chicas que casi no cambian pero salen en todos lados (cada moto
+trae su modelo y marca, cada usuario su rol). En vez de un SELECT perezoso
+por fila, cada worker las carga una vez (4 queries) y los serializadores
+arman `marca` / `modelo` / `rol` desde acá.
+
+- Se recarga cuando un commit toca marcas, modelos, roles, usuarios o
+  empleados (ver core.eventos). Los otros procesos se enteran al vencer
+  CATALOGO_CACHE_TTL, o antes si se llama a revalidar() con la versión de
+  la base (lo hace core.etag: si no, un ETag nuevo podía salir con datos
+  viejos del catálogo y el cliente los guardaba bajo ese ETag).
+- Se lee en una sesión aparte, así solo ve lo confirmado y no lo que el
+  request tiene a medio guardar.
+- Cada recarga sube `catalogo.version`.
+- Los dicts que devuelve son compartidos: no modificarlos.
+- Sin app context (scripts) devuelve None y el serializador usa la relación.
+"""
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from core.eventos import al_confirmar
+from core.extensions import db
+
+
+class _Instantanea:
+    __slots__ = ('marcas', 'modelos', 'modelos_por_nombre', 'roles', 'roles_por_nombre', 'mecanicos')
+
+    def __init__(self, marcas, modelos, roles, mecanicos):
+        self.marcas = marcas          # id -> dict de MarcaMoto
+        self.modelos = modelos        # id -> dict de ModeloMoto (con su marca)
+        self.modelos_por_nombre = {
+            (m['marca']['nombre'].lower(), m['nombre'].lower()): m
+            for m in modelos.values() if m['marca']
+        }
+        self.roles = roles            # id -> dict de Rol
+        self.roles_por_nombre = {r['nombre']: r for r in roles.values()}
+        self.mecanicos = mecanicos    # [{id, nombre, activo}] ordenados por id
+
+
+def _cargar():
+    from models.catalogos import MarcaMoto, ModeloMoto, Rol
+    from models.personas import Empleado, Usuario
+
+    with Session(db.engine) as s:
+        marcas = {m.id: m.to_dict() for m in s.scalars(select(MarcaMoto))}
+        modelos = {
+            m.id: m.to_dict(marca=marcas.get(m.marca_id))
+            for m in s.scalars(select(ModeloMoto))
+        }
+        roles = {r.id: r.to_dict() for r in s.scalars(select(Rol))}
+        mecanicos = [
+            {"id": id_, "nombre": nombre, "activo": bool(activo)}
+            for id_, nombre, activo in s.execute(
+                select(Empleado.id, Empleado.nombre, Empleado.activo)
+                .join(Usuario, Usuario.empleado_id == Empleado.id)
+                .join(Rol, Rol.id == Usuario.rol_id)
+                .where(Rol.nombre == "mecanico")
+                .distinct()
+                .order_by(Empleado.id)
+            )
+        ]
+    return _Instantanea(marcas, modelos, roles, mecanicos)
+
+
+# tablas de las que sale el catálogo
+TABLAS = ('marcas_moto', 'modelos_moto', 'roles', 'usuarios', 'empleados')
+
+
+def modelos_catalogo():
+    """Los modelos de TABLAS, en el mismo orden (import perezoso: los modelos importan este módulo)."""
+    from models.catalogos import MarcaMoto, ModeloMoto, Rol
+    from models.personas import Empleado, Usuario
+    return (MarcaMoto, ModeloMoto, Rol, Usuario, Empleado)
+
+
+class _Catalogo:
+
+    def __init__(self):
+        self._datos = None
+        self._expira = 0.0
+        self._generacion = 0
+        self._version_db = None
+        self._lock = threading.Lock()
+        self.version = 0
+        al_confirmar(*TABLAS)(self._al_confirmar)
+
+    def _al_confirmar(self, _tocadas):
+        self.invalidar()
+
+    def invalidar(self):
+        self._generacion += 1
+        self._datos = None
+
+    def revalidar(self, version_db=None):
+        """
+        `version_db` es core.etag.version_tablas(*modelos_catalogo()) (si no
+        viene se calcula, una query). Si cambió desde la última vez, otro
+        proceso escribió: se descarta el catálogo y el próximo uso lo recarga,
+        leyendo después de esa versión, así lo servido nunca es más viejo.
+        """
+        if version_db is None:
+            from core.etag import version_tablas
+            version_db = version_tablas(*modelos_catalogo())
+        if version_db != self._version_db:
+            self.invalidar()
+            self._version_db = version_db
+
+    def _instantanea(self):
+        if not has_app_context():
+            return None
+        datos = self._datos
+        if datos is not None and self._expira > time.monotonic():
+            return datos
+
+        with self._lock:
+            datos = self._datos
+            if datos is not None and self._expira > time.monotonic():
+                return datos
+
+            generacion = self._generacion
+            datos = _cargar()
+            # si alguien hizo commit mientras cargábamos, usamos lo leído
+            # pero no lo guardamos: el próximo pedido recarga
+            if generacion == self._generacion:
+                self._datos = datos
+                self._expira = time.monotonic() + current_app.config.get('CATALOGO_CACHE_TTL', 300)
+                self.version += 1
+            return datos
+
+    def marca(self, marca_id):
+        datos = self._instantanea()
+        return datos.marcas.get(marca_id) if datos else None
+
+    def modelo(self, modelo_id):
+        datos = self._instantanea()
+        return datos.modelos.get(modelo_id) if datos else None
+
+    def modelo_por_nombre(self, marca, modelo):
+        """Busca por nombres de marca y modelo, sin importar mayúsculas."""
+        datos = self._instantanea()
+        return datos.modelos_por_nombre.get((marca.lower(), modelo.lower())) if datos else None
+
+    def rol(self, rol_id):
+        datos = self._instantanea()
+        return datos.roles.get(rol_id) if datos else None
+
+    def rol_por_nombre(self, nombre):
+        datos = self._instantanea()
+        return datos.roles_por_nombre.get(nombre) if datos else None
+
+    def mecanicos(self, solo_activos=True):
+        datos = self._instantanea()
+        if datos is None:
+            return []
+        return [m for m in datos.mecanicos if m["activo"] or not solo_activos]
+
+
+catalogo = _Catalogo()
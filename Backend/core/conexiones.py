@@ -0,0 +1,159 @@
+"""
+Pool de conexiones medido + statement_timeout por ruta.
+
+- QueuePoolMedido: el QueuePool de siempre, pero anota cuánto espera cada
+  checkout (histograma) y cuántos se vencieron (pool lleno). Lo ve el
+  gerente en GET /api/sistema/pool.
+- statement_timeout(...): decorador (o before_request de un blueprint) que
+  pone `statement_timeout` a las transacciones del request, así un export
+  sin filtros no se queda minutos con una conexión mientras órdenes espera.
+  Solo aplica en Postgres.
+"""
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context
+from sqlalchemy import event, exc, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+# límites (ms) de los baldes del histograma de espera
+BALDES_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class _EstadisticasPool:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.espera_total = 0.0
+            self.espera_max = 0.0
+            self.histograma = [0] * (len(BALDES_MS) + 1)
+
+    def anotar(self, espera, vencido=False):
+        ms = espera * 1000
+        balde = next((i for i, limite in enumerate(BALDES_MS) if ms <= limite), len(BALDES_MS))
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += 1 if vencido else 0
+            self.espera_total += espera
+            self.espera_max = max(self.espera_max, espera)
+            self.histograma[balde] += 1
+
+    def resumen(self, pool=None):
+        with self._lock:
+            # lista y no dict: jsonify ordena las claves y el histograma quedaría desordenado
+            limites = list(BALDES_MS) + [None]
+            data = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "espera_promedio_ms": round(self.espera_total * 1000 / (self.checkouts or 1), 2),
+                "espera_max_ms": round(self.espera_max * 1000, 2),
+                "histograma_espera": [
+                    {"hasta_ms": limite, "checkouts": n} for limite, n in zip(limites, self.histograma)
+                ],
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "tamano": pool.size(),
+                "en_uso": pool.checkedout(),
+                "libres": pool.checkedin(),
+                "overflow": pool.overflow(),
+            })
+        return data
+
+
+estadisticas_pool = _EstadisticasPool()
+
+
+class QueuePoolMedido(QueuePool):
+    """QueuePool que mide la espera de cada checkout (por proceso)."""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        vencido = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            vencido = True
+            raise
+        finally:
+            estadisticas_pool.anotar(time.perf_counter() - inicio, vencido)
+
+
+def opciones_engine(url, pool_size, max_overflow, pool_timeout, pool_recycle, pre_ping):
+    """SQLALCHEMY_ENGINE_OPTIONS según Config. SQLite en memoria queda con lo suyo."""
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/") in ("sqlite:", "sqlite:/")):
+        return {}
+    return {
+        "poolclass": QueuePoolMedido,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pool_recycle": pool_recycle,
+        "pool_pre_ping": pre_ping,
+    }
+
+
+# --------------------------------------------------------------------
+# statement_timeout por request
+# --------------------------------------------------------------------
+def _ms_de(limite):
+    """Acepta ms directos o el nombre de una clave de Config."""
+    if isinstance(limite, str):
+        return current_app.config.get(limite) or 0
+    return limite or 0
+
+
+def _aplicar(connection, ms):
+    if connection.dialect.name == 'postgresql':
+        # is_local=true: solo dura lo que dura la transacción
+        connection.execute(text("SELECT set_config('statement_timeout', :v, true)"), {"v": f"{int(ms)}ms"})
+
+
+@event.listens_for(Session, 'after_begin')
+def _timeout_en_transaccion(session, transaction, connection):
+    # cada transacción nueva del request (ej. después de un commit) lo vuelve a poner
+    if has_request_context():
+        ms = g.get('statement_timeout_ms')
+        if ms:
+            _aplicar(connection, ms)
+
+
+def activar_statement_timeout(limite):
+    """Pone el límite para lo que queda del request (y lo aplica ya si hay transacción abierta)."""
+    from core.extensions import db
+
+    ms = _ms_de(limite)
+    if not ms:
+        return
+    g.statement_timeout_ms = ms
+    if db.session().in_transaction():
+        _aplicar(db.session.connection(), ms)
+
+
+def statement_timeout(limite):
+    """
+    Decorador para vistas: @statement_timeout('REPORTES_STATEMENT_TIMEOUT_MS')
+    o @statement_timeout(5000). Para todo un blueprint ver limitar_blueprint.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            activar_statement_timeout(limite)
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def limitar_blueprint(bp, limite):
+    """Mismo límite para todas las rutas de un blueprint."""
+    @bp.before_request
+    def _statement_timeout_bp():
+        activar_statement_timeout(limite)
@@ -0,0 +1,278 @@
+"""
+Bandeja de salida de correos (tabla email_outbox).
+
+Las rutas llaman encolar_email(...) antes de su commit y listo: el correo
+queda guardado junto con el cambio y nunca bloquea el request. Los correos
+los manda un proceso aparte:
+
+    flask --app app correos worker --hilos 2
+
+Cada hilo toma lotes de pendientes, los manda por una conexión SMTP que
+reutiliza (un solo login), reintenta con espera exponencial y después de
+OUTBOX_MAX_INTENTOS lo deja en FALLIDO (dead-letter). Si un worker se muere
+con un correo tomado, volver a reclamarlo también cuenta como intento: un
+correo que tira abajo al worker termina en FALLIDO y no da vueltas para
+siempre.
+"""
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import and_, case, insert, or_
+
+from core.eventos import marcar_tablas
+from core.extensions import db
+from core.email_utils import ERRORES_POR_MENSAJE, ConexionSMTP, config_smtp
+from models.notificaciones import CorreoSaliente, EstadoCorreoEnum
+
+
+def encolar_email(subject, body, to_addr):
+    """Agrega el correo a la sesión actual, se guarda con el commit de la ruta."""
+    correo = CorreoSaliente(destinatario=to_addr, asunto=subject, cuerpo=body)
+    db.session.add(correo)
+    return correo
+
+
+def encolar_emails(correos):
+    """
+    Varios correos [dict(subject, body, to_addr)] en un solo INSERT
+    (executemany). También queda en la transacción de la ruta.
+    """
+    if not correos:
+        return 0
+    db.session.execute(insert(CorreoSaliente), [
+        {"destinatario": c["to_addr"], "asunto": c["subject"], "cuerpo": c["body"]}
+        for c in correos
+    ])
+    marcar_tablas(db.session, CorreoSaliente.__tablename__)
+    return len(correos)
+
+
+def _filtro_abandonados(ahora):
+    """Un worker lo tomó y se murió (o se colgó) sin terminar."""
+    vencido = ahora - timedelta(seconds=current_app.config['OUTBOX_TIMEOUT_RECLAMO'])
+    return and_(
+        CorreoSaliente.estado == EstadoCorreoEnum.ENVIANDO,
+        CorreoSaliente.reclamado_en < vencido,
+    )
+
+
+def _filtro_disponibles(ahora):
+    return or_(
+        and_(
+            CorreoSaliente.estado == EstadoCorreoEnum.PENDIENTE,
+            CorreoSaliente.proximo_intento_en <= ahora,
+        ),
+        _filtro_abandonados(ahora),
+    )
+
+
+def _descartar_abandonados(ahora):
+    """
+    Los abandonados que ya no tienen intentos van directo a FALLIDO (el
+    intento que se cortó cuenta). Los demás se reclaman sumando un intento.
+    """
+    max_intentos = current_app.config['OUTBOX_MAX_INTENTOS']
+    return (
+        db.session.query(CorreoSaliente)
+        .filter(_filtro_abandonados(ahora), CorreoSaliente.intentos + 1 >= max_intentos)
+        .update({
+            CorreoSaliente.estado: EstadoCorreoEnum.FALLIDO,
+            CorreoSaliente.intentos: CorreoSaliente.intentos + 1,
+            CorreoSaliente.ultimo_error: "El worker no terminó el envío (timeout del reclamo)",
+        }, synchronize_session=False)
+    )
+
+
+def reclamar_lote(tamano):
+    """
+    Marca hasta `tamano` correos como ENVIANDO para este worker y los devuelve.
+    El UPDATE vuelve a chequear el estado, así dos workers no toman el mismo
+    correo (en Postgres además se usa SKIP LOCKED).
+    """
+    ahora = datetime.utcnow()
+    _descartar_abandonados(ahora)
+    disponibles = _filtro_disponibles(ahora)
+    token = uuid.uuid4().hex
+
+    ids = [
+        row[0] for row in (
+            db.session.query(CorreoSaliente.id)
+            .filter(disponibles)
+            .order_by(CorreoSaliente.id)
+            .limit(tamano)
+            .with_for_update(skip_locked=True)
+        )
+    ]
+    if not ids:
+        db.session.commit()
+        return []
+
+    (
+        db.session.query(CorreoSaliente)
+        .filter(CorreoSaliente.id.in_(ids), disponibles)
+        .update({
+            # re-reclamar uno abandonado cuenta como intento (se evalúa
+            # con el estado de antes del UPDATE)
+            CorreoSaliente.intentos: CorreoSaliente.intentos + case(
+                (CorreoSaliente.estado == EstadoCorreoEnum.ENVIANDO, 1), else_=0
+            ),
+            CorreoSaliente.estado: EstadoCorreoEnum.ENVIANDO,
+            CorreoSaliente.reclamado_por: token,
+            CorreoSaliente.reclamado_en: ahora,
+        }, synchronize_session=False)
+    )
+    db.session.commit()
+
+    return (
+        CorreoSaliente.query
+        .filter(CorreoSaliente.reclamado_por == token)
+        .filter(CorreoSaliente.estado == EstadoCorreoEnum.ENVIANDO)
+        .order_by(CorreoSaliente.id)
+        .all()
+    )
+
+
+def _guardar_si_es_mio(correo_id, token, **valores):
+    """
+    Guarda el resultado de un correo solo si este worker todavía lo tiene
+    reclamado, y confirma enseguida. Si se venció el reclamo y lo tomó otro,
+    devuelve False y no toca nada.
+    """
+    guardado = (
+        db.session.query(CorreoSaliente)
+        .filter(
+            CorreoSaliente.id == correo_id,
+            CorreoSaliente.reclamado_por == token,
+            CorreoSaliente.estado == EstadoCorreoEnum.ENVIANDO,
+        )
+        .update(valores, synchronize_session=False)
+    )
+    db.session.commit()
+    return bool(guardado)
+
+
+def procesar_lote(conexion, correos):
+    """
+    Manda un lote por la misma conexión y guarda el resultado de cada uno
+    apenas sale (un commit por correo): si el worker se cae a la mitad, los
+    que ya se mandaron no vuelven a salir.
+    """
+    max_intentos = current_app.config['OUTBOX_MAX_INTENTOS']
+    backoff = current_app.config['OUTBOX_BACKOFF_SEG']
+
+    tokens = {correo.id: correo.reclamado_por for correo in correos}
+    enviados = 0
+    for correo in correos:
+        # el commit del anterior vence el objeto y esto lo vuelve a leer:
+        # si otro worker lo reclamó mientras tanto, ya no es nuestro
+        token = tokens[correo.id]
+        if correo.reclamado_por != token or correo.estado != EstadoCorreoEnum.ENVIANDO:
+            continue
+
+        try:
+            conexion.enviar(correo.asunto, correo.cuerpo, correo.destinatario)
+        except Exception as e:
+            if not isinstance(e, ERRORES_POR_MENSAJE):
+                # conexión en estado raro: la próxima vez se abre una nueva
+                conexion.cerrar()
+            intentos = correo.intentos + 1
+            valores = {'intentos': intentos, 'ultimo_error': str(e)}
+            if intentos >= max_intentos:
+                valores['estado'] = EstadoCorreoEnum.FALLIDO
+                print(f"[WARN] Correo #{correo.id} a {correo.destinatario} descartado:", e)
+            else:
+                valores['estado'] = EstadoCorreoEnum.PENDIENTE
+                espera = backoff * (2 ** (intentos - 1))
+                valores['proximo_intento_en'] = datetime.utcnow() + timedelta(seconds=espera)
+            _guardar_si_es_mio(correo.id, token, **valores)
+            continue
+
+        if _guardar_si_es_mio(
+            correo.id, token,
+            estado=EstadoCorreoEnum.ENVIADO, enviado_en=datetime.utcnow(), ultimo_error=None,
+        ):
+            enviados += 1
+
+    return enviados
+
+
+def correr_worker(app, hilos=1, lote=20, espera=5.0, una_vez=False, parar=None):
+    """
+    Lanza `hilos` hilos, cada uno con su propia conexión SMTP persistente.
+    Con una_vez=True vacía la bandeja y termina (útil para cron o pruebas).
+    """
+    parar = parar or threading.Event()
+    config = config_smtp()  # si falta config, fallamos antes de arrancar hilos
+
+    def bucle():
+        with app.app_context():
+            conexion = ConexionSMTP(config)
+            try:
+                while not parar.is_set():
+                    correos = reclamar_lote(lote)
+                    if correos:
+                        procesar_lote(conexion, correos)
+                        continue
+                    if una_vez:
+                        break
+                    # sin trabajo: soltamos el SMTP para no tenerlo ocioso
+                    conexion.cerrar()
+                    parar.wait(espera)
+            finally:
+                conexion.cerrar()
+                db.session.remove()
+
+    workers = [threading.Thread(target=bucle, name=f"outbox-{i}", daemon=True) for i in range(hilos)]
+    for w in workers:
+        w.start()
+    try:
+        for w in workers:
+            while w.is_alive():
+                w.join(0.5)
+    except KeyboardInterrupt:
+        parar.set()
+        for w in workers:
+            w.join()
+
+
+@click.group('correos')
+def correos_cli():
+    """Bandeja de salida de correos."""
+
+
+@correos_cli.command('worker')
+@click.option('--hilos', default=None, type=int, help='Hilos/conexiones SMTP en paralelo.')
+@click.option('--lote', default=None, type=int, help='Correos por lote.')
+@click.option('--una-vez', is_flag=True, help='Vaciar la bandeja y salir.')
+@with_appcontext
+def worker_cmd(hilos, lote, una_vez):
+    """Manda los correos pendientes."""
+    cfg = current_app.config
+    correr_worker(
+        current_app._get_current_object(),
+        hilos=hilos or cfg['OUTBOX_HILOS'],
+        lote=lote or cfg['OUTBOX_LOTE'],
+        espera=cfg['OUTBOX_ESPERA_SEG'],
+        una_vez=una_vez,
+    )
+
+
+@correos_cli.command('reintentar-fallidos')
+@with_appcontext
+def reintentar_cmd():
+    """Devuelve los correos FALLIDO a la cola."""
+    total = (
+        CorreoSaliente.query
+        .filter(CorreoSaliente.estado == EstadoCorreoEnum.FALLIDO)
+        .update({
+            CorreoSaliente.estado: EstadoCorreoEnum.PENDIENTE,
+            CorreoSaliente.intentos: 0,
+            CorreoSaliente.proximo_intento_en: datetime.utcnow(),
+        }, synchronize_session=False)
+    )
+    db.session.commit()
+    click.echo(f"✓ {total} correos devueltos a la cola")
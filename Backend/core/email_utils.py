@@ -3,29 +3,105 @@ import smtplib
 from email.mime.text import MIMEText
 
 
-def send_email(subject: str, body: str, to_addr: str):
+def config_smtp():
     """
-    Envía un correo de texto plano.
-    Si algo falla (credenciales malas, sin internet, etc.), lanza excepción.
+    Lee la config SMTP de variables de entorno.
+    SMTP_USER / SMTP_PASS son opcionales (un servidor local de pruebas
+    no pide login) y SMTP_STARTTLS=0 desactiva TLS para lo mismo.
     """
-
     smtp_host = os.getenv("SMTP_HOST")         # ej: "smtp.gmail.com"
     smtp_port = os.getenv("SMTP_PORT")         # ej: "587"
     smtp_user = os.getenv("SMTP_USER")         # correo remitente
     smtp_pass = os.getenv("SMTP_PASS")         # contraseña/app password
     from_addr = os.getenv("SMTP_FROM") or smtp_user  # quién aparece como remitente
+    starttls = os.getenv("SMTP_STARTTLS", "1") != "0"
 
-    if not (smtp_host and smtp_port and smtp_user and smtp_pass and from_addr):
+    if not (smtp_host and smtp_port and from_addr):
         raise RuntimeError("Config SMTP incompleta, revisa variables de entorno")
+    if bool(smtp_user) != bool(smtp_pass):
+        raise RuntimeError("Config SMTP incompleta, revisa variables de entorno")
+
+    return {
+        "host": smtp_host,
+        "port": int(smtp_port),
+        "user": smtp_user,
+        "password": smtp_pass,
+        "from_addr": from_addr,
+        "starttls": starttls,
+    }
+
 
-    # armamos el correo
+def _armar_mensaje(subject, body, from_addr, to_addr):
     msg = MIMEText(body, _charset="utf-8")
     msg["Subject"] = subject
     msg["From"] = from_addr
     msg["To"] = to_addr
+    return msg
+
+
+# errores de UN mensaje (destinatario rechazado, etc.): smtplib ya hizo
+# RSET y la conexión sigue sirviendo para el resto del lote
+ERRORES_POR_MENSAJE = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
+
+
+class ConexionSMTP:
+    """
+    Conexión SMTP que se reutiliza entre mensajes: un solo
+    connect + STARTTLS + login, y se reconecta sola si el servidor la cierra.
+    """
 
-    # enviamos
-    with smtplib.SMTP(smtp_host, int(smtp_port)) as server:
-        server.starttls()
-        server.login(smtp_user, smtp_pass)
-        server.sendmail(from_addr, [to_addr], msg.as_string())
\ No newline at end of file
+    def __init__(self, config=None, timeout=30):
+        self.config = config or config_smtp()
+        self.timeout = timeout
+        self._server = None
+
+    def _conectar(self):
+        cfg = self.config
+        server = smtplib.SMTP(cfg["host"], cfg["port"], timeout=self.timeout)
+        if cfg["starttls"]:
+            server.starttls()
+        if cfg["user"]:
+            server.login(cfg["user"], cfg["password"])
+        self._server = server
+
+    def enviar(self, subject, body, to_addr):
+        msg = _armar_mensaje(subject, body, self.config["from_addr"], to_addr)
+        for intento in range(2):
+            if self._server is None:
+                self._conectar()
+            try:
+                self._server.sendmail(self.config["from_addr"], [to_addr], msg.as_string())
+                return
+            except smtplib.SMTPServerDisconnected:
+                # el servidor cerró la conexión por inactividad: reconectamos una vez
+                self._server = None
+                if intento:
+                    raise
+
+    def cerrar(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def send_email(subject: str, body: str, to_addr: str):
+    """
+    Envía un correo de texto plano.
+    Si algo falla (credenciales malas, sin internet, etc.), lanza excepción.
+    Para avisos desde las rutas usar core.email_outbox.encolar_email.
+    """
+    with ConexionSMTP() as conexion:
+        conexion.enviar(subject, body, to_addr)
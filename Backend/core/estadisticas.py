@@ -0,0 +1,395 @@
+"""
+Mantenimiento del rollup estadisticas_diarias y de carga_mecanicos
+(órdenes abiertas por empleado).
+
+Las funciones registrar_* se llaman ANTES del commit de la ruta, así el
+rollup queda en la misma transacción que la orden / el pago. Los
+incrementos son UPSERT con col = col + delta, no leemos y escribimos,
+para que dos requests a la vez no se pisen.
+"""
+from collections import defaultdict
+from datetime import datetime, date
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import and_, func
+
+from core.extensions import db
+from models.estadisticas import EstadisticaDiaria, CargaMecanico
+from models.ordenes import OrdenTrabajo, Pago, EstadoOrdenEnum, TipoPagoEnum
+
+TALLER = 0  # mecanico_id del total del día
+
+CONTADORES = [
+    'ordenes_total', 'en_espera', 'en_reparacion', 'finalizadas', 'canceladas',
+    'ingresos_efectivo', 'ingresos_tarjeta', 'ingresos_transferencia',
+]
+
+COLUMNA_ESTADO = {
+    EstadoOrdenEnum.EN_ESPERA: 'en_espera',
+    EstadoOrdenEnum.EN_REPARACION: 'en_reparacion',
+    EstadoOrdenEnum.FINALIZADA: 'finalizadas',
+    EstadoOrdenEnum.CANCELADA: 'canceladas',
+}
+
+# estados que cuentan como carga de trabajo del mecánico
+COLUMNA_CARGA = {
+    EstadoOrdenEnum.EN_ESPERA: 'en_espera',
+    EstadoOrdenEnum.EN_REPARACION: 'en_reparacion',
+}
+
+COLUMNA_PAGO = {
+    TipoPagoEnum.EFECTIVO: 'ingresos_efectivo',
+    TipoPagoEnum.TARJETA: 'ingresos_tarjeta',
+    TipoPagoEnum.TRANSFERENCIA: 'ingresos_transferencia',
+}
+
+
+def _insert_dialecto():
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialecto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+def _upsert_sumar(tabla, claves, deltas):
+    """UPSERT de la fila con `claves` (dict columna -> valor) sumando `deltas` a sus columnas."""
+    ahora = datetime.utcnow()
+    insert = _insert_dialecto()
+
+    if insert is not None:
+        stmt = insert(tabla).values(actualizado_en=ahora, **claves, **deltas)
+        set_ = {col: tabla.c[col] + stmt.excluded[col] for col in deltas}
+        set_['actualizado_en'] = stmt.excluded.actualizado_en
+        stmt = stmt.on_conflict_do_update(index_elements=list(claves), set_=set_)
+        db.session.execute(stmt)
+        return
+
+    # otros motores: UPDATE y si no había fila, INSERT
+    filtro = and_(*(tabla.c[col] == valor for col, valor in claves.items()))
+    valores = {col: tabla.c[col] + delta for col, delta in deltas.items()}
+    valores['actualizado_en'] = ahora
+    res = db.session.execute(tabla.update().where(filtro).values(**valores))
+    if res.rowcount == 0:
+        db.session.execute(tabla.insert().values(actualizado_en=ahora, **claves, **deltas))
+
+
+def _sumar(fecha, mecanico_id, deltas):
+    """UPSERT de una fila (fecha, mecanico_id) del rollup."""
+    _upsert_sumar(EstadisticaDiaria.__table__, {'fecha': fecha, 'mecanico_id': mecanico_id}, deltas)
+
+
+def _sumar_carga(por_empleado):
+    """{empleado_id: {col: delta}} -> un UPSERT por empleado en carga_mecanicos."""
+    for empleado_id, deltas in por_empleado.items():
+        deltas = {col: d for col, d in deltas.items() if d}
+        if empleado_id and deltas:
+            _upsert_sumar(CargaMecanico.__table__, {'empleado_id': empleado_id}, deltas)
+
+
+def _aplicar(fecha, mecanico_id, deltas):
+    """Suma al total del taller y, si hay mecánico, también a su fila."""
+    if not fecha or not deltas:
+        return
+    _sumar(fecha, TALLER, deltas)
+    if mecanico_id:
+        _sumar(fecha, mecanico_id, deltas)
+
+
+def _fecha_de(valor):
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+# --------------------------------------------------------------------
+# hooks para las rutas
+# --------------------------------------------------------------------
+def registrar_orden_nueva(orden):
+    """Llamar después del flush de una OrdenTrabajo nueva (ya tiene fecha_ingreso)."""
+    fecha = _fecha_de(orden.fecha_ingreso or datetime.utcnow())
+    deltas = {'ordenes_total': 1}
+    col = COLUMNA_ESTADO.get(orden.estado)
+    if col:
+        deltas[col] = 1
+    _aplicar(fecha, orden.mecanico_asignado_id, deltas)
+
+    if orden.estado in COLUMNA_CARGA:
+        _sumar_carga({orden.mecanico_asignado_id: {COLUMNA_CARGA[orden.estado]: 1}})
+
+
+def registrar_cambio_estado(orden, estado_anterior):
+    """Mueve la orden de la columna del estado anterior a la del nuevo."""
+    registrar_cambios_estado([(orden, estado_anterior)])
+
+
+def registrar_cambios_estado(cambios):
+    """
+    Igual que registrar_cambio_estado para varias órdenes [(orden, estado_anterior)]:
+    junta los deltas por (día, mecánico) y hace un UPSERT por fila del rollup,
+    no uno por orden (y uno por mecánico en carga_mecanicos).
+    """
+    por_fila = defaultdict(lambda: defaultdict(int))
+    carga = defaultdict(lambda: defaultdict(int))
+    for orden, estado_anterior in cambios:
+        if estado_anterior == orden.estado:
+            continue
+        deltas = por_fila[(_fecha_de(orden.fecha_ingreso), orden.mecanico_asignado_id)]
+        if estado_anterior in COLUMNA_ESTADO:
+            deltas[COLUMNA_ESTADO[estado_anterior]] -= 1
+        if orden.estado in COLUMNA_ESTADO:
+            deltas[COLUMNA_ESTADO[orden.estado]] += 1
+
+        if orden.mecanico_asignado_id:
+            if estado_anterior in COLUMNA_CARGA:
+                carga[orden.mecanico_asignado_id][COLUMNA_CARGA[estado_anterior]] -= 1
+            if orden.estado in COLUMNA_CARGA:
+                carga[orden.mecanico_asignado_id][COLUMNA_CARGA[orden.estado]] += 1
+
+    total_dia = defaultdict(lambda: defaultdict(int))
+    for (fecha, mecanico_id), deltas in por_fila.items():
+        if mecanico_id:
+            _sumar_si_hay(fecha, mecanico_id, deltas)
+        for col, delta in deltas.items():
+            total_dia[fecha][col] += delta
+    for fecha, deltas in total_dia.items():
+        _sumar_si_hay(fecha, TALLER, deltas)
+
+    _sumar_carga(carga)
+
+
+def registrar_reasignacion(orden, mecanico_anterior):
+    """
+    La orden pasó de `mecanico_anterior` a orden.mecanico_asignado_id (cualquiera
+    puede ser None). Mueve su conteo entre las filas de los dos mecánicos en
+    el rollup (el total del taller no cambia) y su carga si está abierta.
+    Los ingresos que ya tenía también se mudan al nuevo mecánico (cada uno
+    en el día en que se pagó): reconstruir_estadisticas los cuenta por el
+    mecánico actual de la orden y los dos caminos tienen que dar lo mismo.
+    """
+    nuevo = orden.mecanico_asignado_id
+    if mecanico_anterior == nuevo:
+        return
+
+    fecha = _fecha_de(orden.fecha_ingreso)
+    deltas = {'ordenes_total': 1}
+    if orden.estado in COLUMNA_ESTADO:
+        deltas[COLUMNA_ESTADO[orden.estado]] = 1
+    if mecanico_anterior:
+        _sumar_si_hay(fecha, mecanico_anterior, {col: -d for col, d in deltas.items()})
+    if nuevo:
+        _sumar_si_hay(fecha, nuevo, deltas)
+
+    if orden.estado in COLUMNA_CARGA:
+        col = COLUMNA_CARGA[orden.estado]
+        _sumar_carga({mecanico_anterior: {col: -1}, nuevo: {col: 1}})
+
+    dia_pago = func.date(Pago.pagado_en)
+    ingresos = defaultdict(lambda: defaultdict(int))
+    for dia, tipo, monto in (
+        db.session.query(dia_pago, Pago.tipo, func.sum(Pago.monto))
+        .filter(Pago.orden_id == orden.id, Pago.pagado_en.isnot(None))
+        .group_by(dia_pago, Pago.tipo)
+    ):
+        if tipo in COLUMNA_PAGO and monto:
+            ingresos[_como_fecha(dia)][COLUMNA_PAGO[tipo]] += monto
+    for fecha_pago, deltas_pago in ingresos.items():
+        if mecanico_anterior:
+            _sumar_si_hay(fecha_pago, mecanico_anterior, {col: -d for col, d in deltas_pago.items()})
+        if nuevo:
+            _sumar_si_hay(fecha_pago, nuevo, deltas_pago)
+
+
+def _sumar_si_hay(fecha, mecanico_id, deltas):
+    deltas = {col: d for col, d in deltas.items() if d}
+    if fecha and deltas:
+        _sumar(fecha, mecanico_id, deltas)
+
+
+def registrar_pago(pago, orden=None):
+    """Suma el monto del pago al día en que se pagó (y al mecánico de la orden)."""
+    col = COLUMNA_PAGO.get(pago.tipo)
+    if not col or pago.monto is None:
+        return
+    if orden is None:
+        orden = db.session.get(OrdenTrabajo, pago.orden_id)
+    fecha = _fecha_de(pago.pagado_en or datetime.utcnow())
+    _aplicar(fecha, orden.mecanico_asignado_id if orden else None, {col: pago.monto})
+
+
+# --------------------------------------------------------------------
+# lectura
+# --------------------------------------------------------------------
+def leer_dia(fecha=None, mecanico_id=TALLER):
+    """Fila del rollup (o None si ese día no hubo movimiento)."""
+    fecha = fecha or datetime.utcnow().date()
+    return EstadisticaDiaria.query.filter_by(fecha=fecha, mecanico_id=mecanico_id).first()
+
+
+def leer_rango(desde, hasta, mecanico_id=TALLER):
+    """Filas del rollup entre dos fechas (inclusive), ordenadas. Una por día con movimiento."""
+    return (
+        EstadisticaDiaria.query
+        .filter(EstadisticaDiaria.mecanico_id == mecanico_id)
+        .filter(EstadisticaDiaria.fecha >= desde, EstadisticaDiaria.fecha <= hasta)
+        .order_by(EstadisticaDiaria.fecha)
+        .all()
+    )
+
+
+def leer_carga():
+    """{empleado_id: CargaMecanico} de todos los que tienen fila (tabla chica, un SELECT)."""
+    return {c.empleado_id: c for c in CargaMecanico.query.all()}
+
+
+def ingresos_por_tipo(fila):
+    """{'EFECTIVO': Decimal, ...} de una fila del rollup (ceros si no hay fila)."""
+    return {
+        tipo.value: (getattr(fila, col) or 0) if fila is not None else 0
+        for tipo, col in COLUMNA_PAGO.items()
+    }
+
+
+def resumen_estados(fila):
+    """El dict 'resumen_hoy' que ya consumen los dashboards."""
+    if fila is None:
+        return {"total": 0, "en_espera": 0, "en_reparacion": 0, "finalizadas": 0, "canceladas": 0}
+    return {
+        "total": fila.ordenes_total,
+        "en_espera": fila.en_espera,
+        "en_reparacion": fila.en_reparacion,
+        "finalizadas": fila.finalizadas,
+        "canceladas": fila.canceladas,
+    }
+
+
+# --------------------------------------------------------------------
+# reconstrucción completa
+# --------------------------------------------------------------------
+def _como_fecha(valor):
+    # SQLite devuelve date() como string 'YYYY-MM-DD'
+    if isinstance(valor, str):
+        return date.fromisoformat(valor[:10])
+    return _fecha_de(valor)
+
+
+def reconstruir_estadisticas():
+    """
+    Borra el rollup y lo vuelve a calcular desde ordenes_trabajo y pagos
+    con GROUP BY. Sirve para el arranque inicial o si algo se desincronizó.
+    Devuelve cuántas filas quedaron.
+    """
+    filas = defaultdict(lambda: defaultdict(int))
+
+    def acumular(fecha, mecanico_id, col, valor):
+        filas[(fecha, TALLER)][col] += valor
+        if mecanico_id:
+            filas[(fecha, mecanico_id)][col] += valor
+
+    dia_orden = func.date(OrdenTrabajo.fecha_ingreso)
+    q_ordenes = (
+        db.session.query(dia_orden, OrdenTrabajo.mecanico_asignado_id, OrdenTrabajo.estado, func.count(OrdenTrabajo.id))
+        .filter(OrdenTrabajo.fecha_ingreso.isnot(None))
+        .group_by(dia_orden, OrdenTrabajo.mecanico_asignado_id, OrdenTrabajo.estado)
+    )
+    for dia, mecanico_id, estado, cantidad in q_ordenes:
+        fecha = _como_fecha(dia)
+        acumular(fecha, mecanico_id, 'ordenes_total', cantidad)
+        if estado in COLUMNA_ESTADO:
+            acumular(fecha, mecanico_id, COLUMNA_ESTADO[estado], cantidad)
+
+    dia_pago = func.date(Pago.pagado_en)
+    q_pagos = (
+        db.session.query(dia_pago, OrdenTrabajo.mecanico_asignado_id, Pago.tipo, func.sum(Pago.monto))
+        .join(OrdenTrabajo, OrdenTrabajo.id == Pago.orden_id)
+        .filter(Pago.pagado_en.isnot(None))
+        .group_by(dia_pago, OrdenTrabajo.mecanico_asignado_id, Pago.tipo)
+    )
+    for dia, mecanico_id, tipo, monto in q_pagos:
+        if tipo in COLUMNA_PAGO:
+            acumular(_como_fecha(dia), mecanico_id, COLUMNA_PAGO[tipo], monto or 0)
+
+    ahora = datetime.utcnow()
+    db.session.query(EstadisticaDiaria).delete(synchronize_session=False)
+    if filas:
+        db.session.execute(
+            EstadisticaDiaria.__table__.insert(),
+            [
+                {
+                    "fecha": fecha,
+                    "mecanico_id": mecanico_id,
+                    "actualizado_en": ahora,
+                    **{col: valores.get(col, 0) for col in CONTADORES},
+                }
+                for (fecha, mecanico_id), valores in filas.items()
+            ]
+        )
+    db.session.commit()
+    return len(filas)
+
+
+def reconstruir_carga():
+    """
+    Recalcula carga_mecanicos con un GROUP BY de las órdenes abiertas
+    asignadas. Devuelve cuántos empleados tienen carga.
+    """
+    por_empleado = defaultdict(dict)
+    q = (
+        db.session.query(OrdenTrabajo.mecanico_asignado_id, OrdenTrabajo.estado, func.count(OrdenTrabajo.id))
+        .filter(OrdenTrabajo.mecanico_asignado_id.isnot(None))
+        .filter(OrdenTrabajo.estado.in_(list(COLUMNA_CARGA)))
+        .group_by(OrdenTrabajo.mecanico_asignado_id, OrdenTrabajo.estado)
+    )
+    for empleado_id, estado, cantidad in q:
+        por_empleado[empleado_id][COLUMNA_CARGA[estado]] = cantidad
+
+    ahora = datetime.utcnow()
+    db.session.query(CargaMecanico).delete(synchronize_session=False)
+    if por_empleado:
+        db.session.execute(
+            CargaMecanico.__table__.insert(),
+            [
+                {
+                    "empleado_id": empleado_id,
+                    "actualizado_en": ahora,
+                    **{col: valores.get(col, 0) for col in COLUMNA_CARGA.values()},
+                }
+                for empleado_id, valores in por_empleado.items()
+            ]
+        )
+    db.session.commit()
+    return len(por_empleado)
+
+
+def inicializar_estadisticas():
+    """
+    Al arrancar: si estadisticas_diarias está vacía pero ya hay órdenes (tabla
+    agregada a una base existente) la arma desde cero, si no los reportes
+    salen en cero hasta que alguien corra `flask estadisticas reconstruir`.
+    """
+    if (db.session.query(EstadisticaDiaria.fecha).first() is None
+            and db.session.query(OrdenTrabajo.id).first() is not None):
+        reconstruir_estadisticas()
+
+
+def inicializar_carga():
+    """Al arrancar: si carga_mecanicos está vacía (tabla recién creada) la arma desde las órdenes."""
+    if db.session.query(CargaMecanico.empleado_id).first() is None:
+        reconstruir_carga()
+
+
+@click.group('estadisticas')
+def estadisticas_cli():
+    """Comandos del rollup estadisticas_diarias y de carga_mecanicos."""
+
+
+@estadisticas_cli.command('reconstruir')
+@with_appcontext
+def reconstruir_cmd():
+    """Recalcula estadisticas_diarias y carga_mecanicos desde cero."""
+    total = reconstruir_estadisticas()
+    click.echo(f"✓ estadisticas_diarias reconstruida ({total} filas)")
+    total = reconstruir_carga()
+    click.echo(f"✓ carga_mecanicos reconstruida ({total} empleados con órdenes abiertas)")
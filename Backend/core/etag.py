@@ -0,0 +1,70 @@
+"""
+ETag / 304 para catálogos que el front pide en cada pantalla y casi no
+cambian (marcas, modelos, roles, mecánicos, herramientas).
+
+La versión de una colección sale de la base con UNA query chiquita:
+count(*) + max(actualizado_en) de cada tabla de la que depende la
+respuesta (max(id) si la tabla no tiene actualizado_en). Altas, bajas y
+ediciones la cambian, y vale igual para todos los workers. Si el cliente
+manda el mismo ETag en If-None-Match respondemos 304 sin armar el JSON.
+Las respuestas que salen del catálogo en memoria (core.catalogo) además lo
+revalidan con esa misma versión, para no servir datos de otro proceso
+viejos con un ETag nuevo.
+"""
+import hashlib
+from functools import wraps
+
+from flask import Response, make_response, request
+from sqlalchemy import func, select
+
+from core.extensions import db
+
+
+def version_tablas(*modelos):
+    """Tupla (count, max) por modelo, en un solo SELECT."""
+    columnas = []
+    for modelo in modelos:
+        marca = modelo.actualizado_en if hasattr(modelo, 'actualizado_en') else modelo.id
+        columnas.append(select(func.count()).select_from(modelo).scalar_subquery())
+        columnas.append(select(func.max(marca)).scalar_subquery())
+    return tuple(db.session.execute(select(*columnas)).one())
+
+
+def con_etag(*modelos):
+    """
+    Decorador para GET de catálogos. Va DEBAJO de jwt_required/role_required.
+    `modelos`: todas las tablas que aparecen en la respuesta (ej. modelos
+    incluye su marca -> ModeloMoto, MarcaMoto).
+    """
+    from core.catalogo import TABLAS, catalogo, modelos_catalogo
+
+    usa_catalogo = any(m.__tablename__ in TABLAS for m in modelos)
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if usa_catalogo:
+                # misma query: la versión de la respuesta y la del catálogo.
+                # El catálogo se recarga DESPUÉS de leer la versión, así el
+                # cuerpo nunca es más viejo que el ETag
+                todas = version_tablas(*modelos, *modelos_catalogo())
+                version = todas[:2 * len(modelos)]
+                catalogo.revalidar(todas[2 * len(modelos):])
+            else:
+                version = version_tablas(*modelos)
+            base = repr((request.path, request.query_string, version))
+            etag = hashlib.sha1(base.encode()).hexdigest()[:24]
+
+            if request.if_none_match.contains(etag):
+                resp = Response(status=304)
+            else:
+                resp = make_response(fn(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+
+            resp.set_etag(etag)
+            # el navegador puede guardarla pero tiene que revalidar siempre
+            resp.headers['Cache-Control'] = 'private, no-cache'
+            return resp
+        return wrapper
+    return decorator
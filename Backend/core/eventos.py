@@ -0,0 +1,56 @@
+"""
+Avisos de "se hizo commit sobre estas tablas".
+
+Los cachés en memoria (búsqueda, dashboards, catálogos...) se suscriben
+con @al_confirmar('tabla', ...) y se invalidan solo cuando un commit
+realmente tocó alguna de sus tablas. Si el commit falla no se avisa nada.
+
+Ojo: es por proceso. Con varios workers cada uno invalida lo suyo.
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_CLAVE = 'tablas_tocadas'
+
+_suscriptores = []
+
+
+def al_confirmar(*tablas):
+    """Decorador: fn(tablas_tocadas) se llama después de un commit que tocó alguna de `tablas`."""
+    def decorator(fn):
+        _suscriptores.append((frozenset(tablas), fn))
+        return fn
+    return decorator
+
+
+def marcar_tablas(session, *tablas):
+    """Para escrituras por Core (insert/update masivos) que no pasan por objetos ORM."""
+    session.info.setdefault(_CLAVE, set()).update(tablas)
+
+
+@event.listens_for(Session, 'after_flush')
+def _anotar_tablas(session, flush_context):
+    tocadas = session.info.setdefault(_CLAVE, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tabla = getattr(obj, '__tablename__', None)
+        if tabla:
+            tocadas.add(tabla)
+
+
+@event.listens_for(Session, 'after_commit')
+def _avisar(session):
+    tocadas = session.info.pop(_CLAVE, None)
+    if not tocadas:
+        return
+    for tablas, fn in _suscriptores:
+        if tablas & tocadas:
+            try:
+                fn(tocadas)
+            except Exception as e:
+                # un caché roto no puede tumbar el request que ya hizo commit
+                print("[WARN] Falló invalidación de caché:", e)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar(session):
+    session.info.pop(_CLAVE, None)
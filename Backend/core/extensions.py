@@ -2,8 +2,10 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
+from core.replicas import SesionRuteada
 
-db = SQLAlchemy()
+# SesionRuteada: los GET leen de la réplica si hay una configurada (core/replicas.py)
+db = SQLAlchemy(session_options={"class_": SesionRuteada})
 migrate = Migrate()
 jwt = JWTManager()
 cors = CORS()
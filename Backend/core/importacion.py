@@ -0,0 +1,506 @@
+"""
+Importación masiva de clientes y motocicletas desde CSV o XLSX.
+
+Para dar de alta una sucursal nueva sin cargar miles de registros a mano.
+El archivo se lee fila por fila (no se carga entero en memoria) y se
+procesa en lotes de LOTE filas:
+
+1. Se valida cada fila (requeridos, largos, números, fechas).
+2. Las columnas únicas (correo; placa y VIN) se revisan contra el mismo
+   archivo y contra la base con UN `SELECT ... IN (...)` por lote y columna.
+3. Las filas buenas se insertan en un solo executemany con
+   ON CONFLICT DO NOTHING (Postgres/SQLite): si otro usuario guardó la
+   misma placa mientras importábamos, esa fila sale como error y el resto
+   entra igual.
+4. Commit por lote.
+
+El resultado trae, por cada fila con problemas, su número (la fila 1 es el
+encabezado, como en Excel) y la lista de errores. Con simular=True solo se
+valida y no se guarda nada.
+"""
+import codecs
+import csv
+import io
+from datetime import date, datetime
+
+import click
+from flask import jsonify, request
+from flask.cli import with_appcontext
+from sqlalchemy import insert as insert_generico, select
+
+from core.catalogo import catalogo
+from core.eventos import marcar_tablas
+from core.extensions import db
+from models.personas import Cliente
+from models.vehiculos import Motocicleta
+
+# filas por lote (validación + SELECT de únicos + INSERT + commit)
+LOTE = 1000
+
+# errores que se devuelven como máximo (el resto solo se cuenta)
+MAX_ERRORES = 1000
+
+FORMATOS = ('csv', 'xlsx')
+
+
+class ErrorArchivo(Exception):
+    """
+    El archivo no se puede leer (formato, encabezados...). Si pasa a mitad
+    de camino, `resumen` trae lo que ya se había guardado en lotes anteriores.
+    """
+    resumen = None
+
+
+# --------------------------------------------------------------------
+# 1) LECTURA
+# --------------------------------------------------------------------
+def _normalizar_encabezado(valor):
+    return str(valor or '').strip().lower().replace(' ', '_')
+
+
+def _validar_utf8(archivo, bloque=64 * 1024):
+    """
+    Pasada previa por los bytes (de a `bloque`, sin cargarlo entero): la
+    lectura decodifica de a poco y un byte inválido al final aparecería
+    recién después de haber guardado los primeros lotes.
+    """
+    decodificador = codecs.getincrementaldecoder('utf-8')()
+    inicio = archivo.tell()
+    try:
+        while True:
+            datos = archivo.read(bloque)
+            decodificador.decode(datos, final=not datos)
+            if not datos:
+                break
+    except UnicodeDecodeError:
+        raise ErrorArchivo("El CSV debe estar en UTF-8")
+    finally:
+        archivo.seek(inicio)
+
+
+def _filas_csv(archivo):
+    _validar_utf8(archivo)
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    try:
+        muestra = texto.read(4096)
+        texto.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+        except csv.Error:
+            dialecto = csv.excel
+        yield from csv.reader(texto, dialecto)
+    except UnicodeDecodeError:
+        raise ErrorArchivo("El CSV debe estar en UTF-8")
+    except csv.Error as e:
+        raise ErrorArchivo(f"CSV inválido: {e}")
+    finally:
+        texto.detach()
+
+
+def _filas_xlsx(archivo):
+    from openpyxl import load_workbook
+
+    try:
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+    except Exception:
+        raise ErrorArchivo("No se pudo abrir el XLSX")
+    try:
+        yield from libro.active.iter_rows(values_only=True)
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo, formato):
+    """
+    Generador de (numero_fila, {columna: valor}) a partir de un archivo
+    binario. Se saltan las filas vacías.
+    """
+    if formato not in FORMATOS:
+        raise ErrorArchivo("formato inválido, use csv o xlsx")
+
+    filas = _filas_csv(archivo) if formato == 'csv' else _filas_xlsx(archivo)
+    encabezado = next(filas, None)
+    if not encabezado:
+        raise ErrorArchivo("El archivo está vacío")
+    columnas = [_normalizar_encabezado(c) for c in encabezado]
+
+    for numero, valores in enumerate(filas, start=2):
+        if not any(v not in (None, '') for v in valores):
+            continue
+        yield numero, dict(zip(columnas, valores))
+
+
+def formato_de(nombre_archivo, formato=None):
+    formato = (formato or '').strip().lower()
+    if not formato and nombre_archivo and '.' in nombre_archivo:
+        formato = nombre_archivo.rsplit('.', 1)[1].lower()
+    return formato
+
+
+# --------------------------------------------------------------------
+# 2) CONVERSIÓN DE CELDAS
+# --------------------------------------------------------------------
+def _texto(fila, campo, errores, largo=None, requerido=False):
+    valor = fila.get(campo)
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)          # teléfonos que Excel guardó como número
+    valor = str(valor).strip() if valor is not None else ''
+    if not valor:
+        if requerido:
+            errores.append(f"'{campo}' es requerido")
+        return None
+    if largo and len(valor) > largo:
+        errores.append(f"'{campo}' supera {largo} caracteres")
+        return None
+    return valor
+
+
+def _entero(fila, campo, errores, minimo=None):
+    valor = fila.get(campo)
+    if valor in (None, ''):
+        return None
+    try:
+        if isinstance(valor, float):
+            if not valor.is_integer():
+                raise ValueError
+            numero = int(valor)
+        else:
+            numero = int(str(valor).strip())
+    except ValueError:
+        errores.append(f"'{campo}' debe ser un número entero")
+        return None
+    if minimo is not None and numero < minimo:
+        errores.append(f"'{campo}' no puede ser menor que {minimo}")
+        return None
+    return numero
+
+
+def _fecha(fila, campo, errores):
+    valor = fila.get(campo)
+    if valor in (None, ''):
+        return None
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    try:
+        return date.fromisoformat(str(valor).strip()[:10])
+    except ValueError:
+        errores.append(f"'{campo}' debe ser una fecha AAAA-MM-DD")
+        return None
+
+
+# --------------------------------------------------------------------
+# 3) IMPORTADORES
+# --------------------------------------------------------------------
+def _insert_sin_conflicto(tabla):
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert(tabla).on_conflict_do_nothing()
+    if dialecto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert(tabla).on_conflict_do_nothing()
+    return insert_generico(tabla)
+
+
+class _Importador:
+    modelo = None
+    unicas = ()          # columnas con UNIQUE en la tabla
+
+    def __init__(self):
+        # valor único -> fila donde apareció primero (para repetidos en el archivo)
+        self.vistos = {col: {} for col in self.unicas}
+
+    def validar(self, fila):
+        """fila -> (valores para el INSERT, errores)."""
+        raise NotImplementedError
+
+    def resolver_lote(self, lote):
+        """Búsquedas por lote que dependen de la base (ej. clientes de las motos)."""
+
+    def _revisar_unicas(self, lote):
+        existentes = {}
+        for col in self.unicas:
+            columna = getattr(self.modelo, col)
+            candidatos = {valores[col] for _, valores, errores in lote if not errores and valores[col]}
+            existentes[col] = set()
+            if candidatos:
+                existentes[col] = set(db.session.scalars(select(columna).where(columna.in_(candidatos))))
+
+        for numero, valores, errores in lote:
+            if errores:
+                continue
+            for col in self.unicas:
+                valor = valores[col]
+                if not valor:
+                    continue
+                if valor in self.vistos[col]:
+                    errores.append(f"'{col}' {valor} repetido en el archivo (fila {self.vistos[col][valor]})")
+                elif valor in existentes[col]:
+                    errores.append(f"Ya existe un registro con {col} '{valor}'")
+            # solo cuenta como "ya usado" si la fila va a entrar
+            if not errores:
+                for col in self.unicas:
+                    if valores[col]:
+                        self.vistos[col][valores[col]] = numero
+
+    def _insertar(self, lote):
+        buenas = [(valores, errores) for _, valores, errores in lote if not errores]
+        if not buenas:
+            return 0
+
+        tabla = self.modelo.__table__
+        stmt = _insert_sin_conflicto(tabla).returning(*[tabla.c[col] for col in self.unicas])
+        guardadas = db.session.execute(stmt, [valores for valores, _ in buenas]).all()
+        marcar_tablas(db.session, tabla.name)
+
+        if len(guardadas) == len(buenas):
+            return len(buenas)
+
+        # alguna chocó con un registro que se guardó mientras tanto
+        por_columna = [{fila[i] for fila in guardadas} for i in range(len(self.unicas))]
+        for valores, errores in buenas:
+            for i, col in enumerate(self.unicas):
+                if valores[col] and valores[col] not in por_columna[i]:
+                    errores.append(f"Ya existe un registro con {col} '{valores[col]}'")
+                    break
+        return len(guardadas)
+
+    def procesar_lote(self, filas, simular):
+        """filas: [(numero, dict)] -> [(numero, errores)] de las que fallaron + insertadas."""
+        lote = []
+        for numero, fila in filas:
+            valores, errores = self.validar(fila)
+            lote.append((numero, valores, errores))
+
+        self.resolver_lote(lote)
+        self._revisar_unicas(lote)
+
+        if simular:
+            insertadas = sum(1 for _, _, errores in lote if not errores)
+        else:
+            insertadas = self._insertar(lote)
+            db.session.commit()
+
+        return [(numero, errores) for numero, _, errores in lote if errores], insertadas
+
+
+class ImportadorClientes(_Importador):
+    modelo = Cliente
+    unicas = ('correo',)
+
+    def validar(self, fila):
+        errores = []
+        valores = {
+            'nombre': _texto(fila, 'nombre', errores, 200, requerido=True),
+            'telefono': _texto(fila, 'telefono', errores, 50),
+            'correo': _texto(fila, 'correo', errores, 150),
+            'direccion': _texto(fila, 'direccion', errores),
+        }
+        if valores['correo'] and '@' not in valores['correo']:
+            errores.append(f"'correo' inválido: {valores['correo']}")
+        return valores, errores
+
+
+class ImportadorMotocicletas(_Importador):
+    modelo = Motocicleta
+    unicas = ('placa', 'vin')
+
+    def validar(self, fila):
+        errores = []
+        valores = {
+            'cliente_id': _entero(fila, 'cliente_id', errores),
+            'modelo_id': self._modelo(fila, errores),
+            'placa': _texto(fila, 'placa', errores, 50),
+            'vin': _texto(fila, 'vin', errores, 100),
+            'anio': _entero(fila, 'anio', errores, minimo=1900),
+            'cilindraje_cc': _entero(fila, 'cilindraje_cc', errores, minimo=0),
+            'color': _texto(fila, 'color', errores, 50),
+            'kilometraje_km': _entero(fila, 'kilometraje_km', errores, minimo=0) or 0,
+            'ultima_revision': _fecha(fila, 'ultima_revision', errores),
+            'notas': _texto(fila, 'notas', errores),
+        }
+        # se resuelve en resolver_lote; no va al INSERT
+        valores['_cliente_correo'] = _texto(fila, 'cliente_correo', errores)
+        if not valores['cliente_id'] and not valores['_cliente_correo']:
+            errores.append("Falta 'cliente_id' o 'cliente_correo'")
+        return valores, errores
+
+    @staticmethod
+    def _modelo(fila, errores):
+        modelo_id = _entero(fila, 'modelo_id', errores)
+        if modelo_id:
+            if not catalogo.modelo(modelo_id):
+                errores.append(f"No existe el modelo {modelo_id}")
+                return None
+            return modelo_id
+
+        marca = _texto(fila, 'marca', errores)
+        nombre = _texto(fila, 'modelo', errores)
+        if not marca and not nombre:
+            return None
+        if not (marca and nombre):
+            errores.append("Para el modelo indique 'marca' y 'modelo' (o 'modelo_id')")
+            return None
+        modelo = catalogo.modelo_por_nombre(marca, nombre)
+        if not modelo:
+            errores.append(f"No existe el modelo '{nombre}' de la marca '{marca}'")
+            return None
+        return modelo['id']
+
+    def resolver_lote(self, lote):
+        ids = {v['cliente_id'] for _, v, e in lote if not e and v['cliente_id']}
+        correos = {v['_cliente_correo'] for _, v, e in lote if not e and not v['cliente_id']}
+
+        existentes = set()
+        if ids:
+            existentes = set(db.session.scalars(select(Cliente.id).where(Cliente.id.in_(ids))))
+        por_correo = {}
+        if correos:
+            por_correo = dict(db.session.execute(
+                select(Cliente.correo, Cliente.id).where(Cliente.correo.in_(correos))
+            ).all())
+
+        for _, valores, errores in lote:
+            correo = valores.pop('_cliente_correo')
+            if errores:
+                continue
+            if valores['cliente_id']:
+                if valores['cliente_id'] not in existentes:
+                    errores.append(f"No existe el cliente {valores['cliente_id']}")
+            elif correo in por_correo:
+                valores['cliente_id'] = por_correo[correo]
+            else:
+                errores.append(f"No existe un cliente con correo '{correo}'")
+
+
+IMPORTADORES = {
+    'clientes': ImportadorClientes,
+    'motocicletas': ImportadorMotocicletas,
+}
+
+
+def _en_lotes(filas, tamano):
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def importar(tipo, archivo, formato, simular=False, lote=LOTE):
+    """
+    Importa `archivo` (binario) y devuelve el resumen:
+    {procesadas, insertadas, con_error, errores: [{fila, errores}], errores_omitidos}.
+    Puede lanzar ErrorArchivo (con el resumen parcial si ya hubo commits).
+    """
+    importador = IMPORTADORES[tipo]()
+    resumen = {
+        "tipo": tipo,
+        "simulacion": simular,
+        "procesadas": 0,
+        "insertadas": 0,
+        "con_error": 0,
+        "errores": [],
+        "errores_omitidos": 0,
+    }
+
+    try:
+        for filas in _en_lotes(leer_filas(archivo, formato), lote):
+            fallidas, insertadas = importador.procesar_lote(filas, simular)
+            resumen["procesadas"] += len(filas)
+            resumen["insertadas"] += insertadas
+            resumen["con_error"] += len(fallidas)
+            for numero, errores in fallidas:
+                if len(resumen["errores"]) < MAX_ERRORES:
+                    resumen["errores"].append({"fila": numero, "errores": errores})
+                else:
+                    resumen["errores_omitidos"] += 1
+    except ErrorArchivo as e:
+        db.session.rollback()
+        if resumen["procesadas"]:
+            e.resumen = resumen
+        raise
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return resumen
+
+
+def importar_desde_request(tipo):
+    """Para las rutas POST .../importar (multipart con el campo 'archivo')."""
+    archivo = request.files.get('archivo')
+    if not archivo or not archivo.filename:
+        return jsonify({"error": "Adjunte el archivo en el campo 'archivo'"}), 400
+
+    formato = formato_de(archivo.filename, request.args.get('formato'))
+    simular = request.args.get('simular', '').lower() in ('1', 'true', 'si')
+
+    try:
+        resumen = importar(tipo, archivo.stream, formato, simular=simular)
+    except ErrorArchivo as e:
+        # los lotes de antes del error ya quedaron guardados: se avisa cuántos
+        if e.resumen:
+            return jsonify({"error": str(e), "resumen": e.resumen}), 400
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(resumen), 200
+
+
+# --------------------------------------------------------------------
+# CLI: flask importar clientes archivo.csv
+# --------------------------------------------------------------------
+@click.group('importar')
+def importar_cli():
+    """Importación masiva desde CSV/XLSX."""
+
+
+def _comando(tipo):
+    @click.argument('ruta', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--simular', is_flag=True, help='Solo validar, no guarda nada.')
+    @click.option('--errores', 'ruta_errores', type=click.Path(dir_okay=False),
+                  help='CSV donde dejar las filas con error.')
+    @click.option('--lote', default=LOTE, show_default=True, help='Filas por lote.')
+    @with_appcontext
+    def comando(ruta, simular, ruta_errores, lote):
+        import time
+
+        inicio = time.perf_counter()
+        with open(ruta, 'rb') as archivo:
+            try:
+                resumen = importar(tipo, archivo, formato_de(ruta), simular=simular, lote=lote)
+            except ErrorArchivo as e:
+                if e.resumen and not simular:
+                    raise click.ClickException(
+                        f"{e} (antes del error ya se guardaron {e.resumen['insertadas']} filas)"
+                    )
+                raise click.ClickException(str(e))
+        total = time.perf_counter() - inicio
+
+        verbo = "válidas" if simular else "insertadas"
+        click.echo(
+            f"✓ {resumen['procesadas']} filas en {total:.2f}s: "
+            f"{resumen['insertadas']} {verbo}, {resumen['con_error']} con error"
+        )
+        if ruta_errores and resumen['errores']:
+            with open(ruta_errores, 'w', newline='', encoding='utf-8') as f:
+                w = csv.writer(f)
+                w.writerow(['fila', 'errores'])
+                for e in resumen['errores']:
+                    w.writerow([e['fila'], '; '.join(e['errores'])])
+            click.echo(f"  errores en {ruta_errores}")
+        elif resumen['errores']:
+            for e in resumen['errores'][:20]:
+                click.echo(f"  fila {e['fila']}: {'; '.join(e['errores'])}")
+
+    comando.__doc__ = f"Importa {tipo} desde un CSV o XLSX."
+    return comando
+
+
+for _tipo in IMPORTADORES:
+    importar_cli.command(_tipo)(_comando(_tipo))
@@ -0,0 +1,167 @@
+import base64
+import json
+from datetime import datetime, date
+
+from flask import request, jsonify, Response, current_app, stream_with_context
+from sqlalchemy import and_, or_
+
+# límites para ?limit=
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# cuántas filas trae el cursor del servidor por vuelta al hacer streaming
+STREAM_CHUNK = 500
+
+
+def encode_cursor(valores):
+    """
+    Convierte los valores de la última fila (ej: [fecha_ingreso, id])
+    en un string opaco para mandarlo al front como next_cursor.
+    """
+    payload = [
+        v.isoformat() if isinstance(v, (datetime, date)) else v
+        for v in valores
+    ]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columnas):
+    """
+    Inverso de encode_cursor. Usa el tipo de cada columna para
+    reconstruir fechas y validar el resto. Lanza ValueError si el cursor
+    no sirve.
+    """
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except Exception:
+        raise ValueError("cursor inválido")
+
+    if not isinstance(valores, list) or len(valores) != len(columnas):
+        raise ValueError("cursor inválido")
+
+    # None tampoco sirve: el filtro keyset no puede comparar con NULL
+    return [_convertir(col.type.python_type, valor) for col, valor in zip(columnas, valores)]
+
+
+def _convertir(tipo, valor):
+    """
+    Valor del cursor -> tipo de la columna. Un cursor bien formado pero con
+    tipos cambiados (ej: un int donde va una fecha) también es inválido,
+    si no revienta más adelante con un TypeError (500).
+    """
+    if valor is None:
+        raise ValueError("cursor inválido")
+    if tipo in (datetime, date):
+        if not isinstance(valor, str):
+            raise ValueError("cursor inválido")
+        try:
+            return datetime.fromisoformat(valor) if tipo is datetime else date.fromisoformat(valor)
+        except ValueError:
+            raise ValueError("cursor inválido")
+    if tipo is int:
+        if isinstance(valor, bool) or not isinstance(valor, int):
+            raise ValueError("cursor inválido")
+    elif tipo is float:
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+            raise ValueError("cursor inválido")
+    elif tipo is str:
+        if not isinstance(valor, str):
+            raise ValueError("cursor inválido")
+    elif isinstance(valor, (list, dict)):
+        raise ValueError("cursor inválido")
+    return valor
+
+
+def _filtro_keyset(columnas, valores, descendente):
+    """
+    Arma (a, b, c) > (va, vb, vc) expandido con OR/AND para que
+    funcione igual en Postgres y SQLite.
+    """
+    condiciones = []
+    for i, col in enumerate(columnas):
+        iguales = [columnas[j] == valores[j] for j in range(i)]
+        paso = col < valores[i] if descendente else col > valores[i]
+        condiciones.append(and_(*iguales, paso))
+    return or_(*condiciones)
+
+
+def stream_json(query, serializar, chunk=STREAM_CHUNK):
+    """
+    Devuelve el listado como un array JSON que se va mandando por pedazos.
+    La query se recorre con yield_per (cursor del lado del servidor), así
+    la memoria no crece con el tamaño de la tabla.
+    """
+    dumps = current_app.json.dumps
+
+    def generar():
+        yield '['
+        primero = True
+        pendientes = []
+        for obj in query.yield_per(chunk):
+            pendientes.append(dumps(serializar(obj)))
+            if len(pendientes) >= chunk:
+                yield ('' if primero else ',') + ','.join(pendientes)
+                primero = False
+                pendientes = []
+        if pendientes:
+            yield ('' if primero else ',') + ','.join(pendientes)
+        yield ']'
+
+    return Response(stream_with_context(generar()), mimetype='application/json')
+
+
+def paginar_respuesta(query, columnas, serializar, descendente=False):
+    """
+    Respuesta estándar para los endpoints de listado.
+
+    - Sin ?limit ni ?cursor -> el array completo de siempre, pero en streaming.
+    - Con ?limit y/o ?cursor -> una página por keyset:
+        {"items": [...], "limit": 50, "next_cursor": "..." | null}
+
+    `columnas` es el orden estable del listado, la última siempre debe ser
+    única (normalmente el id), ej: [OrdenTrabajo.fecha_ingreso, OrdenTrabajo.id].
+    Tienen que ser NOT NULL: una fila con NULL no entra en la comparación
+    del keyset y se saltearía.
+    """
+    orden = [c.desc() if descendente else c.asc() for c in columnas]
+
+    # no usamos type=int: con ?limit=abc devolvería None y saldría el listado entero
+    limite = request.args.get('limit', '').strip()
+    if limite:
+        try:
+            limite = int(limite)
+        except ValueError:
+            return jsonify({"error": "limit debe ser un número entero"}), 400
+    else:
+        limite = None
+    cursor = request.args.get('cursor', '').strip()
+
+    if limite is None and not cursor:
+        return stream_json(query.order_by(*orden), serializar)
+
+    limite = max(1, min(limite or DEFAULT_LIMIT, MAX_LIMIT))
+
+    if cursor:
+        try:
+            valores = decode_cursor(cursor, columnas)
+        except ValueError:
+            return jsonify({"error": "El cursor de paginación es inválido"}), 400
+        query = query.filter(_filtro_keyset(columnas, valores, descendente))
+
+    # pedimos uno de más para saber si hay otra página
+    filas = query.order_by(*orden).limit(limite + 1).all()
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+
+    next_cursor = None
+    if hay_mas and filas:
+        ultima = filas[-1]
+        next_cursor = encode_cursor([getattr(ultima, c.key) for c in columnas])
+
+    return jsonify({
+        "items": [serializar(f) for f in filas],
+        "limit": limite,
+        "next_cursor": next_cursor,
+    }), 200
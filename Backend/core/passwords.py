@@ -0,0 +1,246 @@
+"""
+Hash de contraseñas fuera del hilo del request.
+
+scrypt/pbkdf2 son caros a propósito (~100 ms de CPU cada uno). En un cambio
+de turno entran todos a la vez y, si se calculan en el hilo del request, el
+worker se queda sin CPU para el resto de endpoints. Acá van a un pool chico
+(PASSWORD_HASH_HILOS): hashlib suelta el GIL mientras calcula, así los demás
+requests siguen atendiéndose. Si la fila de espera pasa de PASSWORD_HASH_COLA,
+el login responde 503 en vez de acumular requests colgados.
+
+Los parámetros (PASSWORD_HASH_METODO, PASSWORD_SALT_LEN) están en Config; si
+cambian, el hash del usuario se regenera solo en su siguiente login.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import with_appcontext
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashSaturado(Exception):
+    """Hay demasiados hashes esperando; mejor pedir que reintenten."""
+
+
+def parametros_hash():
+    if has_app_context():
+        cfg = current_app.config
+        return {"method": cfg['PASSWORD_HASH_METODO'], "salt_length": cfg['PASSWORD_SALT_LEN']}
+    return {}
+
+
+class PoolHash:
+
+    def __init__(self):
+        self._pool = None
+        self._hilos = 0
+        self._lock = threading.Lock()
+        self._pendientes = 0
+        self._stats = self._stats_vacias()
+
+    @staticmethod
+    def _stats_vacias():
+        return {
+            "completados": 0,
+            "rechazados": 0,
+            "max_pendientes": 0,
+            "espera_total_seg": 0.0,
+            "espera_max_seg": 0.0,
+            "hash_total_seg": 0.0,
+        }
+
+    def _obtener_pool(self):
+        hilos = current_app.config['PASSWORD_HASH_HILOS']
+        with self._lock:
+            if self._pool is None or self._hilos != hilos:
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False)
+                self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="hash")
+                self._hilos = hilos
+            return self._pool
+
+    def ejecutar(self, fn, *args, rechazar=True, **kwargs):
+        """
+        Corre fn en el pool y espera el resultado. Con rechazar=True (login)
+        lanza HashSaturado si ya hay más de hilos + PASSWORD_HASH_COLA en vuelo.
+        """
+        if not has_app_context():
+            # scripts/seed fuera de la app: directo
+            return fn(*args, **kwargs)
+
+        pool = self._obtener_pool()
+        limite = self._hilos + current_app.config['PASSWORD_HASH_COLA']
+
+        with self._lock:
+            if rechazar and self._pendientes >= limite:
+                self._stats["rechazados"] += 1
+                raise HashSaturado()
+            self._pendientes += 1
+            self._stats["max_pendientes"] = max(self._stats["max_pendientes"], self._pendientes)
+
+        encolado = time.perf_counter()
+        tiempos = {}
+
+        def tarea():
+            inicio = time.perf_counter()
+            tiempos["espera"] = inicio - encolado
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                tiempos["hash"] = time.perf_counter() - inicio
+
+        try:
+            return pool.submit(tarea).result()
+        finally:
+            with self._lock:
+                self._pendientes -= 1
+                s = self._stats
+                s["completados"] += 1
+                s["espera_total_seg"] += tiempos.get("espera", 0.0)
+                s["espera_max_seg"] = max(s["espera_max_seg"], tiempos.get("espera", 0.0))
+                s["hash_total_seg"] += tiempos.get("hash", 0.0)
+
+    def estadisticas(self):
+        with self._lock:
+            s = dict(self._stats)
+            pendientes = self._pendientes
+            hilos = self._hilos
+        completados = s["completados"] or 1
+        return {
+            "hilos": hilos,
+            "pendientes": pendientes,
+            "en_cola": max(0, pendientes - hilos),
+            "max_pendientes": s["max_pendientes"],
+            "completados": s["completados"],
+            "rechazados": s["rechazados"],
+            "espera_promedio_ms": round(s["espera_total_seg"] * 1000 / completados, 1),
+            "espera_max_ms": round(s["espera_max_seg"] * 1000, 1),
+            "hash_promedio_ms": round(s["hash_total_seg"] * 1000 / completados, 1),
+        }
+
+    def reiniciar_estadisticas(self):
+        with self._lock:
+            self._stats = self._stats_vacias()
+
+
+pool_hash = PoolHash()
+
+
+def hashear(password):
+    """Hash nuevo con los parámetros de Config (espera turno, no rechaza)."""
+    return pool_hash.ejecutar(generate_password_hash, password, rechazar=False, **parametros_hash())
+
+
+def verificar(pwhash, password):
+    """check_password_hash en el pool. Puede lanzar HashSaturado."""
+    return pool_hash.ejecutar(check_password_hash, pwhash, password)
+
+
+@lru_cache(maxsize=8)
+def _metodo_completo(metodo):
+    """
+    Cómo queda `metodo` escrito en un hash real. werkzeug completa los
+    parámetros que faltan ('scrypt' -> 'scrypt:32768:8:1', 'pbkdf2:sha256'
+    -> 'pbkdf2:sha256:600000'), así que lo sacamos de un hash de verdad en
+    vez de comparar contra el texto de Config. Un hash por proceso y método.
+    """
+    return generate_password_hash("", method=metodo, salt_length=1).split("$", 1)[0]
+
+
+def necesita_rehash(pwhash):
+    """True si el hash se hizo con otro método/parámetros o sal que los de Config."""
+    params = parametros_hash()
+    if not params or not pwhash or pwhash.count("$") < 2:
+        return False
+    metodo, salt, _ = pwhash.split("$", 2)
+    if len(salt) != params["salt_length"]:
+        return True
+    return metodo != params["method"] and metodo != _metodo_completo(params["method"])
+
+
+# --------------------------------------------------------------------
+# CLI: medir logins por segundo con varios a la vez
+# --------------------------------------------------------------------
+@click.group('auth')
+def auth_cli():
+    """Utilidades de autenticación."""
+
+
+@auth_cli.command('benchmark-login')
+@click.option('--logins', default=40, show_default=True, help='Logins en total.')
+@click.option('--concurrencia', default=8, show_default=True, help='Logins simultáneos.')
+@with_appcontext
+def benchmark_login_cmd(logins, concurrencia):
+    """
+    Lanza logins en paralelo contra /api/auth/login y, a la vez, mide la
+    latencia de GET / para ver cuánto afecta al resto de endpoints.
+    """
+    from core.extensions import db
+    from models.catalogos import Rol
+    from models.personas import Usuario
+
+    app = current_app._get_current_object()
+    nombre, clave = "__bench_login__", "bench-login-123"
+
+    rol = Rol.query.first()
+    if not rol:
+        raise click.ClickException("No hay roles, corre primero el seed")
+    usuario = Usuario(usuario=nombre, rol_id=rol.id)
+    usuario.set_password(clave)
+    db.session.add(usuario)
+    db.session.commit()
+    usuario_id = usuario.id
+
+    pool_hash.reiniciar_estadisticas()
+    restantes = [logins]
+    codigos = {}
+    latencias = []
+    lock = threading.Lock()
+    fin = threading.Event()
+
+    def logueador():
+        cliente = app.test_client()
+        while True:
+            with lock:
+                if restantes[0] <= 0:
+                    return
+                restantes[0] -= 1
+            r = cliente.post('/api/auth/login', json={"usuario": nombre, "contrasena": clave})
+            with lock:
+                codigos[r.status_code] = codigos.get(r.status_code, 0) + 1
+
+    def sonda():
+        cliente = app.test_client()
+        while not fin.is_set():
+            t = time.perf_counter()
+            cliente.get('/')
+            latencias.append(time.perf_counter() - t)
+            fin.wait(0.01)
+
+    try:
+        hilos = [threading.Thread(target=logueador) for _ in range(concurrencia)]
+        hilo_sonda = threading.Thread(target=sonda)
+        inicio = time.perf_counter()
+        hilo_sonda.start()
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        total = time.perf_counter() - inicio
+        fin.set()
+        hilo_sonda.join()
+    finally:
+        Usuario.query.filter_by(id=usuario_id).delete()
+        db.session.commit()
+
+    latencias.sort()
+    p50 = latencias[len(latencias) // 2] * 1000 if latencias else 0
+    p95 = latencias[int(len(latencias) * 0.95)] * 1000 if latencias else 0
+
+    click.echo(f"{logins} logins en {total:.2f}s ({logins / total:.1f}/s), códigos: {codigos}")
+    click.echo(f"GET / mientras tanto: p50 {p50:.1f} ms, p95 {p95:.1f} ms ({len(latencias)} requests)")
+    click.echo(f"pool: {pool_hash.estadisticas()}")
@@ -0,0 +1,57 @@
+"""
+Perfiles de carga (eager loading) por endpoint.
+
+Cada función devuelve las opciones para .options(...) según lo que
+serializa ese endpoint, así un listado sale en un número fijo de queries
+en vez de un SELECT perezoso por fila (cliente, moto, modelo, marca...).
+
+Son funciones y no constantes porque los backrefs (OrdenTrabajo.cliente,
+Motocicleta.modelo, etc.) no existen en la clase hasta que SQLAlchemy
+configura los mappers.
+"""
+from sqlalchemy.orm import contains_eager, joinedload
+
+from models.ordenes import OrdenTrabajo
+from models.personas import Usuario
+from models.vehiculos import Motocicleta
+
+
+def orden_listado():
+    """
+    GET /api/ordenes y el dataset de reportes: la query ya hace JOIN a
+    Cliente, Motocicleta y OUTER JOIN a Empleado, reutilizamos esas
+    columnas con contains_eager.
+    Modelo/marca salen del catálogo en memoria (core.catalogo).
+    moto.cliente sale del identity map porque es el mismo cliente de la orden.
+    """
+    return [
+        contains_eager(OrdenTrabajo.cliente),
+        contains_eager(OrdenTrabajo.mecanico_asignado),
+        contains_eager(OrdenTrabajo.motocicleta),
+    ]
+
+
+def orden_resumen():
+    """
+    Dashboards: solo se usan cliente.nombre, placa/vin y nombre del mecánico.
+    Son relaciones muchos-a-uno, así que van en el mismo SELECT.
+    """
+    return [
+        joinedload(OrdenTrabajo.cliente),
+        joinedload(OrdenTrabajo.motocicleta),
+        joinedload(OrdenTrabajo.mecanico_asignado),
+    ]
+
+
+def moto_listado():
+    """GET /api/motocicletas: JOIN Cliente (modelo/marca salen de core.catalogo)."""
+    return [
+        contains_eager(Motocicleta.cliente),
+    ]
+
+
+def usuario_listado():
+    """GET /api/usuarios: OUTER JOIN a Empleado (el rol sale de core.catalogo)."""
+    return [
+        contains_eager(Usuario.empleado),
+    ]
@@ -0,0 +1,161 @@
+"""
+Chequeo de planes de consulta (`flask moteka planes`).
+
+Ejecuta los listados más usados (GET /api/ordenes con sus filtros,
+dashboard_hoy, historial, reportes de una orden y el dataset del export)
+contra la base configurada, junta el SQL que emiten y le corre EXPLAIN a
+cada SELECT. Falla si alguno recorre entera (Seq Scan / SCAN sin índice)
+una tabla grande.
+
+Sirve contra una base con datos de verdad o generados: en tablas chicas
+el planner prefiere recorrerlas y eso no es un problema, por eso solo se
+miran las que pasan de `min_filas`.
+"""
+from datetime import datetime, timedelta
+from itertools import islice
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+
+from core.extensions import db
+
+
+def _capturar(fn):
+    """Corre fn() y devuelve [(sql, params)] de los SELECT que emitió."""
+    consultas = []
+
+    def anotar(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            consultas.append((statement, parameters))
+
+    event.listen(Engine, 'before_cursor_execute', anotar)
+    try:
+        fn()
+    finally:
+        event.remove(Engine, 'before_cursor_execute', anotar)
+    return consultas
+
+
+def _recorridos_postgres(plan):
+    """Tablas con Seq Scan en un plan JSON de PostgreSQL."""
+    tablas = []
+    pendientes = [plan]
+    while pendientes:
+        nodo = pendientes.pop()
+        if nodo.get('Node Type') == 'Seq Scan':
+            tablas.append(nodo.get('Relation Name'))
+        pendientes.extend(nodo.get('Plans', []))
+    return tablas
+
+
+def _recorridos_sqlite(filas):
+    """Tablas con 'SCAN tabla' sin índice en un EXPLAIN QUERY PLAN de SQLite."""
+    tablas = []
+    for fila in filas:
+        detalle = fila[-1]
+        palabras = detalle.split()
+        if not palabras or palabras[0] != 'SCAN' or 'USING' in palabras:
+            continue
+        # 'SCAN tabla' o (SQLite viejo) 'SCAN TABLE tabla'
+        tablas.append(palabras[2] if palabras[1] == 'TABLE' and len(palabras) > 2 else palabras[1])
+    return tablas
+
+
+def explicar(sql, params):
+    """(tablas recorridas enteras, plan en texto) de una consulta ya compilada."""
+    with db.engine.connect() as conn:
+        if conn.dialect.name == 'postgresql':
+            plan = conn.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + sql, params).scalar()[0]['Plan']
+            texto = conn.exec_driver_sql('EXPLAIN ' + sql, params).scalars().all()
+            return _recorridos_postgres(plan), "\n".join(texto)
+        filas = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, params).all()
+        return _recorridos_sqlite(filas), "\n".join(f[-1] for f in filas)
+
+
+def tablas_grandes(min_filas):
+    """{tabla: filas} de las tablas de la app con al menos `min_filas`."""
+    grandes = {}
+    for tabla in db.metadata.sorted_tables:
+        filas = db.session.execute(select(func.count()).select_from(tabla)).scalar()
+        if filas >= min_filas:
+            grandes[tabla.name] = filas
+    return grandes
+
+
+def muestra():
+    """ids reales para armar los filtros (la orden más nueva y sus datos)."""
+    from models.ordenes import OrdenTrabajo
+    from models.reportes import ReporteTrabajo
+
+    orden = db.session.execute(
+        select(OrdenTrabajo.id, OrdenTrabajo.cliente_id, OrdenTrabajo.motocicleta_id, OrdenTrabajo.fecha_ingreso)
+        .order_by(OrdenTrabajo.id.desc()).limit(1)
+    ).first()
+    if orden is None:
+        return None
+    mecanico_id = db.session.execute(
+        select(OrdenTrabajo.mecanico_asignado_id)
+        .where(OrdenTrabajo.mecanico_asignado_id.isnot(None)).limit(1)
+    ).scalar()
+    orden_con_reportes = db.session.execute(
+        select(ReporteTrabajo.orden_id).order_by(ReporteTrabajo.id.desc()).limit(1)
+    ).scalar()
+    return {
+        "orden_id": orden_con_reportes or orden.id,
+        "cliente_id": orden.cliente_id,
+        "motocicleta_id": orden.motocicleta_id,
+        "mecanico_id": mecanico_id or 0,
+        "desde": ((orden.fecha_ingreso or datetime.utcnow()) - timedelta(days=7)).date().isoformat(),
+    }
+
+
+def escenarios(m):
+    """([(nombre, url)] de los GET, [(nombre, fn)] de lo que se llama directo)."""
+    from api.reportes_routes import _armar_dataset
+
+    urls = [
+        ("GET /api/ordenes", "/api/ordenes?limit=50"),
+        ("GET /api/ordenes?cliente_id", f"/api/ordenes?cliente_id={m['cliente_id']}&limit=50"),
+        ("GET /api/ordenes?motocicleta_id", f"/api/ordenes?motocicleta_id={m['motocicleta_id']}&limit=50"),
+        ("GET /api/ordenes?mecanico_id", f"/api/ordenes?mecanico_id={m['mecanico_id']}&limit=50"),
+        ("GET /api/ordenes?estado&desde", f"/api/ordenes?estado=EN_ESPERA&desde={m['desde']}&limit=50"),
+        ("GET /api/ordenes/dashboard_hoy", "/api/ordenes/dashboard_hoy"),
+        ("GET /api/ordenes/<id>/historial", f"/api/ordenes/{m['orden_id']}/historial"),
+        ("GET /api/reportes_trabajo?orden_id", f"/api/reportes_trabajo?orden_id={m['orden_id']}"),
+    ]
+    dataset = [
+        ("export dataset cliente_id", lambda: list(islice(_armar_dataset(cliente_id=m['cliente_id']), 500))),
+        ("export dataset desde", lambda: list(islice(_armar_dataset(filtros={'desde': m['desde']}), 500))),
+    ]
+    return urls, dataset
+
+
+def revisar(app, token, min_filas):
+    """
+    Corre los escenarios y devuelve [(nombre, sql, tablas_recorridas, plan)]
+    de cada SELECT. Lanza ValueError si no hay órdenes.
+    """
+    m = muestra()
+    if m is None:
+        raise ValueError("No hay órdenes en la base: cargue datos antes de revisar los planes")
+
+    grandes = tablas_grandes(min_filas)
+    urls, dataset = escenarios(m)
+    cliente = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def pedir(url):
+        def fn():
+            resp = cliente.get(url, headers=headers)
+            resp.get_data()  # los listados sin limit van en streaming
+            if resp.status_code != 200:
+                raise ValueError(f"{url} respondió {resp.status_code}")
+        return fn
+
+    resultados = []
+    for nombre, fn in [(n, pedir(u)) for n, u in urls] + dataset:
+        for sql, params in _capturar(fn):
+            recorridas, plan = explicar(sql, params)
+            resultados.append((nombre, sql, sorted({t for t in recorridas if t in grandes}), plan))
+    db.session.rollback()
+    return resultados, grandes
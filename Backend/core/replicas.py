@@ -0,0 +1,182 @@
+"""
+Lecturas a la réplica.
+
+Si DATABASE_REPLICA_URL está configurada, los GET (listados, dashboards,
+exports) leen de la réplica y lo que escribe va siempre al primario:
+
+- Cualquier flush/INSERT/UPDATE/DELETE -> primario, aunque sea en un GET.
+- Si el usuario escribió hace menos de REPLICA_VENTANA_SEG, sus GET siguen
+  yendo al primario (así ve lo que acaba de guardar aunque la réplica venga
+  atrasada). Como el próximo GET puede caer en otro worker, la hora de la
+  escritura viaja con el cliente: la respuesta del request que escribió
+  trae la cabecera X-Moteka-Escritura y la cookie moteka_escritura, y
+  cualquier worker mira las dos (el front reenvía la cabecera, la cookie
+  sirve si front y API comparten origen).
+- Si la réplica da error de conexión se deja de usar por
+  REPLICA_REINTENTO_SEG y todo vuelve al primario. El GET que se encontró
+  con el error se repite una vez contra el primario (no devuelve 500).
+- Sin réplica configurada no cambia nada.
+"""
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from flask_sqlalchemy.session import Session as SesionFlask
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+BIND_REPLICA = 'replica'
+
+# hora (epoch, time.time()) de la última escritura del cliente
+CABECERA_ESCRITURA = 'X-Moteka-Escritura'
+COOKIE_ESCRITURA = 'moteka_escritura'
+
+_lock = threading.Lock()
+_ultima_escritura = {}       # user_id -> time.time() del último commit (atajo del mismo proceso)
+_replica_caida_hasta = [0.0]
+
+
+def _usar_replica():
+    return (
+        has_request_context()
+        and g.get('leer_replica', False)
+        and time.monotonic() >= _replica_caida_hasta[0]
+    )
+
+
+class SesionRuteada(SesionFlask):
+    """Session de Flask-SQLAlchemy que manda las lecturas de los GET a la réplica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+            and _usar_replica()
+        ):
+            replica = self._db.engines.get(BIND_REPLICA)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _user_id():
+    """Usuario del token si viene uno válido; None si no (sin cortar el request)."""
+    try:
+        verify_jwt_in_request(optional=True)
+        return (get_jwt().get('user') or {}).get('id')
+    except Exception:
+        return None
+
+
+def _escritura_del_cliente():
+    """Hora de la última escritura que manda el cliente (cabecera o cookie), o None."""
+    for valor in (request.headers.get(CABECERA_ESCRITURA), request.cookies.get(COOKIE_ESCRITURA)):
+        try:
+            return float(valor)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _decidir_lectura():
+    if request.method not in ('GET', 'HEAD'):
+        return
+    if BIND_REPLICA not in (current_app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+
+    ventana = current_app.config['REPLICA_VENTANA_SEG']
+    ahora = time.time()
+
+    # abs(): tolera relojes un poco corridos entre servidores
+    escribio = _escritura_del_cliente()
+    if escribio is not None and abs(ahora - escribio) < ventana:
+        return
+
+    user_id = _user_id()
+    if user_id is not None:
+        escribio = _ultima_escritura.get(user_id)
+        if escribio is not None and ahora - escribio < ventana:
+            return
+
+    g.leer_replica = True
+
+
+def _avisar_escritura(resp):
+    """Si el request escribió, le pasa la hora al cliente para los próximos GET."""
+    escribio = g.pop('escritura_en', None)
+    if escribio is not None:
+        valor = f"{escribio:.3f}"
+        resp.headers[CABECERA_ESCRITURA] = valor
+        resp.set_cookie(
+            COOKIE_ESCRITURA, valor,
+            max_age=current_app.config['REPLICA_VENTANA_SEG'],
+            httponly=True, samesite='Lax',
+        )
+    return resp
+
+
+@event.listens_for(Session, 'after_flush')
+def _marcar_escritura(session, flush_context):
+    session.info['escribio'] = True
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_escritura(session):
+    session.info.pop('escribio', None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _anotar_escritura(session):
+    # commit con cambios dentro de un request -> los próximos GET del usuario van al primario
+    escribio = session.info.pop('escribio', None)
+    if not escribio or not has_request_context():
+        return
+    ahora = time.time()
+    g.escritura_en = ahora
+    user_id = _user_id()
+    if user_id is not None:
+        with _lock:
+            _ultima_escritura[user_id] = ahora
+
+
+def instalar_replica(app):
+    """
+    before_request que decide la base de lectura, after_request que avisa
+    las escrituras al cliente + vigilancia de errores de la réplica.
+    """
+    app.before_request(_decidir_lectura)
+
+    if BIND_REPLICA not in (app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+
+    app.after_request(_avisar_escritura)
+
+    reintento = app.config['REPLICA_REINTENTO_SEG']
+
+    def al_error_replica(contexto):
+        # error al conectar (connection None) o conexión caída
+        if contexto.is_disconnect or contexto.connection is None:
+            _replica_caida_hasta[0] = time.monotonic() + reintento
+            print("[WARN] Réplica sin conexión, leyendo del primario por", reintento, "s")
+            if has_request_context():
+                g.replica_caida = True
+
+    from core.extensions import db
+
+    def reintentar_en_primario(error):
+        # solo si el error fue de la réplica en este request, y una sola vez
+        if not g.pop('replica_caida', False) or not g.get('leer_replica'):
+            raise error
+        g.leer_replica = False
+        db.session.rollback()
+        vista = current_app.view_functions[request.endpoint]
+        return current_app.ensure_sync(vista)(**request.view_args)
+
+    app.register_error_handler(DBAPIError, reintentar_en_primario)
+
+    with app.app_context():
+        event.listen(db.engines[BIND_REPLICA], 'handle_error', al_error_replica)
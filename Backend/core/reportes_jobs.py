@@ -0,0 +1,323 @@
+"""
+Cola de exports de órdenes (tabla reporte_jobs).
+
+POST /api/reportes/jobs solo inserta la fila y responde; el archivo lo
+genera un proceso aparte:
+
+    flask --app app reportes worker --procesos 2
+
+Cada proceso toma un job PENDIENTE, arma el dataset + xlsx/pdf igual que el
+export síncrono, va guardando el avance (filas procesadas) y deja el archivo
+en REPORTES_JOBS_DIR para que la API lo mande desde disco. Los archivos
+vencidos (REPORTES_JOBS_TTL_HORAS) los borra el mismo worker.
+"""
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_, update
+
+from core.extensions import db
+from models.reportes import JobReporte, EstadoJobEnum
+
+
+def encolar_job(formato, cliente_id=None, filtros=None, usuario_id=None):
+    job = JobReporte(
+        formato=formato,
+        cliente_id=cliente_id,
+        filtros=filtros or {},
+        solicitado_por=usuario_id,
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def _filtro_abandonados(ahora):
+    """Un worker lo tomó y se murió (o se colgó) sin terminar."""
+    vencido = ahora - timedelta(seconds=current_app.config['REPORTES_JOBS_TIMEOUT_RECLAMO'])
+    return and_(
+        JobReporte.estado == EstadoJobEnum.PROCESANDO,
+        JobReporte.reclamado_en < vencido,
+    )
+
+
+def _filtro_disponibles(ahora):
+    return or_(
+        JobReporte.estado == EstadoJobEnum.PENDIENTE,
+        and_(
+            _filtro_abandonados(ahora),
+            JobReporte.intentos < current_app.config['REPORTES_JOBS_MAX_INTENTOS'],
+        ),
+    )
+
+
+def _descartar_abandonados(ahora):
+    """
+    Abandonados que ya usaron todos los intentos -> FALLIDO. Si no, se
+    quedarían en PROCESANDO para siempre y el front no dejaría de consultar.
+    """
+    return (
+        db.session.query(JobReporte)
+        .filter(
+            _filtro_abandonados(ahora),
+            JobReporte.intentos >= current_app.config['REPORTES_JOBS_MAX_INTENTOS'],
+        )
+        .update({
+            JobReporte.estado: EstadoJobEnum.FALLIDO,
+            JobReporte.error: "El worker no terminó el reporte (timeout del reclamo)",
+            JobReporte.terminado_en: ahora,
+        }, synchronize_session=False)
+    )
+
+
+def _cerrar_si_es_mio(job_id, token, **valores):
+    """
+    Deja el job en su estado final solo si este worker todavía lo tiene
+    reclamado. Si se venció el reclamo y lo tomó otro, devuelve False y no
+    toca nada (si no, los dos lo terminarían).
+    """
+    cerrado = (
+        db.session.query(JobReporte)
+        .filter(
+            JobReporte.id == job_id,
+            JobReporte.reclamado_por == token,
+            JobReporte.estado == EstadoJobEnum.PROCESANDO,
+        )
+        .update(valores, synchronize_session=False)
+    )
+    db.session.commit()
+    return bool(cerrado)
+
+
+def reclamar_job():
+    """
+    Marca el job pendiente más viejo como PROCESANDO para este worker.
+    Igual que la bandeja de correos: el UPDATE vuelve a chequear el estado y
+    en Postgres se usa SKIP LOCKED, así dos procesos no toman el mismo job.
+    """
+    ahora = datetime.utcnow()
+    _descartar_abandonados(ahora)
+    disponibles = _filtro_disponibles(ahora)
+    token = uuid.uuid4().hex
+
+    fila = (
+        db.session.query(JobReporte.id)
+        .filter(disponibles)
+        .order_by(JobReporte.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if not fila:
+        db.session.commit()
+        return None
+
+    tomado = (
+        db.session.query(JobReporte)
+        .filter(JobReporte.id == fila[0], disponibles)
+        .update({
+            JobReporte.estado: EstadoJobEnum.PROCESANDO,
+            JobReporte.reclamado_por: token,
+            JobReporte.reclamado_en: ahora,
+            JobReporte.intentos: JobReporte.intentos + 1,
+            JobReporte.filas_procesadas: 0,
+        }, synchronize_session=False)
+    )
+    db.session.commit()
+    if not tomado:
+        return None
+
+    return JobReporte.query.filter_by(id=fila[0], reclamado_por=token).first()
+
+
+def _guardar_avance(job_id, token, engine=None, **valores):
+    """
+    Actualiza el avance por una conexión aparte: la sesión está recorriendo
+    el dataset con yield_per y un commit ahí cortaría el cursor. También
+    renueva reclamado_en (latido): así un job largo no se toma por abandonado.
+    """
+    tabla = JobReporte.__table__
+    with (engine or db.engine).begin() as conn:
+        conn.execute(
+            update(tabla)
+            .where(tabla.c.id == job_id)
+            .where(tabla.c.reclamado_por == token)
+            .where(tabla.c.estado == EstadoJobEnum.PROCESANDO)
+            .values(reclamado_en=datetime.utcnow(), **valores)
+        )
+
+
+def _latir(engine, job_id, token, cada, parar):
+    """
+    Hilo que renueva reclamado_en cada `cada` segundos mientras corre el job,
+    también en las partes sin avance (armar el PDF) y en SQLite, donde el
+    avance no se guarda. En SQLite no se puede escribir mientras se lee el
+    dataset: ese latido falla y se reintenta en la próxima vuelta.
+    """
+    while not parar.wait(cada):
+        try:
+            _guardar_avance(job_id, token, engine=engine)
+        except Exception as e:
+            print(f"[WARN] No se pudo renovar el reclamo del job #{job_id}:", e)
+
+
+def _ruta_archivo(job, filename):
+    carpeta = current_app.config['REPORTES_JOBS_DIR']
+    os.makedirs(carpeta, exist_ok=True)
+    extension = os.path.splitext(filename)[1]
+    return os.path.join(carpeta, f"job_{job.id}_{uuid.uuid4().hex[:8]}{extension}")
+
+
+def ejecutar_job(job):
+    """Genera el archivo del job y lo deja LISTO (o FALLIDO con el error)."""
+    # import acá: api.reportes_routes importa este módulo
+    from api.reportes_routes import _contar_dataset, _generar_export
+
+    job_id, token = job.id, job.reclamado_por
+    # en SQLite escribir mientras se lee el dataset bloquea la base:
+    # ahí el avance salta de 0 a 100
+    con_avance = db.engine.dialect.name != 'sqlite'
+
+    parar = threading.Event()
+    latido = threading.Thread(
+        target=_latir,
+        args=(db.engine, job_id, token,
+              max(1, current_app.config['REPORTES_JOBS_TIMEOUT_RECLAMO'] / 3), parar),
+        name=f"latido-job-{job_id}", daemon=True,
+    )
+    latido.start()
+
+    try:
+        total = _contar_dataset(job.cliente_id, job.filtros)
+        job.total_filas = total
+        db.session.commit()
+
+        ultimo = [0.0]
+
+        def al_avanzar(n):
+            ahora = time.monotonic()
+            if con_avance and ahora - ultimo[0] >= 1:
+                ultimo[0] = ahora
+                _guardar_avance(job_id, token, filas_procesadas=n)
+
+        output, filename, mimetype = _generar_export(
+            job.formato, cliente_id=job.cliente_id, filtros=job.filtros,
+            al_avanzar=al_avanzar,
+        )
+
+        ruta = _ruta_archivo(job, filename)
+        with output, open(ruta + ".part", "wb") as destino:
+            output.seek(0)
+            shutil.copyfileobj(output, destino)
+        os.replace(ruta + ".part", ruta)
+    except Exception as e:
+        parar.set()
+        latido.join()
+        db.session.rollback()
+        print(f"[WARN] Job de reporte #{job_id} falló:", e)
+        if job.intentos >= current_app.config['REPORTES_JOBS_MAX_INTENTOS']:
+            valores = {"estado": EstadoJobEnum.FALLIDO, "terminado_en": datetime.utcnow()}
+        else:
+            valores = {"estado": EstadoJobEnum.PENDIENTE}
+        _cerrar_si_es_mio(job_id, token, error=str(e), **valores)
+        return db.session.get(JobReporte, job_id)
+
+    parar.set()
+    latido.join()
+    listo = _cerrar_si_es_mio(
+        job_id, token,
+        estado=EstadoJobEnum.LISTO,
+        filas_procesadas=total,
+        ruta_archivo=ruta,
+        nombre_archivo=filename,
+        mimetype=mimetype,
+        error=None,
+        terminado_en=datetime.utcnow(),
+    )
+    if not listo:
+        # lo reclamó otro worker: su archivo es el que vale
+        print(f"[WARN] Job de reporte #{job_id} ya no es de este worker, se descarta el archivo")
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+    return db.session.get(JobReporte, job_id)
+
+
+def limpiar_vencidos():
+    """Borra archivos y filas de jobs terminados hace más de REPORTES_JOBS_TTL_HORAS."""
+    limite = datetime.utcnow() - timedelta(hours=current_app.config['REPORTES_JOBS_TTL_HORAS'])
+    vencidos = (
+        JobReporte.query
+        .filter(JobReporte.estado.in_([EstadoJobEnum.LISTO, EstadoJobEnum.FALLIDO]))
+        .filter(JobReporte.terminado_en < limite)
+        .all()
+    )
+    for job in vencidos:
+        if job.ruta_archivo:
+            try:
+                os.remove(job.ruta_archivo)
+            except FileNotFoundError:
+                pass
+        db.session.delete(job)
+    db.session.commit()
+    return len(vencidos)
+
+
+def bucle_worker(una_vez=False, espera=3.0, parar=None):
+    """Toma jobs hasta que no haya más (una_vez) o hasta que lo paren."""
+    parar = parar or threading.Event()
+    try:
+        while not parar.is_set():
+            job = reclamar_job()
+            if job:
+                ejecutar_job(job)
+                continue
+            if una_vez:
+                break
+            limpiar_vencidos()
+            parar.wait(espera)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.session.remove()
+
+
+def _proceso_worker(una_vez, espera):
+    # proceso nuevo (spawn): arma su propia app y su pool de conexiones
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        bucle_worker(una_vez=una_vez, espera=espera)
+
+
+def correr_worker(procesos=1, una_vez=False, espera=3.0):
+    """
+    Con 1 proceso corre acá mismo (necesita app context). Con más, lanza
+    procesos separados: el xlsx/pdf es CPU puro y así no se pelean por el GIL.
+    """
+    if procesos <= 1:
+        bucle_worker(una_vez=una_vez, espera=espera)
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    workers = [
+        ctx.Process(target=_proceso_worker, args=(una_vez, espera), name=f"reportes-{i}")
+        for i in range(procesos)
+    ]
+    for w in workers:
+        w.start()
+    try:
+        for w in workers:
+            w.join()
+    except KeyboardInterrupt:
+        # Ctrl+C también les llega a los hijos; esperamos a que terminen su job
+        for w in workers:
+            w.join()
@@ -0,0 +1,296 @@
+"""
+Datos sintéticos para probar a escala (`flask moteka generar`).
+
+Llena marcas/modelos, mecánicos (empleado + usuario), clientes, motos y
+órdenes con historial de estados, pagos y reportes técnicos que se
+parecen a los de un taller de verdad:
+- las órdenes entran repartidas en los últimos `anios` años,
+- cada una pasa EN_ESPERA -> EN_REPARACION -> FINALIZADA (o se cancela
+  en espera) con tiempos al azar; lo que todavía no pasó queda abierto,
+- las finalizadas tienen uno o dos pagos, las reparadas 1 a 3 reportes.
+
+Va por lotes con INSERT masivos (Core + RETURNING) y no guarda filas en
+memoria, solo ids, así sirve de 10 mil a 5 millones de órdenes. Con la
+misma semilla sale lo mismo. Al final reconstruye estadisticas_diarias y
+carga_mecanicos.
+"""
+import random
+from array import array
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, insert, select
+
+from core import estadisticas
+from core.catalogo import catalogo
+from core.extensions import db
+from models.catalogos import MarcaMoto, ModeloMoto
+from models.ordenes import OrdenTrabajo, EstadoOrden, Pago, TipoPagoEnum, EstadoOrdenEnum as E
+from models.personas import Cliente, Empleado, Usuario
+from models.reportes import ReporteTrabajo
+from models.vehiculos import Motocicleta
+
+MARCAS = {
+    'Honda': ['CB190R', 'XR150L', 'CBR250R', 'Navi', 'Wave 110'],
+    'Yamaha': ['FZ 2.0', 'YBR 125', 'MT-03', 'XTZ 150', 'Crypton'],
+    'Suzuki': ['GN 125', 'Gixxer 150', 'DR 200', 'AX4'],
+    'Kawasaki': ['Ninja 400', 'KLX 150', 'Z400'],
+    'Bajaj': ['Pulsar NS200', 'Boxer 150', 'Dominar 400'],
+    'Italika': ['FT150', 'DM200', 'WS150'],
+    'KTM': ['Duke 200', 'Duke 390', 'RC 390'],
+    'TVS': ['Apache RTR 160', 'Raider 125'],
+}
+
+NOMBRES = [
+    'José', 'María', 'Luis', 'Ana', 'Carlos', 'Sofía', 'Jorge', 'Lucía', 'Miguel', 'Andrea',
+    'Pedro', 'Gabriela', 'Juan', 'Daniela', 'Diego', 'Valeria', 'Fernando', 'Paola', 'Ricardo', 'Karla',
+]
+APELLIDOS = [
+    'García', 'López', 'Hernández', 'Martínez', 'González', 'Pérez', 'Rodríguez', 'Sánchez',
+    'Ramírez', 'Cruz', 'Flores', 'Morales', 'Reyes', 'Jiménez', 'Ortiz', 'Castillo', 'Mendoza', 'Vásquez',
+]
+COLORES = ['Negro', 'Rojo', 'Azul', 'Blanco', 'Gris', 'Verde', 'Amarillo', 'Naranja']
+TRABAJOS = [
+    'Cambio de aceite y filtro', 'Ajuste y lubricación de cadena', 'Cambio de pastillas de freno',
+    'Revisión del sistema eléctrico', 'Limpieza de carburador', 'Cambio de llanta trasera',
+    'Calibración de válvulas', 'Cambio de bujía', 'Revisión de suspensión delantera',
+    'Cambio de kit de arrastre', 'Cambio de batería', 'Ajuste de embrague',
+]
+
+# horas promedio (distribución exponencial) de cada tramo
+HORAS_ESPERA = 8
+HORAS_REPARACION = 30
+PROB_CANCELADA = 0.05
+PROB_SIN_MECANICO = 0.1
+PROB_DOS_PAGOS = 0.15
+PAGOS_PESOS = {'EFECTIVO': 50, 'TARJETA': 35, 'TRANSFERENCIA': 15}
+
+CONTRASENA_MECANICOS = 'mecanico123'
+
+
+def _nombre(i):
+    """Nombre de persona a partir de un índice (sin guardar strings en memoria)."""
+    return (
+        f"{NOMBRES[(i * 7919) % len(NOMBRES)]} "
+        f"{APELLIDOS[(i * 104729) % len(APELLIDOS)]} "
+        f"{APELLIDOS[(i * 1299709 + 3) % len(APELLIDOS)]}"
+    )
+
+
+def _insertar(modelo, filas):
+    """INSERT masivo devolviendo los ids en el mismo orden que `filas`."""
+    if not filas:
+        return []
+    stmt = insert(modelo).returning(modelo.id, sort_by_parameter_order=True)
+    return list(db.session.scalars(stmt, filas))
+
+
+def _siguiente_id(modelo):
+    return (db.session.execute(select(func.max(modelo.id))).scalar() or 0) + 1
+
+
+def _asegurar_modelos():
+    """[(modelo_id, marca, modelo)] del catálogo sintético, creando lo que falte."""
+    resultado = []
+    for marca_nombre, modelos in MARCAS.items():
+        marca = MarcaMoto.query.filter_by(nombre=marca_nombre).first()
+        if not marca:
+            marca = MarcaMoto(nombre=marca_nombre)
+            db.session.add(marca)
+            db.session.flush()
+        for modelo_nombre in modelos:
+            modelo = ModeloMoto.query.filter_by(marca_id=marca.id, nombre=modelo_nombre).first()
+            if not modelo:
+                modelo = ModeloMoto(marca_id=marca.id, nombre=modelo_nombre)
+                db.session.add(modelo)
+                db.session.flush()
+            resultado.append((modelo.id, marca_nombre, modelo_nombre))
+    db.session.commit()
+    return resultado
+
+
+def _asegurar_mecanicos(cantidad):
+    """[(empleado_id, nombre)] con al menos `cantidad` mecánicos (empleado + usuario)."""
+    rol = catalogo.rol_por_nombre('mecanico')
+    if not rol:
+        raise ValueError("No existe el rol 'mecanico' (flask --app app moteka init)")
+
+    mecanicos = [(m["id"], m["nombre"]) for m in catalogo.mecanicos()]
+    n = 0
+    while len(mecanicos) < cantidad:
+        n += 1
+        usuario = f"mecanico{n}"
+        if Usuario.query.filter_by(usuario=usuario).first():
+            continue
+        empleado = Empleado(nombre=_nombre(len(mecanicos) + 17))
+        db.session.add(empleado)
+        db.session.flush()
+        nuevo = Usuario(usuario=usuario, rol_id=rol["id"], empleado_id=empleado.id)
+        nuevo.set_password(CONTRASENA_MECANICOS)
+        db.session.add(nuevo)
+        mecanicos.append((empleado.id, empleado.nombre))
+    db.session.commit()
+    return mecanicos
+
+
+def _historia(rng, ingreso, ahora):
+    """
+    (estado final, fecha_salida, [(estado, fecha)], inicio_reparacion)
+    de una orden que entró en `ingreso`. Lo que caería después de `ahora`
+    todavía no pasó, así las órdenes recientes quedan abiertas.
+    """
+    eventos = [(E.EN_ESPERA, ingreso)]
+    t1 = ingreso + timedelta(hours=rng.expovariate(1 / HORAS_ESPERA))
+    if t1 > ahora:
+        return E.EN_ESPERA, None, eventos, None
+    if rng.random() < PROB_CANCELADA:
+        eventos.append((E.CANCELADA, t1))
+        return E.CANCELADA, t1, eventos, None
+
+    eventos.append((E.EN_REPARACION, t1))
+    t2 = t1 + timedelta(hours=rng.expovariate(1 / HORAS_REPARACION))
+    if t2 > ahora:
+        return E.EN_REPARACION, None, eventos, t1
+    eventos.append((E.FINALIZADA, t2))
+    return E.FINALIZADA, t2, eventos, t1
+
+
+def generar(ordenes, anios=3, clientes=None, mecanicos=8, semilla=1, lote=5000, progreso=None):
+    """
+    Genera `ordenes` órdenes (y lo que cuelga de ellas). `clientes` por
+    defecto es ordenes / 4. `progreso(tabla, hechas, total)` se llama
+    después de cada lote. Devuelve {tabla: filas insertadas}.
+    """
+    rng = random.Random(semilla)
+    progreso = progreso or (lambda *a: None)
+    clientes = clientes or max(1, ordenes // 4)
+    totales = {'clientes': 0, 'motocicletas': 0, 'ordenes_trabajo': 0,
+               'estados_orden': 0, 'pagos': 0, 'reportes_trabajo': 0}
+
+    modelos = _asegurar_modelos()
+    mecs = _asegurar_mecanicos(mecanicos)
+
+    # --- clientes: solo guardamos ids, el nombre sale de _nombre(i) ---
+    base_cliente = _siguiente_id(Cliente)
+    cliente_ids = array('q')
+    for inicio in range(0, clientes, lote):
+        filas = []
+        for i in range(inicio, min(inicio + lote, clientes)):
+            n = base_cliente + i
+            filas.append({
+                "nombre": _nombre(n),
+                "telefono": f"5{rng.randrange(10**7, 10**8)}",
+                "correo": f"cliente{n}@sintetico.test",
+                "direccion": f"Zona {rng.randint(1, 25)}, calle {rng.randint(1, 40)}",
+            })
+        cliente_ids.extend(_insertar(Cliente, filas))
+        db.session.commit()
+        progreso('clientes', len(cliente_ids), clientes)
+    totales['clientes'] = len(cliente_ids)
+
+    # --- motos: 1 por cliente y un 20% con una segunda ---
+    base_moto = _siguiente_id(Motocicleta)
+    moto_ids, moto_cliente, moto_modelo = array('q'), array('q'), array('q')
+    duenos = list(range(len(cliente_ids))) + [c for c in range(len(cliente_ids)) if rng.random() < 0.2]
+    for inicio in range(0, len(duenos), lote):
+        filas = []
+        for j in range(inicio, min(inicio + lote, len(duenos))):
+            c = duenos[j]
+            m = rng.randrange(len(modelos))
+            moto_cliente.append(c)
+            moto_modelo.append(m)
+            filas.append({
+                "cliente_id": cliente_ids[c],
+                "modelo_id": modelos[m][0],
+                "placa": f"S{base_moto + j:07d}",
+                "vin": f"SIN{base_moto + j:014d}",
+                "anio": rng.randint(2008, datetime.utcnow().year),
+                "cilindraje_cc": rng.choice([110, 125, 150, 200, 250, 390, 400]),
+                "color": rng.choice(COLORES),
+                "kilometraje_km": rng.randint(500, 80000),
+            })
+        moto_ids.extend(_insertar(Motocicleta, filas))
+        db.session.commit()
+        progreso('motocicletas', len(moto_ids), len(duenos))
+    totales['motocicletas'] = len(moto_ids)
+    del duenos
+
+    # --- órdenes + historial + pagos + reportes, un lote a la vez ---
+    ahora = datetime.utcnow()
+    desde = ahora - timedelta(days=365 * anios)
+    paso = (ahora - desde) / ordenes
+    tipos_pago = [TipoPagoEnum[t] for t in PAGOS_PESOS]
+    pesos_pago = list(PAGOS_PESOS.values())
+
+    for inicio in range(0, ordenes, lote):
+        datos = []   # (orden, moto, mecánico, historia) por orden del lote
+        filas = []
+        for k in range(inicio, min(inicio + lote, ordenes)):
+            # fecha_ingreso creciente con el id, como en la realidad
+            ingreso = desde + paso * (k + rng.random())
+            j = rng.randrange(len(moto_ids))
+            mec = None if rng.random() < PROB_SIN_MECANICO else mecs[rng.randrange(len(mecs))]
+            estado, salida, eventos, reparacion = _historia(rng, ingreso, ahora)
+            datos.append((j, mec, estado, salida, eventos, reparacion))
+            filas.append({
+                "cliente_id": cliente_ids[moto_cliente[j]],
+                "motocicleta_id": moto_ids[j],
+                "mecanico_asignado_id": mec[0] if mec else None,
+                "estado": estado,
+                "fecha_ingreso": ingreso,
+                "fecha_salida": salida,
+                "observaciones": rng.choice(TRABAJOS) if rng.random() < 0.5 else None,
+                "creado_en": ingreso,
+                "actualizado_en": salida or eventos[-1][1],
+            })
+        orden_ids = _insertar(OrdenTrabajo, filas)
+
+        historial, pagos, reportes = [], [], []
+        for orden_id, (j, mec, estado, salida, eventos, reparacion) in zip(orden_ids, datos):
+            for n, (est, fecha) in enumerate(eventos):
+                historial.append({
+                    "orden_id": orden_id, "estado": est, "creado_en": fecha,
+                    "notas": "Orden creada" if n == 0 else None,
+                })
+
+            if estado == E.FINALIZADA:
+                montos = [Decimal(rng.randint(15000, 350000)) / 100]
+                if rng.random() < PROB_DOS_PAGOS:
+                    montos.append(Decimal(rng.randint(5000, 100000)) / 100)
+                for monto in montos:
+                    pagos.append({
+                        "orden_id": orden_id,
+                        "tipo": rng.choices(tipos_pago, pesos_pago)[0],
+                        "monto": monto,
+                        "pagado_en": salida + timedelta(minutes=rng.randint(5, 240)),
+                    })
+
+            if reparacion and mec:
+                fin = salida or ahora
+                _, marca_nombre, modelo_nombre = modelos[moto_modelo[j]]
+                for _ in range(rng.randint(1, 3)):
+                    reportes.append({
+                        "orden_id": orden_id,
+                        "mecanico_id": mec[0],
+                        "descripcion": rng.choice(TRABAJOS),
+                        "cliente_nombre": _nombre(base_cliente + moto_cliente[j]),
+                        "moto_placa": f"S{base_moto + j:07d}",
+                        "moto_vin": f"SIN{base_moto + j:014d}",
+                        "marca_nombre": marca_nombre,
+                        "modelo_nombre": modelo_nombre,
+                        "mecanico_nombre": mec[1],
+                        "creado_en": reparacion + (fin - reparacion) * rng.random(),
+                    })
+
+        for modelo, tabla_filas in ((EstadoOrden, historial), (Pago, pagos), (ReporteTrabajo, reportes)):
+            if tabla_filas:
+                db.session.execute(insert(modelo), tabla_filas)
+            totales[modelo.__tablename__] += len(tabla_filas)
+        db.session.commit()
+        totales['ordenes_trabajo'] += len(orden_ids)
+        progreso('ordenes_trabajo', totales['ordenes_trabajo'], ordenes)
+
+    estadisticas.reconstruir_estadisticas()
+    estadisticas.reconstruir_carga()
+    catalogo.invalidar()
+    return totales
@@ -1,5 +1,6 @@
 from datetime import datetime
 from core.extensions import db
+from core.catalogo import catalogo
 
 class MarcaMoto(db.Model):
     __tablename__ = 'marcas_moto'
@@ -32,12 +33,17 @@ class ModeloMoto(db.Model):
     
     motocicletas = db.relationship('Motocicleta', backref='modelo', lazy=True)
     
-    def to_dict(self):
+    def to_dict(self, marca=None):
+        # marca: dict ya armado (lo pasa el catálogo al cargarse); si no, sale del catálogo
+        if marca is None and self.marca_id is not None:
+            marca = catalogo.marca(self.marca_id)
+        if marca is None and self.marca:
+            marca = self.marca.to_dict()
         return {
             'id': self.id,
             'nombre': self.nombre,
             'marca_id': self.marca_id,
-            'marca': self.marca.to_dict() if self.marca else None,
+            'marca': marca,
             'creado_en': self.creado_en.isoformat() if self.creado_en else None,
             'actualizado_en': self.actualizado_en.isoformat() if self.actualizado_en else None
         }
@@ -0,0 +1,85 @@
+from datetime import datetime
+from core.extensions import db
+
+
+class EstadisticaDiaria(db.Model):
+    """
+    Rollup por día (y por mecánico) que se mantiene en la misma transacción
+    que crea/cambia órdenes o registra pagos. Los dashboards leen de acá.
+
+    mecanico_id = 0 es el total del taller (incluye órdenes sin asignar).
+    Los contadores de estado son por fecha de INGRESO de la orden, con el
+    estado que tiene actualmente. Los ingresos son por fecha del pago.
+    """
+    __tablename__ = 'estadisticas_diarias'
+    __table_args__ = (db.UniqueConstraint('fecha', 'mecanico_id', name='_fecha_mecanico_uc'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.Date, nullable=False)
+    mecanico_id = db.Column(db.Integer, nullable=False, default=0)
+
+    ordenes_total = db.Column(db.Integer, nullable=False, default=0)
+    en_espera = db.Column(db.Integer, nullable=False, default=0)
+    en_reparacion = db.Column(db.Integer, nullable=False, default=0)
+    finalizadas = db.Column(db.Integer, nullable=False, default=0)
+    canceladas = db.Column(db.Integer, nullable=False, default=0)
+
+    ingresos_efectivo = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    ingresos_tarjeta = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    ingresos_transferencia = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+    actualizado_en = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def ingresos_total(self):
+        return (
+            (self.ingresos_efectivo or 0)
+            + (self.ingresos_tarjeta or 0)
+            + (self.ingresos_transferencia or 0)
+        )
+
+    def to_dict(self):
+        return {
+            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'mecanico_id': self.mecanico_id or None,
+            'ordenes': {
+                'total': self.ordenes_total,
+                'en_espera': self.en_espera,
+                'en_reparacion': self.en_reparacion,
+                'finalizadas': self.finalizadas,
+                'canceladas': self.canceladas,
+            },
+            'ingresos': {
+                'EFECTIVO': float(self.ingresos_efectivo or 0),
+                'TARJETA': float(self.ingresos_tarjeta or 0),
+                'TRANSFERENCIA': float(self.ingresos_transferencia or 0),
+                'total': float(self.ingresos_total),
+            },
+            'actualizado_en': self.actualizado_en.isoformat() if self.actualizado_en else None
+        }
+
+
+class CargaMecanico(db.Model):
+    """
+    Órdenes ABIERTAS (en espera / en reparación) que tiene asignadas cada
+    empleado ahora mismo. Se mantiene en la misma transacción que crea,
+    reasigna o cambia de estado una orden (core.estadisticas), así para
+    asignar no hay que contar órdenes. Sin fila = sin órdenes abiertas.
+    """
+    __tablename__ = 'carga_mecanicos'
+
+    empleado_id = db.Column(db.Integer, db.ForeignKey('empleados.id'), primary_key=True)
+    en_espera = db.Column(db.Integer, nullable=False, default=0)
+    en_reparacion = db.Column(db.Integer, nullable=False, default=0)
+    actualizado_en = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def abiertas(self):
+        return (self.en_espera or 0) + (self.en_reparacion or 0)
+
+    def to_dict(self):
+        return {
+            'en_espera': self.en_espera or 0,
+            'en_reparacion': self.en_reparacion or 0,
+            'abiertas': self.abiertas,
+        }
@@ -0,0 +1,49 @@
+from datetime import datetime
+from core.extensions import db
+import enum
+
+
+class EstadoCorreoEnum(enum.Enum):
+    PENDIENTE = "PENDIENTE"    # esperando a un worker (o a su próximo reintento)
+    ENVIANDO = "ENVIANDO"      # un worker lo tomó
+    ENVIADO = "ENVIADO"
+    FALLIDO = "FALLIDO"        # se agotaron los reintentos (dead-letter)
+
+
+class CorreoSaliente(db.Model):
+    """
+    Bandeja de salida. La ruta inserta la fila en la MISMA transacción del
+    cambio (ej: cambio de estado de la orden) y un worker aparte la manda.
+    """
+    __tablename__ = 'email_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    destinatario = db.Column(db.String(150), nullable=False)
+    asunto = db.Column(db.String(255), nullable=False)
+    cuerpo = db.Column(db.Text, nullable=False)
+
+    estado = db.Column(db.Enum(EstadoCorreoEnum), nullable=False,
+                       default=EstadoCorreoEnum.PENDIENTE, index=True)
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    proximo_intento_en = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    ultimo_error = db.Column(db.Text)
+
+    # quién lo tomó y cuándo (para recuperar los que quedaron colgados)
+    reclamado_por = db.Column(db.String(64))
+    reclamado_en = db.Column(db.DateTime)
+
+    creado_en = db.Column(db.DateTime, default=datetime.utcnow)
+    enviado_en = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "destinatario": self.destinatario,
+            "asunto": self.asunto,
+            "estado": self.estado.value if self.estado else None,
+            "intentos": self.intentos,
+            "proximo_intento_en": self.proximo_intento_en.isoformat() if self.proximo_intento_en else None,
+            "ultimo_error": self.ultimo_error,
+            "creado_en": self.creado_en.isoformat() if self.creado_en else None,
+            "enviado_en": self.enviado_en.isoformat() if self.enviado_en else None,
+        }
@@ -16,17 +16,26 @@ class TipoPagoEnum(enum.Enum):
 
 class OrdenTrabajo(db.Model):
     __tablename__ = 'ordenes_trabajo'
+    __table_args__ = (
+        # dashboards: órdenes de hoy en espera / en reparación
+        db.Index('ix_ordenes_trabajo_estado_fecha_ingreso', 'estado', 'fecha_ingreso'),
+        # analytics: finalizadas por rango de fecha_salida
+        db.Index('ix_ordenes_trabajo_estado_fecha_salida', 'estado', 'fecha_salida'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
 
-    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False)
-    motocicleta_id = db.Column(db.Integer, db.ForeignKey('motocicletas.id'), nullable=False)
+    # índices en las FK: filtros de GET /api/ordenes y del export
+    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False, index=True)
+    motocicleta_id = db.Column(db.Integer, db.ForeignKey('motocicletas.id'), nullable=False, index=True)
 
     # empleado asignado como mecánico responsable
-    mecanico_asignado_id = db.Column(db.Integer, db.ForeignKey('empleados.id'), nullable=True)
+    mecanico_asignado_id = db.Column(db.Integer, db.ForeignKey('empleados.id'), nullable=True, index=True)
 
     estado = db.Column(db.Enum(EstadoOrdenEnum), nullable=False, default=EstadoOrdenEnum.EN_ESPERA)
-    fecha_ingreso = db.Column(db.DateTime, default=datetime.utcnow)
+    # índice: el listado pagina por (fecha_ingreso, id) y los filtros desde/hasta.
+    # NOT NULL: el keyset no puede comparar contra NULL (ver rellenar_columnas_keyset)
+    fecha_ingreso = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     fecha_salida = db.Column(db.DateTime, nullable=True)
     observaciones = db.Column(db.Text)
     creado_en = db.Column(db.DateTime, default=datetime.utcnow)
@@ -80,7 +89,7 @@ class EstadoOrden(db.Model):
     __tablename__ = 'estados_orden'
     
     id = db.Column(db.Integer, primary_key=True)
-    orden_id = db.Column(db.Integer, db.ForeignKey('ordenes_trabajo.id'), nullable=False)
+    orden_id = db.Column(db.Integer, db.ForeignKey('ordenes_trabajo.id'), nullable=False, index=True)
     estado = db.Column(db.Enum(EstadoOrdenEnum), nullable=False)
     notas = db.Column(db.Text)
     creado_en = db.Column(db.DateTime, default=datetime.utcnow)
@@ -99,10 +108,11 @@ class Pago(db.Model):
     __tablename__ = 'pagos'
     
     id = db.Column(db.Integer, primary_key=True)
-    orden_id = db.Column(db.Integer, db.ForeignKey('ordenes_trabajo.id'), nullable=False)
+    orden_id = db.Column(db.Integer, db.ForeignKey('ordenes_trabajo.id'), nullable=False, index=True)
     tipo = db.Column(db.Enum(TipoPagoEnum), nullable=False)
     monto = db.Column(db.Numeric(12, 2), nullable=False)
-    pagado_en = db.Column(db.DateTime, default=datetime.utcnow)
+    # índice: listados y cierres por rango de fechas. NOT NULL: pagina por keyset
+    pagado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     
     def to_dict(self):
         return {
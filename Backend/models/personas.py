@@ -1,5 +1,6 @@
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from core import passwords
+from core.catalogo import catalogo
 from core.extensions import db
 
 class Cliente(db.Model):
@@ -63,17 +64,25 @@ class Usuario(db.Model):
     actualizado_en = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def set_password(self, password):
-        self.contrasena_hash = generate_password_hash(password)
+        self.contrasena_hash = passwords.hashear(password)
     
     def check_password(self, password):
-        return check_password_hash(self.contrasena_hash, password)
+        # puede lanzar passwords.HashSaturado si hay demasiados logins a la vez
+        return passwords.verificar(self.contrasena_hash, password)
+    
+    def rol_dict(self):
+        """Rol desde el catálogo en memoria (sin query); si no está, de la relación."""
+        rol = catalogo.rol(self.rol_id)
+        if rol is None and self.rol:
+            rol = self.rol.to_dict()
+        return rol
     
     def to_dict(self):
         return {
             'id': self.id,
             'usuario': self.usuario,
             'correo': self.correo,
-            'rol': self.rol.to_dict() if self.rol else None,
+            'rol': self.rol_dict(),
             'empleado': self.empleado.to_dict() if self.empleado else None,
             'creado_en': self.creado_en.isoformat() if self.creado_en else None,
             'actualizado_en': self.actualizado_en.isoformat() if self.actualizado_en else None
@@ -1,8 +1,11 @@
 from datetime import datetime
+import enum
 from core.extensions import db
 
 class ReporteTrabajo(db.Model):
     __tablename__ = 'reportes_trabajo'
+    # los reportes de una orden en orden cronológico (listado y export)
+    __table_args__ = (db.Index('ix_reportes_trabajo_orden_id_creado_en', 'orden_id', 'creado_en'),)
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -10,7 +13,7 @@ class ReporteTrabajo(db.Model):
     orden_id = db.Column(db.Integer, db.ForeignKey('ordenes_trabajo.id'), nullable=False)
 
     # quién (empleado) hizo el trabajo técnico
-    mecanico_id = db.Column(db.Integer, db.ForeignKey('empleados.id'), nullable=False)
+    mecanico_id = db.Column(db.Integer, db.ForeignKey('empleados.id'), nullable=False, index=True)
 
     # descripción técnica del trabajo realizado
     descripcion = db.Column(db.Text, nullable=False)
@@ -38,4 +41,68 @@ class ReporteTrabajo(db.Model):
             "marca_nombre": self.marca_nombre,
             "modelo_nombre": self.modelo_nombre,
             "creado_en": self.creado_en.isoformat() if self.creado_en else None,
-        }
\ No newline at end of file
+        }
+
+class EstadoJobEnum(enum.Enum):
+    PENDIENTE = "PENDIENTE"      # en cola
+    PROCESANDO = "PROCESANDO"    # un worker lo está generando
+    LISTO = "LISTO"              # archivo en disco, se puede descargar
+    FALLIDO = "FALLIDO"
+
+
+class JobReporte(db.Model):
+    """
+    Export de órdenes (xlsx/pdf) pedido por la API y generado por
+    `flask reportes worker`. La tabla hace de cola, no hace falta broker.
+    """
+    __tablename__ = 'reporte_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    formato = db.Column(db.String(10), nullable=False)
+    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'))
+    filtros = db.Column(db.JSON, nullable=False, default=dict)
+    solicitado_por = db.Column(db.Integer, db.ForeignKey('usuarios.id'))
+
+    estado = db.Column(db.Enum(EstadoJobEnum), nullable=False,
+                       default=EstadoJobEnum.PENDIENTE, index=True)
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    total_filas = db.Column(db.Integer)
+    filas_procesadas = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+
+    # archivo generado
+    ruta_archivo = db.Column(db.String(500))
+    nombre_archivo = db.Column(db.String(255))
+    mimetype = db.Column(db.String(100))
+
+    # quién lo tomó y cuándo (para recuperar los que quedaron colgados)
+    reclamado_por = db.Column(db.String(64))
+    reclamado_en = db.Column(db.DateTime)
+
+    creado_en = db.Column(db.DateTime, default=datetime.utcnow)
+    terminado_en = db.Column(db.DateTime)
+
+    @property
+    def progreso(self):
+        """0-100; si todavía no se contó el total, 0."""
+        if self.estado == EstadoJobEnum.LISTO:
+            return 100
+        if not self.total_filas:
+            return 0
+        return min(99, int(self.filas_procesadas * 100 / self.total_filas))
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "formato": self.formato,
+            "cliente_id": self.cliente_id,
+            "filtros": self.filtros or {},
+            "estado": self.estado.value if self.estado else None,
+            "progreso": self.progreso,
+            "total_filas": self.total_filas,
+            "filas_procesadas": self.filas_procesadas,
+            "error": self.error,
+            "nombre_archivo": self.nombre_archivo,
+            "creado_en": self.creado_en.isoformat() if self.creado_en else None,
+            "terminado_en": self.terminado_en.isoformat() if self.terminado_en else None,
+        }
@@ -1,11 +1,12 @@
 from datetime import datetime
 from core.extensions import db
+from core.catalogo import catalogo
 
 class Motocicleta(db.Model):
     __tablename__ = 'motocicletas'
     
     id = db.Column(db.Integer, primary_key=True)
-    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False)
+    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False, index=True)
     modelo_id = db.Column(db.Integer, db.ForeignKey('modelos_moto.id'), nullable=True)
     placa = db.Column(db.String(50), unique=True, nullable=True)
     vin = db.Column(db.String(100), unique=True, nullable=True)
@@ -15,7 +16,8 @@ class Motocicleta(db.Model):
     kilometraje_km = db.Column(db.Integer, default=0)
     ultima_revision = db.Column(db.Date, nullable=True)
     notas = db.Column(db.Text)
-    creado_en = db.Column(db.DateTime, default=datetime.utcnow)
+    # NOT NULL: el listado pagina por (creado_en, id)
+    creado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     actualizado_en = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     ordenes = db.relationship('OrdenTrabajo', backref='motocicleta', lazy=True)
@@ -39,10 +41,11 @@ class Motocicleta(db.Model):
         
         if include_relations:
             data['cliente'] = self.cliente.to_dict() if self.cliente else None
-            data['modelo'] = self.modelo.to_dict() if self.modelo else None
-            if self.modelo and self.modelo.marca:
-                data['marca'] = self.modelo.marca.to_dict()
-            else:
-                data['marca'] = None
+            # modelo y marca salen del catálogo en memoria, sin query por moto
+            modelo = catalogo.modelo(self.modelo_id) if self.modelo_id else None
+            if modelo is None and self.modelo:
+                modelo = self.modelo.to_dict()
+            data['modelo'] = modelo
+            data['marca'] = modelo['marca'] if modelo else None
         
         return data
@@ -5,13 +5,29 @@ const api = axios.create({
   baseURL: import.meta.env.VITE_API_URL ?? 'http://localhost:5000',
 });
 
+// hora de la última escritura que avisó el backend: se reenvía para que
+// los GET siguientes lean del primario aunque caigan en otro worker
+const CABECERA_ESCRITURA = 'X-Moteka-Escritura';
+let ultimaEscritura: string | null = null;
+
 api.interceptors.request.use((config: InternalAxiosRequestConfig) => {
   const token = getToken();
+  config.headers = config.headers ?? {};
   if (token) {
-    config.headers = config.headers ?? {};
     (config.headers as any).Authorization = `Bearer ${token}`;
   }
+  if (ultimaEscritura) {
+    (config.headers as any)[CABECERA_ESCRITURA] = ultimaEscritura;
+  }
   return config;
 });
 
+api.interceptors.response.use((response) => {
+  const escritura = response.headers?.[CABECERA_ESCRITURA.toLowerCase()];
+  if (escritura) {
+    ultimaEscritura = escritura;
+  }
+  return response;
+});
+
 export default api;